@@ -11,7 +11,17 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.config import settings  # noqa: E402
 from app.db.base import Base  # noqa: E402
-from app.db.models import auth, item, subscription  # noqa: F401,E402
+from app.db.models import (  # noqa: F401,E402
+    api_usage,
+    auth,
+    item,
+    item_archive,
+    item_event,
+    item_import,
+    item_shard,
+    item_stats,
+    subscription,
+)
 
 config = context.config
 
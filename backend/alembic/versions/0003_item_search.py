@@ -0,0 +1,51 @@
+"""add full-text and trigram search over items
+
+Revision ID: 0003_item_search
+Revises: 0002_admin_stripe
+Create Date: 2026-10-18 10:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0003_item_search"
+down_revision = "0002_admin_stripe"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "items",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index("ix_items_owner_id", "items", ["owner_id"])
+    op.create_index("ix_items_search_vector", "items", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_items_name_trgm",
+        "items",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_items_name_trgm", table_name="items")
+    op.drop_index("ix_items_search_vector", table_name="items")
+    op.drop_index("ix_items_owner_id", table_name="items")
+    op.drop_column("items", "search_vector")
+    # pg_trgm is left installed; other objects may depend on it
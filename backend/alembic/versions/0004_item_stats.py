@@ -0,0 +1,106 @@
+"""add per-owner item counters
+
+Revision ID: 0004_item_stats
+Revises: 0003_item_search
+Create Date: 2026-10-18 11:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_item_stats"
+down_revision = "0003_item_search"
+branch_labels = None
+depends_on = None
+
+
+ITEM_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION item_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO item_stats (owner_id, item_count, active_count, updated_at)
+        SELECT owner_id, count(*), count(*) FILTER (WHERE is_active), now()
+        FROM new_rows
+        GROUP BY owner_id
+        ORDER BY owner_id
+        ON CONFLICT (owner_id) DO UPDATE SET
+            item_count = item_stats.item_count + EXCLUDED.item_count,
+            active_count = item_stats.active_count + EXCLUDED.active_count,
+            updated_at = EXCLUDED.updated_at;
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE item_stats SET
+            item_count = item_stats.item_count + delta.item_count,
+            active_count = item_stats.active_count + delta.active_count,
+            updated_at = now()
+        FROM (
+            SELECT owner_id, sum(items) AS item_count, sum(active) AS active_count
+            FROM (
+                SELECT owner_id, -1 AS items, -(is_active IS TRUE)::int AS active FROM old_rows
+                UNION ALL
+                SELECT owner_id, 1, (is_active IS TRUE)::int FROM new_rows
+            ) AS changes
+            GROUP BY owner_id
+            HAVING sum(items) <> 0 OR sum(active) <> 0
+        ) AS delta
+        WHERE item_stats.owner_id = delta.owner_id;
+    ELSE
+        UPDATE item_stats SET
+            item_count = item_stats.item_count - delta.item_count,
+            active_count = item_stats.active_count - delta.active_count,
+            updated_at = now()
+        FROM (
+            SELECT
+                owner_id,
+                count(*) AS item_count,
+                count(*) FILTER (WHERE is_active) AS active_count
+            FROM old_rows
+            GROUP BY owner_id
+        ) AS delta
+        WHERE item_stats.owner_id = delta.owner_id;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "item_stats",
+        sa.Column("owner_id", sa.String(), primary_key=True),
+        sa.Column("item_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("active_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["user.id"], ondelete="CASCADE"),
+    )
+    op.execute(ITEM_STATS_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER items_stats_insert AFTER INSERT ON items "
+        "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION item_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_stats_update AFTER UPDATE ON items "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION item_stats_apply()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_stats_delete AFTER DELETE ON items "
+        "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION item_stats_apply()"
+    )
+    # Triggers are in place and items is locked by CREATE TRIGGER, so the backfill is exact
+    op.execute(
+        "INSERT INTO item_stats (owner_id, item_count, active_count, updated_at) "
+        "SELECT owner_id, count(*), count(*) FILTER (WHERE is_active), now() "
+        "FROM items GROUP BY owner_id"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS items_stats_delete ON items")
+    op.execute("DROP TRIGGER IF EXISTS items_stats_update ON items")
+    op.execute("DROP TRIGGER IF EXISTS items_stats_insert ON items")
+    op.execute("DROP FUNCTION IF EXISTS item_stats_apply()")
+    op.drop_table("item_stats")
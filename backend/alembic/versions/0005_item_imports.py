@@ -0,0 +1,38 @@
+"""add item import staging table
+
+Revision ID: 0005_item_imports
+Revises: 0004_item_stats
+Create Date: 2026-10-18 14:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_item_imports"
+down_revision = "0004_item_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "item_import_rows",
+        sa.Column("import_id", sa.String(), nullable=False),
+        sa.Column("line", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Text(), nullable=True),
+        sa.Column("name", sa.Text(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("is_active", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column(
+            "staged_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("import_id", "line"),
+        prefixes=["UNLOGGED"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("item_import_rows")
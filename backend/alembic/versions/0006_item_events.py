@@ -0,0 +1,95 @@
+"""add item change notifications
+
+Revision ID: 0006_item_events
+Revises: 0005_item_imports
+Create Date: 2026-10-18 16:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_item_events"
+down_revision = "0005_item_imports"
+branch_labels = None
+depends_on = None
+
+
+ITEM_EVENTS_EMIT_FUNCTION = """
+CREATE OR REPLACE FUNCTION item_events_emit(op text, owner text, total bigint, ids text[])
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    changed_id text;
+BEGIN
+    IF total > 100 THEN
+        PERFORM pg_notify('item_events', json_build_object(
+            'seq', nextval('item_event_seq'), 'owner_id', owner, 'op', op, 'count', total
+        )::text);
+        RETURN;
+    END IF;
+    FOREACH changed_id IN ARRAY ids LOOP
+        PERFORM pg_notify('item_events', json_build_object(
+            'seq', nextval('item_event_seq'), 'owner_id', owner, 'op', op, 'id', changed_id
+        )::text);
+    END LOOP;
+END;
+$$
+"""
+
+ITEM_EVENTS_FUNCTION = """
+CREATE OR REPLACE FUNCTION item_events_notify() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    change record;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        FOR change IN
+            SELECT owner_id, count(*) AS total, (array_agg(id))[1:100] AS ids
+            FROM old_rows GROUP BY owner_id
+        LOOP
+            PERFORM item_events_emit('deleted', change.owner_id, change.total, change.ids);
+        END LOOP;
+    ELSE
+        FOR change IN
+            SELECT owner_id, count(*) AS total, (array_agg(id))[1:100] AS ids
+            FROM new_rows GROUP BY owner_id
+        LOOP
+            PERFORM item_events_emit(
+                CASE TG_OP WHEN 'INSERT' THEN 'created' ELSE 'updated' END,
+                change.owner_id, change.total, change.ids
+            );
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence("item_event_seq")))
+    op.execute(ITEM_EVENTS_EMIT_FUNCTION)
+    op.execute(ITEM_EVENTS_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER items_events_insert AFTER INSERT ON items "
+        "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION item_events_notify()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_events_update AFTER UPDATE ON items "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION item_events_notify()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_events_delete AFTER DELETE ON items "
+        "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION item_events_notify()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS items_events_delete ON items")
+    op.execute("DROP TRIGGER IF EXISTS items_events_update ON items")
+    op.execute("DROP TRIGGER IF EXISTS items_events_insert ON items")
+    op.execute("DROP FUNCTION IF EXISTS item_events_notify()")
+    op.execute("DROP FUNCTION IF EXISTS item_events_emit(text, text, bigint, text[])")
+    op.execute(sa.schema.DropSequence(sa.Sequence("item_event_seq")))
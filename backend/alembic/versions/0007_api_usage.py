@@ -0,0 +1,46 @@
+"""add api usage metering tables
+
+Revision ID: 0007_api_usage
+Revises: 0006_item_events
+Create Date: 2026-10-18 18:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_api_usage"
+down_revision = "0006_item_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "api_usage",
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("calls", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["owner_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("owner_id", "day"),
+    )
+    op.create_table(
+        "api_usage_rollups",
+        sa.Column("batch_id", sa.String(), nullable=False),
+        sa.Column(
+            "rolled_up_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("batch_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("api_usage_rollups")
+    op.drop_table("api_usage")
@@ -0,0 +1,25 @@
+"""add item version for optimistic concurrency
+
+Revision ID: 0008_item_version
+Revises: 0007_api_usage
+Create Date: 2026-10-18 19:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_item_version"
+down_revision = "0007_api_usage"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A constant default is stored in the catalog: no table rewrite on Postgres 11+
+    op.add_column("items", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("items", "version")
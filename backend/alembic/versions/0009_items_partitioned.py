@@ -0,0 +1,148 @@
+"""add hash-partitioned copy of items, kept in sync until cutover
+
+Revision ID: 0009_items_partitioned
+Revises: 0008_item_version
+Create Date: 2026-10-18 20:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0009_items_partitioned"
+down_revision = "0008_item_version"
+branch_labels = None
+depends_on = None
+
+
+ITEM_PARTITIONS = 16
+
+COLUMNS = "id, name, description, owner_id, is_active, created_at, updated_at, version"
+
+# Applies every write on items to items_partitioned, in the writer's transaction. Upserts
+# make it safe alongside the backfill, which never overwrites a row mirrored here.
+MIRROR_UPSERT = f"""
+        INSERT INTO items_partitioned ({COLUMNS})
+        SELECT {COLUMNS} FROM new_rows
+        ON CONFLICT (owner_id, id) DO UPDATE SET
+            name = EXCLUDED.name,
+            description = EXCLUDED.description,
+            is_active = EXCLUDED.is_active,
+            created_at = EXCLUDED.created_at,
+            updated_at = EXCLUDED.updated_at,
+            version = EXCLUDED.version;"""
+
+MIRROR_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION items_partition_mirror() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN{MIRROR_UPSERT}
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Rows whose key changed move: drop the old key before writing the new one
+        DELETE FROM items_partitioned AS target
+        USING old_rows
+        WHERE target.owner_id = old_rows.owner_id AND target.id = old_rows.id
+            AND NOT EXISTS (
+                SELECT 1 FROM new_rows
+                WHERE new_rows.owner_id = old_rows.owner_id AND new_rows.id = old_rows.id
+            );{MIRROR_UPSERT}
+    ELSE
+        DELETE FROM items_partitioned AS target
+        USING old_rows
+        WHERE target.owner_id = old_rows.owner_id AND target.id = old_rows.id;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "items_partitioned",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["owner_id"],
+            ["user.id"],
+            name="items_partitioned_owner_id_fkey",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("owner_id", "id", name="items_partitioned_pkey"),
+        postgresql_partition_by="HASH (owner_id)",
+    )
+    for remainder in range(ITEM_PARTITIONS):
+        op.execute(
+            f"CREATE TABLE items_p{remainder:02d} PARTITION OF items_partitioned "
+            f"FOR VALUES WITH (MODULUS {ITEM_PARTITIONS}, REMAINDER {remainder})"
+        )
+    # Created on the parent, so every partition gets its own copy; renamed at cutover
+    op.create_index("ix_items_partitioned_id", "items_partitioned", ["id"])
+    op.create_index(
+        "ix_items_partitioned_search_vector",
+        "items_partitioned",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_items_partitioned_name_trgm",
+        "items_partitioned",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+    # Progress of python -m app.commands.backfill_item_partitions
+    op.create_table(
+        "items_partition_backfill",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("last_id", sa.String(), nullable=False, server_default=""),
+        sa.Column("rows_copied", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO items_partition_backfill (id) VALUES (1)")
+
+    op.execute(MIRROR_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER items_partition_mirror_insert AFTER INSERT ON items "
+        "REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION items_partition_mirror()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_partition_mirror_update AFTER UPDATE ON items "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION items_partition_mirror()"
+    )
+    op.execute(
+        "CREATE TRIGGER items_partition_mirror_delete AFTER DELETE ON items "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION items_partition_mirror()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS items_partition_mirror_delete ON items")
+    op.execute("DROP TRIGGER IF EXISTS items_partition_mirror_update ON items")
+    op.execute("DROP TRIGGER IF EXISTS items_partition_mirror_insert ON items")
+    op.execute("DROP FUNCTION IF EXISTS items_partition_mirror()")
+    op.drop_table("items_partition_backfill")
+    op.drop_table("items_partitioned")
@@ -0,0 +1,196 @@
+"""replace items with its hash-partitioned copy
+
+Revision ID: 0010_items_partition_cutover
+Revises: 0009_items_partitioned
+Create Date: 2026-10-18 20:30:00
+
+Run ``python -m app.commands.backfill_item_partitions`` between 0009 and this
+revision on large tables. Rows the backfill has not reached yet are copied here,
+under an exclusive lock on ``items``.
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0010_items_partition_cutover"
+down_revision = "0009_items_partitioned"
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = "id, name, description, owner_id, is_active, created_at, updated_at, version"
+
+INDEX_RENAMES = (
+    ("ix_items_partitioned_id", "ix_items_id"),
+    ("ix_items_partitioned_search_vector", "ix_items_search_vector"),
+    ("ix_items_partitioned_name_trgm", "ix_items_name_trgm"),
+)
+
+CONSTRAINT_RENAMES = (
+    ("items_partitioned_pkey", "items_pkey"),
+    ("items_partitioned_owner_id_fkey", "items_owner_id_fkey"),
+)
+
+# Statement-level triggers of 0004 (item_stats) and 0006 (item_events); the functions stay
+ITEM_TRIGGERS = (
+    "CREATE TRIGGER items_stats_insert AFTER INSERT ON items "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION item_stats_apply()",
+    "CREATE TRIGGER items_stats_update AFTER UPDATE ON items "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION item_stats_apply()",
+    "CREATE TRIGGER items_stats_delete AFTER DELETE ON items "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION item_stats_apply()",
+    "CREATE TRIGGER items_events_insert AFTER INSERT ON items "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION item_events_notify()",
+    "CREATE TRIGGER items_events_update AFTER UPDATE ON items "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION item_events_notify()",
+    "CREATE TRIGGER items_events_delete AFTER DELETE ON items "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION item_events_notify()",
+)
+
+# Mirror of 0009, restored by downgrade
+MIRROR_UPSERT = f"""
+        INSERT INTO items_partitioned ({COLUMNS})
+        SELECT {COLUMNS} FROM new_rows
+        ON CONFLICT (owner_id, id) DO UPDATE SET
+            name = EXCLUDED.name,
+            description = EXCLUDED.description,
+            is_active = EXCLUDED.is_active,
+            created_at = EXCLUDED.created_at,
+            updated_at = EXCLUDED.updated_at,
+            version = EXCLUDED.version;"""
+
+MIRROR_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION items_partition_mirror() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN{MIRROR_UPSERT}
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Rows whose key changed move: drop the old key before writing the new one
+        DELETE FROM items_partitioned AS target
+        USING old_rows
+        WHERE target.owner_id = old_rows.owner_id AND target.id = old_rows.id
+            AND NOT EXISTS (
+                SELECT 1 FROM new_rows
+                WHERE new_rows.owner_id = old_rows.owner_id AND new_rows.id = old_rows.id
+            );{MIRROR_UPSERT}
+    ELSE
+        DELETE FROM items_partitioned AS target
+        USING old_rows
+        WHERE target.owner_id = old_rows.owner_id AND target.id = old_rows.id;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+MIRROR_TRIGGERS = (
+    "CREATE TRIGGER items_partition_mirror_insert AFTER INSERT ON items "
+    "REFERENCING NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION items_partition_mirror()",
+    "CREATE TRIGGER items_partition_mirror_update AFTER UPDATE ON items "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION items_partition_mirror()",
+    "CREATE TRIGGER items_partition_mirror_delete AFTER DELETE ON items "
+    "REFERENCING OLD TABLE AS old_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION items_partition_mirror()",
+)
+
+
+def upgrade() -> None:
+    op.execute("LOCK TABLE items IN ACCESS EXCLUSIVE MODE")
+    # Rows up to last_id were backfilled and later writes mirrored: copy only the rest
+    op.execute(
+        f"""
+        INSERT INTO items_partitioned ({COLUMNS})
+        SELECT {COLUMNS} FROM items
+        WHERE items.id > (
+            SELECT last_id FROM items_partition_backfill WHERE completed_at IS NULL
+        )
+        ON CONFLICT (owner_id, id) DO NOTHING
+        """
+    )
+
+    # Dropping the old table drops its stats, events and mirror triggers with it
+    op.drop_table("items")
+    op.execute("DROP FUNCTION items_partition_mirror()")
+    op.drop_table("items_partition_backfill")
+
+    op.rename_table("items_partitioned", "items")
+    for old, new in CONSTRAINT_RENAMES:
+        op.execute(f"ALTER TABLE items RENAME CONSTRAINT {old} TO {new}")
+    for old, new in INDEX_RENAMES:
+        op.execute(f"ALTER INDEX {old} RENAME TO {new}")
+    for statement in ITEM_TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    # Offline: copies every row back into an unpartitioned table under an exclusive lock
+    op.execute("LOCK TABLE items IN ACCESS EXCLUSIVE MODE")
+    for trigger in (
+        "items_events_delete",
+        "items_events_update",
+        "items_events_insert",
+        "items_stats_delete",
+        "items_stats_update",
+        "items_stats_insert",
+    ):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger} ON items")
+    for old, new in INDEX_RENAMES:
+        op.execute(f"ALTER INDEX {new} RENAME TO {old}")
+    for old, new in CONSTRAINT_RENAMES:
+        op.execute(f"ALTER TABLE items RENAME CONSTRAINT {new} TO {old}")
+    op.rename_table("items", "items_partitioned")
+
+    op.create_table(
+        "items",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["owner_id"], ["user.id"], ondelete="CASCADE"),
+    )
+    op.execute(f"INSERT INTO items ({COLUMNS}) SELECT {COLUMNS} FROM items_partitioned")
+    op.create_index("ix_items_owner_id", "items", ["owner_id"])
+    op.create_index("ix_items_search_vector", "items", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_items_name_trgm",
+        "items",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    for statement in ITEM_TRIGGERS:
+        op.execute(statement)
+
+    op.create_table(
+        "items_partition_backfill",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("last_id", sa.String(), nullable=False, server_default=""),
+        sa.Column("rows_copied", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO items_partition_backfill (id, completed_at) VALUES (1, now())")
+    op.execute(MIRROR_FUNCTION)
+    for statement in MIRROR_TRIGGERS:
+        op.execute(statement)
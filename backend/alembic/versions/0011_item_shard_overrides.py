@@ -0,0 +1,64 @@
+"""add item shard overrides and muted item events
+
+Revision ID: 0011_item_shard_overrides
+Revises: 0010_items_partition_cutover
+Create Date: 2026-10-18 21:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011_item_shard_overrides"
+down_revision = "0010_items_partition_cutover"
+branch_labels = None
+depends_on = None
+
+
+EMIT_FUNCTION = """
+CREATE OR REPLACE FUNCTION item_events_emit(op text, owner text, total bigint, ids text[])
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    changed_id text;
+BEGIN{mute}
+    IF total > 100 THEN
+        PERFORM pg_notify('item_events', json_build_object(
+            'seq', nextval('item_event_seq'), 'owner_id', owner, 'op', op, 'count', total
+        )::text);
+        RETURN;
+    END IF;
+    FOREACH changed_id IN ARRAY ids LOOP
+        PERFORM pg_notify('item_events', json_build_object(
+            'seq', nextval('item_event_seq'), 'owner_id', owner, 'op', op, 'id', changed_id
+        )::text);
+    END LOOP;
+END;
+$$
+"""
+
+# Shard moves copy and delete an owner's items without telling their event streams
+MUTE = """
+    IF current_setting('app.mute_item_events', true) = 'on' THEN
+        RETURN;
+    END IF;"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "item_shard_overrides",
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("shard", sa.String(), nullable=False),
+        sa.Column("moving", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["owner_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("owner_id"),
+    )
+    op.execute(EMIT_FUNCTION.format(mute=MUTE))
+
+
+def downgrade() -> None:
+    op.execute(EMIT_FUNCTION.format(mute=""))
+    op.drop_table("item_shard_overrides")
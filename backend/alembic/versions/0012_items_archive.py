@@ -0,0 +1,59 @@
+"""add items_archive and the index of archivable items
+
+Revision ID: 0012_items_archive
+Revises: 0011_item_shard_overrides
+Create Date: 2026-10-19 09:00:00
+
+The partial index is built on each partition concurrently and then attached,
+so items stay writable while it builds.
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012_items_archive"
+down_revision = "0011_item_shard_overrides"
+branch_labels = None
+depends_on = None
+
+
+ITEM_PARTITIONS = 16
+
+
+def upgrade() -> None:
+    op.create_table(
+        "items_archive",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column(
+            "archived_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["owner_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("owner_id", "id", name="items_archive_pkey"),
+    )
+
+    # Invalid on the parent until every partition's index is attached
+    op.execute("CREATE INDEX ix_items_archivable ON ONLY items (updated_at) WHERE NOT is_active")
+    with op.get_context().autocommit_block():
+        for remainder in range(ITEM_PARTITIONS):
+            partition = f"items_p{remainder:02d}"
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{partition}_archivable "
+                f"ON {partition} (updated_at) WHERE NOT is_active"
+            )
+            op.execute(
+                f"ALTER INDEX ix_items_archivable ATTACH PARTITION ix_{partition}_archivable"
+            )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX ix_items_archivable")
+    op.drop_table("items_archive")
@@ -1,17 +1,41 @@
-from datetime import datetime
+import time
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+from datetime import UTC, datetime
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_ticket import (
+    TICKET_COOKIE,
+    AuthTicket,
+    encode_ticket,
+    session_fingerprint,
+    ticket_epoch,
+    verify_ticket,
+)
 from app.core.cache import get_redis
+from app.core.config import settings
 from app.db.models.auth import Session, User
+from app.db.models.subscription import Subscription
 from app.db.session import get_db
+from app.db.shards import ShardRouter, get_shard_router
 from app.services.cache_service import SessionCache
+from app.services.session_filter import (
+    session_filter,
+    session_filter_false_positives,
+    session_rejections,
+)
+from app.services.usage import usage_meter
+
+SESSION_COOKIE = "better-auth.session_token"
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
 
 def get_session_token(request: Request) -> str:
-    token = request.cookies.get("better-auth.session_token")
+    token = request.cookies.get(SESSION_COOKIE)
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     return token
@@ -43,18 +67,81 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
     return await validate_session(db, token)
 
 
+async def get_auth_ticket(request: Request) -> AuthTicket | None:
+    """Verify the auth ticket cookie locally; None if missing, expired or revoked."""
+    value = request.cookies.get(TICKET_COOKIE)
+    token = request.cookies.get(SESSION_COOKIE)
+    if not value or not token or ticket_epoch.current is None:
+        return None
+    return verify_ticket(value, token, settings.secret_key, ticket_epoch.current, time.time())
+
+
+@dataclass
+class TicketIssuer:
+    response: Response
+    session_token: str
+    epoch: int
+
+    def issue(self, user: User, subscription: Subscription | None) -> None:
+        ticket = AuthTicket(
+            user_id=user.id,
+            role=user.role,
+            banned=bool(user.banned),
+            plan=subscription.plan if subscription is not None else None,
+            expires_at=int(time.time()) + settings.auth_ticket_ttl,
+            epoch=self.epoch,
+            session=session_fingerprint(self.session_token),
+        )
+        self.response.set_cookie(
+            TICKET_COOKIE,
+            encode_ticket(ticket, settings.secret_key),
+            max_age=settings.auth_ticket_ttl,
+            httponly=True,
+            secure=settings.app_env == "production",
+            samesite="lax",
+        )
+
+
+async def get_ticket_issuer(request: Request, response: Response) -> TicketIssuer | None:
+    """Return an issuer when auth tickets are enabled and the revocation epoch is known."""
+    token = request.cookies.get(SESSION_COOKIE)
+    if settings.auth_ticket_ttl <= 0 or not token or ticket_epoch.current is None:
+        return None
+    return TicketIssuer(response, token, ticket_epoch.current)
+
+
+def ticket_user(ticket: AuthTicket) -> User:
+    """A detached user restored from a ticket: only id, role and ban state are set."""
+    return User(id=ticket.user_id, role=ticket.role, banned=ticket.banned)
+
+
 async def get_current_user_cached(
     request: Request,
     db: AsyncSession = Depends(get_db),
     redis=Depends(get_redis),
+    ticket: AuthTicket | None = Depends(get_auth_ticket),
 ) -> User:
+    if ticket is not None:
+        usage_meter.record(ticket.user_id)
+        return ticket_user(ticket)
+
     token = get_session_token(request)
     cache = SessionCache(redis)
+    # Filter hits can be false positives: only the negative cache entry is authoritative
+    if session_filter.might_be_rejected(token):
+        if await cache.is_rejected(token):
+            session_rejections.inc(source="cache")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired session"
+            )
+        session_filter_false_positives.inc()
+
     cached_user_id = await cache.get_user_id(token)
     if cached_user_id:
         result = await db.execute(select(User).where(User.id == cached_user_id))
         user = result.scalar_one_or_none()
         if user:
+            usage_meter.record(user.id)
             return user
         await cache.delete(token)
 
@@ -66,17 +153,46 @@ async def get_current_user_cached(
     )
     session = result.scalar_one_or_none()
     if not session:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired session"
-        )
+        raise await _reject(cache, token, "Invalid or expired session")
 
     result = await db.execute(select(User).where(User.id == session.user_id))
     user = result.scalar_one_or_none()
     if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        raise await _reject(cache, token, "User not found")
 
-    ttl_seconds = int((session.expires_at - datetime.utcnow()).total_seconds())
+    # timestamptz columns load as aware datetimes; treat naive values as UTC
+    expires_at = session.expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=UTC)
+    ttl_seconds = int((expires_at - datetime.now(UTC)).total_seconds())
     if ttl_seconds > 0:
         await cache.set_user_id(token, user.id, ttl=ttl_seconds)
 
+    usage_meter.record(user.id)
     return user
+
+
+async def _reject(cache: SessionCache, token: str, detail: str) -> HTTPException:
+    """Remember a failed lookup so repeats are refused without touching the database."""
+    session_rejections.inc(source="database")
+    if await cache.reject(token, ttl=settings.session_negative_ttl):
+        await session_filter.add(cache.redis, token)
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+async def get_item_db(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user_cached),
+    router: ShardRouter = Depends(get_shard_router),
+) -> AsyncGenerator[AsyncSession, None]:
+    """A session on the current user's item database: their shard, or the primary."""
+    if not router.enabled:
+        yield db
+        return
+
+    router.check(user.id, write=request.method not in SAFE_METHODS)
+    # Authentication is done: give the primary connection back for the rest of the request
+    await db.close()
+    async with router.session(user.id) as session:
+        yield session
@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user_cached
 from app.db.models.auth import User
+from app.db.session import get_db
 from app.schemas.auth import UserResponse
 
 router = APIRouter(tags=["auth"])
 
 
 @router.get("/users/me", response_model=UserResponse)
-async def get_current_user_endpoint(user: User = Depends(get_current_user_cached)) -> User:
+async def get_current_user_endpoint(
+    user: User = Depends(get_current_user_cached),
+    db: AsyncSession = Depends(get_db),
+) -> User:
     """Return the current authenticated user."""
-    return user
+    # Users restored from an auth ticket only carry their id, role and ban state
+    profile = await db.get(User, user.id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return profile
@@ -1,42 +1,162 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from redis.asyncio import Redis
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user_cached
+from app.api.deps import get_current_user_cached, get_item_db
+from app.core.cache import get_redis
 from app.core.config import settings
 from app.core.limiter import limiter
+from app.core.response_cache import cache_response
 from app.core.subscription_middleware import require_subscription
 from app.db.models.auth import User
 from app.db.models.item import Item
+from app.db.models.item_archive import ItemArchive
+from app.db.models.item_stats import ItemStats
 from app.db.models.subscription import Subscription
 from app.db.session import get_db
-from app.schemas.item import ItemCreate, ItemResponse, ItemUpdate
+from app.schemas.item import (
+    ITEM_FIELDS,
+    ItemCreate,
+    ItemExportResponse,
+    ItemImportResponse,
+    ItemResponse,
+    ItemSearchPage,
+    ItemSearchResult,
+    ItemStatsResponse,
+    ItemUpdate,
+    partial_item_list_adapter,
+    partial_item_response,
+)
+from app.services.cache_invalidation import invalidate_items_after_commit, item_stats_cache_key
+from app.services.item_archive import count_archived_items, restore_item, select_items
+from app.services.item_events import ItemEventBroker, get_item_event_broker, stream_events
+from app.services.item_export import create_export, get_export, read_export
+from app.services.item_import import (
+    CSV_CONTENT_TYPES,
+    NDJSON_CONTENT_TYPES,
+    get_import,
+    iter_lines,
+    limit_size,
+    merge_import,
+    new_import_id,
+    parse_csv,
+    parse_ndjson,
+    queue_import,
+    stage_import,
+    summary_status,
+)
+from app.services.item_search import SearchCursor, build_item_search_query
 
 router = APIRouter(prefix="/items", tags=["items"])
 
 rate_limit = f"{settings.rate_limit_requests}/{settings.rate_limit_window} second"
 
+ITEM_STATS_CACHE_TTL = 60
+
+
+def get_item_fields(
+    fields: str | None = Query(
+        None,
+        description=f"Comma-separated subset of item fields to return ({', '.join(ITEM_FIELDS)})",
+    ),
+) -> tuple[str, ...] | None:
+    """Parse a sparse fieldset, returning the requested fields in response order."""
+    if fields is None:
+        return None
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = sorted(requested.difference(ITEM_FIELDS))
+    if not requested or unknown:
+        raise RequestValidationError(
+            [
+                {
+                    "loc": ("query", "fields"),
+                    "msg": f"Unknown item fields: {', '.join(unknown)}"
+                    if unknown
+                    else "At least one field is required",
+                    "type": "value_error",
+                }
+            ]
+        )
+    return tuple(field for field in ITEM_FIELDS if field in requested)
+
+
+def item_etag(item: Item | ItemArchive) -> str:
+    return f'"{item.version}"'
+
+
+def get_expected_versions(
+    if_match: str | None = Header(
+        None, alias="If-Match", description="ETag of the item version being updated"
+    ),
+) -> tuple[int, ...] | None:
+    """Parse ``If-Match`` into the item versions it accepts; None for ``*`` or no header.
+
+    ``If-Match`` compares strongly (RFC 9110), so weak and foreign ETags in the
+    list match no version and the update fails with 412.
+    """
+    if if_match is None:
+        return None
+    versions = []
+    for tag in (tag.strip() for tag in if_match.split(",")):
+        if tag == "*":
+            return None
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return tuple(versions)
+
+
+async def get_item_count(db: AsyncSession, owner_id: str) -> int:
+    """Read the owner's item total from the trigger-maintained counters."""
+    count = await db.scalar(select(ItemStats.item_count).where(ItemStats.owner_id == owner_id))
+    return count or 0
+
 
 @router.get("/", response_model=list[ItemResponse])
 @limiter.limit(rate_limit)
 async def list_items(
     request: Request,
+    response: Response,
     _subscription: Annotated[Subscription, Depends(require_subscription)],
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_item_db),
     user: User = Depends(get_current_user_cached),
     skip: int = Query(0, description="Number of items to skip"),
     limit: int = Query(100, description="Maximum items to return", le=1000),
-) -> list[Item]:
+    fields: tuple[str, ...] | None = Depends(get_item_fields),
+    include_archived: bool = Query(False, description="Also list archived items, after the rest"),
+) -> list[Item] | Response:
     """
     List all items for the current authenticated user.
 
-    Returns a paginated list of items owned by the current user.
+    Returns a paginated list of items owned by the current user. When ``fields``
+    is given only those columns are selected and returned. The user's total item
+    count is returned in the ``X-Total-Count`` header. Items archived after a long
+    inactivity are left out unless ``include_archived`` is set.
     """
+    total = await get_item_count(db, user.id)
+    if include_archived:
+        total += await count_archived_items(db, user.id)
+        fields = fields or ITEM_FIELDS
+    if fields is not None:
+        result = await db.execute(
+            select_items(user.id, fields, include_archived).offset(skip).limit(limit)
+        )
+        adapter = partial_item_list_adapter(fields)
+        return Response(
+            content=adapter.dump_json(adapter.validate_python(result.mappings().all())),
+            media_type="application/json",
+            headers={"X-Total-Count": str(total)},
+        )
+
     result = await db.execute(
-        select(Item).where(Item.owner_id == user.id).offset(skip).limit(limit)
+        select(Item).where(Item.owner_id == user.id).order_by(Item.id).offset(skip).limit(limit)
     )
+    response.headers["X-Total-Count"] = str(total)
     return list(result.scalars().all())
 
 
@@ -44,31 +164,278 @@ async def list_items(
 @limiter.limit(rate_limit)
 async def create_item(
     request: Request,
+    response: Response,
     item: ItemCreate,
     _subscription: Annotated[Subscription, Depends(require_subscription)],
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_item_db),
     user: User = Depends(get_current_user_cached),
 ) -> Item:
     """Create a new item for the current user."""
-    db_item = Item(**item.model_dump(), owner_id=user.id)
-    db.add(db_item)
+    db_item = await db.scalar(
+        insert(Item).values(**item.model_dump(), owner_id=user.id).returning(Item)
+    )
+    invalidate_items_after_commit(db, user.id)
     await db.commit()
-    await db.refresh(db_item)
+    response.headers["ETag"] = item_etag(db_item)
     return db_item
 
 
+@router.post(
+    "/import",
+    response_model=ItemImportResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": ItemImportResponse}},
+)
+@limiter.limit(rate_limit)
+async def import_items(
+    request: Request,
+    response: Response,
+    _subscription: Annotated[Subscription, Depends(require_subscription)],
+    db: AsyncSession = Depends(get_item_db),
+    user: User = Depends(get_current_user_cached),
+    redis: Redis = Depends(get_redis),
+    background: bool = Query(False, description="Always merge in the background worker"),
+) -> dict[str, object]:
+    """
+    Bulk import items from a CSV (``text/csv``) or NDJSON (``application/x-ndjson``) body.
+
+    The body is parsed as it streams in and COPY-loaded into a staging table, then
+    validated and merged into the user's items; rows with an ``id`` update the
+    user's existing item. Small uploads are merged in the same transaction and
+    answered with 200. Uploads over ``IMPORT_INLINE_MAX_ROWS`` rows, or with
+    ``background=true``, are merged by the worker: 202 with an import ID to poll.
+    """
+    content_type = request.headers.get("content-type", "").partition(";")[0].strip().lower()
+    if content_type in CSV_CONTENT_TYPES:
+        parse = parse_csv
+    elif content_type in NDJSON_CONTENT_TYPES:
+        parse = parse_ndjson
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload must be text/csv or application/x-ndjson",
+        )
+
+    import_id = new_import_id()
+    chunks = limit_size(request.stream(), settings.import_max_size)
+    rows = await stage_import(db, import_id, parse(iter_lines(chunks)))
+
+    if background or rows > settings.import_inline_max_rows:
+        queued = await queue_import(db, redis, import_id, user.id, rows)
+        await db.commit()
+        response.status_code = status.HTTP_202_ACCEPTED
+        return queued
+
+    summary = await merge_import(db, import_id, user.id)
+    await db.commit()
+    return summary_status(import_id, summary)
+
+
+@router.get("/imports/{import_id}", response_model=ItemImportResponse)
+async def get_item_import(
+    import_id: str,
+    _subscription: Annotated[Subscription, Depends(require_subscription)],
+    user: User = Depends(get_current_user_cached),
+    redis: Redis = Depends(get_redis),
+) -> dict[str, object]:
+    """Return the progress of a background import started by the current user."""
+    result = await get_import(redis, import_id, user.id)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+    return result
+
+
+@router.get("/stats", response_model=ItemStatsResponse)
+@cache_response(lambda user, **_: item_stats_cache_key(user.id), ttl=ITEM_STATS_CACHE_TTL)
+async def get_item_stats(
+    _subscription: Annotated[Subscription, Depends(require_subscription)],
+    db: AsyncSession = Depends(get_item_db),
+    user: User = Depends(get_current_user_cached),
+) -> dict[str, int]:
+    """Return item totals for the current user without counting rows.
+
+    Cached until the user's items change; the TTL bounds staleness from writes made
+    outside the API, such as archival and shard moves.
+    """
+    stats = await db.get(ItemStats, user.id)
+    if stats is None:
+        return ItemStatsResponse().model_dump()
+    return ItemStatsResponse.model_validate(stats).model_dump()
+
+
+@router.get("/search", response_model=ItemSearchPage)
+@limiter.limit(rate_limit)
+async def search_items(
+    request: Request,
+    _subscription: Annotated[Subscription, Depends(require_subscription)],
+    db: AsyncSession = Depends(get_item_db),
+    user: User = Depends(get_current_user_cached),
+    q: str = Query(..., min_length=1, max_length=256, description="Search text"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum results to return"),
+    cursor: str | None = Query(None, description="Cursor returned by the previous page"),
+) -> ItemSearchPage:
+    """
+    Search the current user's items by name and description.
+
+    Combines full-text matching with typo-tolerant trigram matching on the name,
+    ordered by relevance and paginated with an opaque keyset cursor.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = SearchCursor.decode(cursor)
+        except ValueError as exc:
+            raise RequestValidationError(
+                [{"loc": ("query", "cursor"), "msg": str(exc), "type": "value_error"}]
+            ) from exc
+
+    result = await db.execute(build_item_search_query(user.id, q, limit + 1, after))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_item, last_rank = rows[-1]
+        next_cursor = SearchCursor(rank=last_rank, item_id=last_item.id).encode()
+
+    return ItemSearchPage(
+        items=[
+            ItemSearchResult.model_validate(
+                {**ItemResponse.model_validate(item).model_dump(), "rank": rank}
+            )
+            for item, rank in rows
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+@router.post("/exports", response_model=ItemExportResponse, status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit(rate_limit)
+async def request_item_export(
+    request: Request,
+    _subscription: Annotated[Subscription, Depends(require_subscription)],
+    user: User = Depends(get_current_user_cached),
+    redis: Redis = Depends(get_redis),
+) -> dict[str, str]:
+    """Queue an NDJSON export of all the user's items, built by the background worker."""
+    return await create_export(redis, user.id)
+
+
+@router.get("/exports/{export_id}", response_model=ItemExportResponse)
+async def get_item_export(
+    export_id: str,
+    _subscription: Annotated[Subscription, Depends(require_subscription)],
+    user: User = Depends(get_current_user_cached),
+    redis: Redis = Depends(get_redis),
+) -> dict[str, str]:
+    """Return the progress of an export requested by the current user."""
+    export = await get_export(redis, export_id, user.id)
+    if export is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+    return export
+
+
+@router.get("/exports/{export_id}/download")
+async def download_item_export(
+    export_id: str,
+    _subscription: Annotated[Subscription, Depends(require_subscription)],
+    user: User = Depends(get_current_user_cached),
+    redis: Redis = Depends(get_redis),
+) -> StreamingResponse:
+    """Stream a completed export as newline-delimited JSON."""
+    export = await get_export(redis, export_id, user.id)
+    if export is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+    if export["status"] != "completed":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Export is not ready")
+    return StreamingResponse(
+        read_export(export_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="items-{export_id}.ndjson"'},
+    )
+
+
+@router.get("/events", response_class=StreamingResponse)
+async def stream_item_events(
+    _subscription: Annotated[Subscription, Depends(require_subscription)],
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user_cached),
+    broker: ItemEventBroker = Depends(get_item_event_broker),
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    Stream changes to the current user's items as Server-Sent Events.
+
+    Each ``item`` event carries ``{"op", "id"}`` (or ``{"op", "count"}`` for large
+    bulk changes). Reconnecting with ``Last-Event-ID`` replays recently buffered
+    events; when they are no longer available, or the client reads too slowly,
+    a ``resync`` event is sent and the stream ends so the client can refetch.
+    """
+    subscriber = broker.subscribe(user.id, last_event_id)
+    # Streams are long-lived: return the connection to the pool before streaming
+    await db.close()
+    return StreamingResponse(
+        stream_events(broker, subscriber, settings.item_events_heartbeat),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{item_id}", response_model=ItemResponse)
 async def get_item(
     item_id: str,
+    response: Response,
     _subscription: Annotated[Subscription, Depends(require_subscription)],
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_item_db),
     user: User = Depends(get_current_user_cached),
-) -> Item:
+    fields: tuple[str, ...] | None = Depends(get_item_fields),
+    include_archived: bool = Query(False, description="Also look among archived items"),
+) -> Item | ItemArchive | Response:
     """Fetch a single item owned by the current user."""
-    result = await db.execute(select(Item).where(Item.id == item_id, Item.owner_id == user.id))
-    item = result.scalar_one_or_none()
-    if not item:
+    models: tuple[type[Item] | type[ItemArchive], ...] = (
+        (Item, ItemArchive) if include_archived else (Item,)
+    )
+    if fields is not None:
+        for model in models:
+            result = await db.execute(
+                select(*(getattr(model, field) for field in fields)).where(
+                    model.id == item_id, model.owner_id == user.id
+                )
+            )
+            row = result.mappings().one_or_none()
+            if row is not None:
+                return Response(
+                    content=partial_item_response(fields).model_validate(row).model_dump_json(),
+                    media_type="application/json",
+                )
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+
+    for model in models:
+        result = await db.execute(
+            select(model).where(model.id == item_id, model.owner_id == user.id)
+        )
+        item = result.scalar_one_or_none()
+        if item is not None:
+            response.headers["ETag"] = item_etag(item)
+            return item
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+
+
+@router.post("/{item_id}/restore", response_model=ItemResponse)
+async def restore_archived_item(
+    item_id: str,
+    response: Response,
+    _subscription: Annotated[Subscription, Depends(require_subscription)],
+    db: AsyncSession = Depends(get_item_db),
+    user: User = Depends(get_current_user_cached),
+) -> Item:
+    """Move an archived item back among the user's items, as a new version."""
+    item = await restore_item(db, user.id, item_id)
+    if item is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Archived item not found")
+
+    invalidate_items_after_commit(db, user.id)
+    await db.commit()
+    response.headers["ETag"] = item_etag(item)
     return item
 
 
@@ -76,22 +443,43 @@ async def get_item(
 async def update_item(
     item_id: str,
     item_update: ItemUpdate,
+    response: Response,
     _subscription: Annotated[Subscription, Depends(require_subscription)],
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_item_db),
     user: User = Depends(get_current_user_cached),
+    expected_versions: tuple[int, ...] | None = Depends(get_expected_versions),
 ) -> Item:
-    """Update an item owned by the current user."""
-    result = await db.execute(select(Item).where(Item.id == item_id, Item.owner_id == user.id))
-    item = result.scalar_one_or_none()
-    if not item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    """
+    Update an item owned by the current user.
 
-    update_data = item_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(item, field, value)
+    With ``If-Match`` set to the item's ETag the update only applies if nobody
+    changed the item since it was read; otherwise it fails with 412 and the
+    client should refetch. Without it the last write wins.
+    """
+    # One owner-scoped, version-checked statement: no row is read or locked beforehand
+    statement = (
+        update(Item)
+        .where(Item.id == item_id, Item.owner_id == user.id)
+        .values(**item_update.model_dump(exclude_unset=True), version=Item.version + 1)
+    )
+    if expected_versions is not None:
+        statement = statement.where(Item.version.in_(expected_versions))
+    item = await db.scalar(statement.returning(Item).execution_options(populate_existing=True))
+    if item is None:
+        if expected_versions is not None:
+            version = await db.scalar(
+                select(Item.version).where(Item.id == item_id, Item.owner_id == user.id)
+            )
+            if version is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="Item was modified by another request",
+                )
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
 
+    invalidate_items_after_commit(db, user.id)
     await db.commit()
-    await db.refresh(item)
+    response.headers["ETag"] = item_etag(item)
     return item
 
 
@@ -99,15 +487,16 @@ async def update_item(
 async def delete_item(
     item_id: str,
     _subscription: Annotated[Subscription, Depends(require_subscription)],
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_item_db),
     user: User = Depends(get_current_user_cached),
 ) -> Response:
     """Delete an item owned by the current user."""
-    result = await db.execute(select(Item).where(Item.id == item_id, Item.owner_id == user.id))
-    item = result.scalar_one_or_none()
-    if not item:
+    deleted = await db.scalar(
+        delete(Item).where(Item.id == item_id, Item.owner_id == user.id).returning(Item.id)
+    )
+    if deleted is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
 
-    await db.delete(item)
+    invalidate_items_after_commit(db, user.id)
     await db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
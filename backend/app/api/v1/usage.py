@@ -0,0 +1,27 @@
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user_cached
+from app.core.cache import get_redis
+from app.core.subscription_middleware import find_active_subscription
+from app.db.models.auth import User
+from app.db.session import get_db
+from app.schemas.usage import UsageResponse
+from app.services.usage import billing_period, period_usage
+
+router = APIRouter(tags=["usage"])
+
+
+@router.get("/usage", response_model=UsageResponse)
+async def get_current_usage(
+    user: User = Depends(get_current_user_cached),
+    db: AsyncSession = Depends(get_db),
+    redis=Depends(get_redis),
+) -> UsageResponse:
+    """Return the user's metered API calls in the current billing period."""
+    subscription = await find_active_subscription(db, user.id)
+    start, end = billing_period(subscription, datetime.now(UTC).date())
+    calls = await period_usage(db, redis, user.id, start, end)
+    return UsageResponse(period_start=start, period_end=end, calls=calls)
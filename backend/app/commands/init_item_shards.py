@@ -0,0 +1,41 @@
+"""Create the item tables on every shard in ``ITEM_SHARDS``.
+
+Usage:
+    python -m app.commands.init_item_shards
+
+Alembic manages the primary only; run this after adding a shard, before any
+process starts routing owners to it. Tables that already exist are left alone.
+"""
+
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.db.shards import ShardRouter, create_shard_schema, shard_router
+
+
+async def init_item_shards(router: ShardRouter) -> list[str]:
+    """Create missing item tables on each shard; returns the shards' names."""
+    for shard in router.urls:
+        async with router.shard_engine(shard).begin() as conn:
+            await conn.run_sync(create_shard_schema)
+    return list(router.urls)
+
+
+async def run(args: argparse.Namespace) -> None:
+    if not settings.item_shards:
+        logger.error("ITEM_SHARDS is not set: items live on the primary")
+        return
+    shards = await init_item_shards(shard_router)
+    logger.info(f"Item shards ready: {', '.join(shards)}")
+    await shard_router.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create the item tables on every shard")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
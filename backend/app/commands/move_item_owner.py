@@ -0,0 +1,228 @@
+"""Move one owner's items to another shard, online.
+
+Usage:
+    python -m app.commands.move_item_owner OWNER_ID TARGET_SHARD [--batch-size 1000]
+
+1. Copy the owner's items (and archived items) to the target while they keep
+   being read and written.
+2. Fence writes (``moving`` in ``item_shard_overrides``) and wait until every
+   process has seen the fence: writes get 503 from then on, reads continue.
+3. Copy what changed during step 1, and drop target rows deleted meanwhile.
+4. Point the override at the target, which also lifts the fence, and wait until
+   every process routes the owner there.
+5. Delete the owner's items from the old shard.
+
+Writes are refused for about two refresh intervals plus ``--settle``; reads are
+never interrupted. Copies and deletes don't produce item events, and the item
+counters follow the rows on each shard. A move interrupted before step 4 leaves
+the owner on the old shard, possibly fenced: run it again to finish. Rows left on
+the old shard by an interrupted step 5 are never read, and a later move back
+reconciles them.
+
+``--settle`` covers writes that were already running when the fence went up.
+Background imports can run much longer: move an owner once their queued imports
+have finished, since staged rows are not carried over.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.logging_config import logger
+from app.db.models.item import Item
+from app.db.models.item_archive import ItemArchive
+from app.db.models.item_event import ITEM_EVENTS_MUTE_SETTING
+from app.db.models.item_shard import ItemShardOverride
+from app.db.models.item_stats import ItemStats
+from app.db.shards import ShardRouter, shard_router
+
+# Columns copied as they are; the search vector is regenerated by the target
+COPIED_COLUMNS = ("name", "description", "is_active", "created_at", "updated_at", "version")
+
+# Tables holding an owner's items, with the columns copied besides the key
+OWNER_TABLES: tuple[tuple[type[Item] | type[ItemArchive], tuple[str, ...]], ...] = (
+    (Item, COPIED_COLUMNS),
+    (ItemArchive, (*COPIED_COLUMNS, "archived_at")),
+)
+
+
+async def _mute_item_events(conn: AsyncConnection) -> None:
+    await conn.execute(select(func.set_config(ITEM_EVENTS_MUTE_SETTING, "on", True)))
+
+
+async def sync_owner_items(
+    source: AsyncEngine, target: AsyncEngine, owner_id: str, batch_size: int
+) -> int:
+    """Make the owner's items and archived items on ``target`` match ``source``.
+
+    Returns rows written.
+    """
+    written = 0
+    for model, copied in OWNER_TABLES:
+        written += await _sync_owner_rows(source, target, model, copied, owner_id, batch_size)
+    return written
+
+
+async def _sync_owner_rows(
+    source: AsyncEngine,
+    target: AsyncEngine,
+    model: type[Item] | type[ItemArchive],
+    copied: tuple[str, ...],
+    owner_id: str,
+    batch_size: int,
+) -> int:
+    written = 0
+    after = ""
+    columns = [model.id, model.owner_id, *(getattr(model, name) for name in copied)]
+    while True:
+        async with source.connect() as conn:
+            result = await conn.execute(
+                select(*columns)
+                .where(model.owner_id == owner_id, model.id > after)
+                .order_by(model.id)
+                .limit(batch_size)
+            )
+            rows = [dict(row) for row in result.mappings()]
+
+        async with target.begin() as conn:
+            await _mute_item_events(conn)
+            # Target rows in this batch's key range that the source no longer has
+            gone = delete(model).where(model.owner_id == owner_id, model.id > after)
+            if rows:
+                gone = gone.where(
+                    model.id <= rows[-1]["id"], model.id.not_in([row["id"] for row in rows])
+                )
+            await conn.execute(gone)
+            if rows:
+                upsert = insert(model).values(rows)
+                result = await conn.execute(
+                    upsert.on_conflict_do_update(
+                        index_elements=[model.owner_id, model.id],
+                        set_={name: upsert.excluded[name] for name in copied},
+                        where=or_(
+                            *(
+                                getattr(model, name).is_distinct_from(upsert.excluded[name])
+                                for name in copied
+                            )
+                        ),
+                    )
+                )
+                written += result.rowcount
+
+        if len(rows) < batch_size:
+            return written
+        after = rows[-1]["id"]
+
+
+async def delete_owner_items(engine: AsyncEngine, owner_id: str, batch_size: int) -> int:
+    """Delete the owner's items and archived items in batches, then their counters.
+
+    Returns the items deleted.
+    """
+    deleted = 0
+    for model, _copied in OWNER_TABLES:
+        while True:
+            async with engine.begin() as conn:
+                await _mute_item_events(conn)
+                batch = (
+                    select(model.id)
+                    .where(model.owner_id == owner_id)
+                    .limit(batch_size)
+                    .scalar_subquery()
+                )
+                result = await conn.execute(
+                    delete(model).where(model.owner_id == owner_id, model.id.in_(batch))
+                )
+            if model is Item:
+                deleted += result.rowcount
+            if result.rowcount < batch_size:
+                break
+    async with engine.begin() as conn:
+        await conn.execute(delete(ItemStats).where(ItemStats.owner_id == owner_id))
+    return deleted
+
+
+async def _set_override(router: ShardRouter, owner_id: str, shard: str, moving: bool) -> None:
+    async with router.primary.begin() as conn:
+        if not moving and router.ring is not None and router.ring.lookup(owner_id) == shard:
+            # Back on the shard the ring picks: no override needed
+            await conn.execute(
+                delete(ItemShardOverride).where(ItemShardOverride.owner_id == owner_id)
+            )
+            return
+        upsert = insert(ItemShardOverride).values(owner_id=owner_id, shard=shard, moving=moving)
+        await conn.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[ItemShardOverride.owner_id],
+                set_={"shard": shard, "moving": moving, "updated_at": func.now()},
+            )
+        )
+
+
+async def move_item_owner(
+    owner_id: str,
+    target: str,
+    router: ShardRouter = shard_router,
+    batch_size: int = 1000,
+    settle: float = 10.0,
+) -> int:
+    """Move the owner's items to ``target``; returns how many items moved."""
+    if not router.enabled:
+        raise ValueError("Item sharding is not enabled (ITEM_SHARDS is empty)")
+    if target not in router.urls:
+        raise ValueError(f"Unknown shard {target!r}")
+
+    await router.refresh()
+    source = router.shard_for(owner_id)
+    if source is None or source == target:
+        return 0
+    source_engine = router.shard_engine(source)
+    target_engine = router.shard_engine(target)
+    wait = router.stale_after + settle
+
+    copied = await sync_owner_items(source_engine, target_engine, owner_id, batch_size)
+    logger.info(f"Copied {copied} items of {owner_id} from {source} to {target}, fencing writes")
+
+    await _set_override(router, owner_id, source, moving=True)
+    await asyncio.sleep(wait)
+    changed = await sync_owner_items(source_engine, target_engine, owner_id, batch_size)
+
+    await _set_override(router, owner_id, target, moving=False)
+    logger.info(f"{owner_id} now on {target} ({changed} items caught up), draining {source}")
+    await asyncio.sleep(wait)
+    return await delete_owner_items(source_engine, owner_id, batch_size)
+
+
+async def run(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    moved = await move_item_owner(
+        args.owner_id, args.target, shard_router, args.batch_size, args.settle
+    )
+    logger.info(
+        f"Moved {moved} items of {args.owner_id} to {args.target}",
+        extra={"duration_ms": round((time.perf_counter() - started) * 1000, 2)},
+    )
+    await shard_router.close()
+    await shard_router.primary.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move one owner's items to another shard")
+    parser.add_argument("owner_id", help="User ID whose items move")
+    parser.add_argument("target", help="Shard name from ITEM_SHARDS")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per transaction")
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=10.0,
+        help="Extra seconds to wait for writes in flight when the fence goes up",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
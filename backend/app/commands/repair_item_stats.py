@@ -0,0 +1,84 @@
+"""Recompute per-owner item counters.
+
+The ``item_stats`` triggers keep counters exact in normal operation; this
+command rebuilds them from ``items`` after manual data fixes or restores.
+
+Usage:
+    python -m app.commands.repair_item_stats [--batch-size 500] [--pause 0.1]
+
+Owners are processed in primary-key order, one short transaction per batch.
+Each batch takes a SHARE ROW EXCLUSIVE lock on ``item_stats`` so concurrent item
+writes wait for the batch to commit instead of racing the recount.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.core.logging_config import logger
+from app.db.session import engine
+
+OWNER_BATCH = text('SELECT id FROM "user" WHERE id > :after ORDER BY id LIMIT :batch_size')
+
+RECOUNT = text(
+    """
+    INSERT INTO item_stats (owner_id, item_count, active_count, updated_at)
+    SELECT owners.id, count(items.id), count(items.id) FILTER (WHERE items.is_active), now()
+    FROM unnest(CAST(:owner_ids AS varchar[])) AS owners(id)
+    LEFT JOIN items ON items.owner_id = owners.id
+    GROUP BY owners.id
+    ON CONFLICT (owner_id) DO UPDATE SET
+        item_count = EXCLUDED.item_count,
+        active_count = EXCLUDED.active_count,
+        updated_at = EXCLUDED.updated_at
+    WHERE (item_stats.item_count, item_stats.active_count)
+        IS DISTINCT FROM (EXCLUDED.item_count, EXCLUDED.active_count)
+    """
+)
+
+
+async def repair_item_stats(batch_size: int = 500, pause: float = 0.1) -> tuple[int, int]:
+    """Recount every owner's items; returns (owners scanned, rows corrected)."""
+    after = ""
+    owners = 0
+    corrected = 0
+    while True:
+        async with engine.begin() as conn:
+            owner_ids = list(
+                (await conn.execute(OWNER_BATCH, {"after": after, "batch_size": batch_size}))
+                .scalars()
+                .all()
+            )
+            if not owner_ids:
+                break
+            await conn.execute(text("LOCK TABLE item_stats IN SHARE ROW EXCLUSIVE MODE"))
+            result = await conn.execute(RECOUNT, {"owner_ids": owner_ids})
+        owners += len(owner_ids)
+        corrected += result.rowcount
+        after = owner_ids[-1]
+        if pause:
+            await asyncio.sleep(pause)
+    return owners, corrected
+
+
+async def run(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    owners, corrected = await repair_item_stats(args.batch_size, args.pause)
+    logger.info(
+        f"Item stats repaired: {owners} owners scanned, {corrected} counters rewritten",
+        extra={"duration_ms": round((time.perf_counter() - started) * 1000, 2)},
+    )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute per-owner item counters")
+    parser.add_argument("--batch-size", type=int, default=500, help="Owners per transaction")
+    parser.add_argument("--pause", type=float, default=0.1, help="Seconds to sleep between batches")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Invalidate every outstanding auth ticket.
+
+Bumps the revocation epoch in Redis. API processes pick up the new epoch within
+a few seconds and then ignore older tickets, so every client goes through the
+full session lookup on its next request (and receives a new ticket).
+
+Usage:
+    python -m app.commands.revoke_auth_tickets
+
+Use after a ban, a plan change that must apply immediately, or a suspected leak
+of ``SECRET_KEY`` (rotate the key as well in that case).
+"""
+
+import argparse
+import asyncio
+
+from app.core.auth_ticket import EPOCH_REFRESH_INTERVAL, revoke_all
+from app.core.cache import close_redis, get_redis
+from app.core.logging_config import logger
+
+
+async def run(args: argparse.Namespace) -> None:
+    epoch = await revoke_all(await get_redis())
+    logger.info(
+        f"Auth tickets revoked: epoch is now {epoch}, "
+        f"older tickets are rejected within {EPOCH_REFRESH_INTERVAL:.0f}s"
+    )
+    await close_redis()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Invalidate every outstanding auth ticket")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
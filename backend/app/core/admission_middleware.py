@@ -0,0 +1,108 @@
+"""Admission Control Middleware.
+
+When Postgres slows down, requests queue for pool connections and latency climbs
+for every route until timeouts cascade. This middleware tracks, per worker, the
+requests in flight and the pool checkout wait (``app.db.pool.pool_wait``), and
+above either threshold turns low-priority requests away at the door with a fast
+503 and ``Retry-After``, leaving the connections to everything else.
+
+- Only the routes listed as low priority are shed (lists, searches, exports);
+  health checks, auth and writes always stay on the priority lane
+- A request counts as in flight until its response starts, so long-lived
+  streams don't hold the count up
+- ``ADMISSION_MAX_IN_FLIGHT`` / ``ADMISSION_MAX_POOL_WAIT`` set the thresholds,
+  ``0`` disables either
+"""
+
+from collections.abc import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.error_handlers import error_response
+from app.core.metrics import registry
+from app.db.pool import pool_wait
+
+SHED_MESSAGE = "Server is busy, retry shortly"
+
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests being handled that have not started their response"
+)
+requests_shed = registry.counter(
+    "http_requests_shed_total", "Low-priority requests refused under load", ["reason"]
+)
+
+
+class AdmissionControlMiddleware:
+    """Middleware that sheds low-priority requests while the worker is overloaded.
+
+    ``low_priority`` lists ``(method, path)`` pairs; a path ending in ``*`` matches
+    every path starting with the part before it.
+    """
+
+    def __init__(self, app: ASGIApp, low_priority: Iterable[tuple[str, str]]) -> None:
+        self.app = app
+        self.low_priority: set[tuple[str, str]] = set()
+        self.low_priority_prefixes: list[tuple[str, str]] = []
+        for method, path in low_priority:
+            if path.endswith("*"):
+                self.low_priority_prefixes.append((method, path[:-1]))
+            else:
+                self.low_priority.add((method, path))
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._is_low_priority(scope["method"], scope["path"]):
+            reason = self._overload()
+            if reason is not None:
+                requests_shed.inc(reason=reason)
+                response = error_response(503, SHED_MESSAGE, scope["path"])
+                response.headers["Retry-After"] = str(settings.admission_retry_after)
+                await response(scope, receive, send)
+                return
+
+        self._enter()
+        started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start" and not started:
+                started = True
+                self._leave()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not started:
+                self._leave()
+
+    def _is_low_priority(self, method: str, path: str) -> bool:
+        if (method, path) in self.low_priority:
+            return True
+        return any(
+            method == prefix_method and path.startswith(prefix)
+            for prefix_method, prefix in self.low_priority_prefixes
+        )
+
+    def _overload(self) -> str | None:
+        """Why the worker is too busy for low-priority work, or None."""
+        max_in_flight = settings.admission_max_in_flight
+        if max_in_flight and self.in_flight >= max_in_flight:
+            return "in_flight"
+        max_pool_wait = settings.admission_max_pool_wait
+        if max_pool_wait and pool_wait.seconds() >= max_pool_wait:
+            return "pool_wait"
+        return None
+
+    def _enter(self) -> None:
+        self.in_flight += 1
+        requests_in_flight.set(self.in_flight)
+
+    def _leave(self) -> None:
+        self.in_flight -= 1
+        requests_in_flight.set(self.in_flight)
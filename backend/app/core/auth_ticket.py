@@ -0,0 +1,127 @@
+"""Auth Tickets.
+
+A short-lived cookie, signed by the backend, that carries the outcome of
+session validation: user id, role, ban state and subscription plan. While it is
+valid, authenticated requests are served without any Redis or database lookup.
+
+- tickets are HMAC-SHA256 signed with ``SECRET_KEY`` and bound to the better-auth
+  session token they were issued for, so they can't outlive a change of session
+- they expire after ``AUTH_TICKET_TTL`` seconds; the next request does the full
+  lookup and receives a fresh ticket. Logouts, bans and plan changes therefore
+  take up to that long to apply
+- every ticket carries the revocation epoch. ``revoke_all`` (or
+  ``python -m app.commands.revoke_auth_tickets``) bumps the epoch in Redis, and
+  each process stops accepting older tickets within ``EPOCH_REFRESH_INTERVAL``
+"""
+
+import asyncio
+import base64
+import contextlib
+import hashlib
+import hmac
+import json
+from dataclasses import astuple, dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import get_redis
+from app.core.logging_config import logger
+
+TICKET_COOKIE = "auth_ticket"
+EPOCH_KEY = "auth:ticket_epoch"
+EPOCH_REFRESH_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class AuthTicket:
+    user_id: str
+    role: str | None
+    banned: bool
+    plan: str | None
+    expires_at: int
+    epoch: int
+    session: str
+
+
+def session_fingerprint(token: str) -> str:
+    return hashlib.blake2b(token.encode(), digest_size=12).hexdigest()
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _signature(payload: bytes, secret: str) -> bytes:
+    return _b64encode(hmac.new(secret.encode(), payload, hashlib.sha256).digest())
+
+
+def encode_ticket(ticket: AuthTicket, secret: str) -> str:
+    payload = _b64encode(json.dumps(astuple(ticket), separators=(",", ":")).encode())
+    return (payload + b"." + _signature(payload, secret)).decode()
+
+
+def decode_ticket(value: str, secret: str) -> AuthTicket | None:
+    """Return the ticket if its signature is valid, without checking expiry."""
+    payload, _, signature = value.encode().partition(b".")
+    if not hmac.compare_digest(signature, _signature(payload, secret)):
+        return None
+    try:
+        fields = json.loads(base64.urlsafe_b64decode(payload + b"=" * (-len(payload) % 4)))
+        return AuthTicket(*fields)
+    except (ValueError, TypeError):
+        return None
+
+
+def verify_ticket(
+    value: str, session_token: str, secret: str, epoch: int, now: float
+) -> AuthTicket | None:
+    """Return the ticket if it is authentic, current and issued for this session."""
+    ticket = decode_ticket(value, secret)
+    if (
+        ticket is None
+        or ticket.expires_at <= now
+        or ticket.epoch != epoch
+        or not hmac.compare_digest(ticket.session, session_fingerprint(session_token))
+    ):
+        return None
+    return ticket
+
+
+class TicketEpoch:
+    """This process's copy of the revocation epoch, refreshed from Redis."""
+
+    def __init__(self) -> None:
+        # Unknown until the first refresh: no tickets are issued or accepted
+        self.current: int | None = None
+        self._runner: asyncio.Task[None] | None = None
+
+    async def refresh(self, redis: Redis) -> None:
+        self.current = int(await redis.get(EPOCH_KEY) or 0)
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._refresh_forever())
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            try:
+                await self.refresh(await get_redis())
+            except RedisError as exc:
+                logger.warning("Failed to refresh auth ticket epoch", extra={"error": str(exc)})
+            await asyncio.sleep(EPOCH_REFRESH_INTERVAL)
+
+
+async def revoke_all(redis: Redis) -> int:
+    """Invalidate every ticket issued so far; returns the new epoch."""
+    return await redis.incr(EPOCH_KEY)
+
+
+ticket_epoch = TicketEpoch()
@@ -3,6 +3,7 @@ from redis.asyncio import Redis
 from app.core.config import settings
 
 redis_client: Redis | None = None
+binary_redis_client: Redis | None = None
 
 
 async def init_redis() -> Redis:
@@ -21,6 +22,16 @@ async def get_redis() -> Redis:
     return redis_client
 
 
+async def get_binary_redis() -> Redis:
+    """Return a client that stores and returns raw bytes (e.g. compressed bodies)."""
+    global binary_redis_client
+    if binary_redis_client is None:
+        binary_redis_client = Redis.from_url(settings.redis_url)
+    return binary_redis_client
+
+
 async def close_redis() -> None:
     if redis_client is not None:
         await redis_client.close()
+    if binary_redis_client is not None:
+        await binary_redis_client.close()
@@ -0,0 +1,269 @@
+"""Response Compression Middleware.
+
+Compresses response bodies with the best encoding the client accepts:
+- zstd: requires the optional ``zstandard`` package
+- br: requires the optional ``brotli`` package
+- gzip: always available
+
+Small bodies, already-encoded responses and compressed media types are passed
+through untouched. Streaming responses are compressed chunk by chunk.
+"""
+
+import time
+import zlib
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+# Media types that are already compressed or must not be buffered
+SKIP_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/gzip",
+    "application/zip",
+    "application/zstd",
+    "application/x-brotli",
+    "text/event-stream",
+)
+
+# Encoding negotiated for the current request, read by ``cache_response``
+accepted_encoding: ContextVar[str | None] = ContextVar("accepted_encoding", default=None)
+
+compression_bytes_in = registry.counter(
+    "compression_bytes_in_total", "Response bytes before compression", ["encoding"]
+)
+compression_bytes_out = registry.counter(
+    "compression_bytes_out_total", "Response bytes after compression", ["encoding"]
+)
+compression_bytes_saved = registry.counter(
+    "compression_bytes_saved_total", "Response bytes saved by compression", ["encoding"]
+)
+compression_cpu_seconds = registry.counter(
+    "compression_cpu_seconds_total", "CPU time spent compressing responses", ["encoding"]
+)
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class _GzipCompressor:
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Server preference order, best ratio first
+COMPRESSORS: dict[str, Callable[[], Compressor]] = {}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = _ZstdCompressor
+if brotli is not None:
+    COMPRESSORS["br"] = _BrotliCompressor
+COMPRESSORS["gzip"] = _GzipCompressor
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Pick the preferred supported encoding from an ``Accept-Encoding`` header."""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip()] = quality
+
+    best: str | None = None
+    best_quality = 0.0
+    for encoding in COMPRESSORS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_body(encoding: str, body: bytes) -> bytes:
+    """Compress a complete body in one shot, recording compression metrics."""
+    started = time.thread_time()
+    compressor = COMPRESSORS[encoding]()
+    compressed = compressor.compress(body) + compressor.finish()
+    _record(encoding, len(body), len(compressed), time.thread_time() - started)
+    return compressed
+
+
+def _record(encoding: str, size_in: int, size_out: int, cpu_seconds: float) -> None:
+    compression_bytes_in.inc(size_in, encoding=encoding)
+    compression_bytes_out.inc(size_out, encoding=encoding)
+    compression_bytes_saved.inc(size_in - size_out, encoding=encoding)
+    compression_cpu_seconds.inc(cpu_seconds, encoding=encoding)
+
+
+class CompressionMiddleware:
+    """Middleware that compresses responses according to ``Accept-Encoding``."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        token = accepted_encoding.set(encoding)
+        try:
+            if encoding is None:
+                await self.app(scope, receive, send)
+            else:
+                responder = _CompressionResponder(send, encoding, self.minimum_size)
+                await self.app(scope, receive, responder.send)
+        finally:
+            accepted_encoding.reset(token)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self._start: Message | None = None
+        self._compressor: Compressor | None = None
+        self._passthrough = False
+        self._size_in = 0
+        self._size_out = 0
+        self._cpu_seconds = 0.0
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self._passthrough = "content-encoding" in headers or content_type.startswith(
+                SKIP_CONTENT_TYPES
+            )
+            if self._passthrough:
+                await self._send(message)
+            return
+
+        if message_type != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            if not more_body:
+                await self._send_complete(start, body)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            self._set_encoding_headers(headers)
+            del headers["content-length"]
+            self._compressor = COMPRESSORS[self.encoding]()
+            await self._send(start)
+
+        if self._compressor is None:
+            await self._send(message)
+            return
+
+        started = time.thread_time()
+        if more_body:
+            chunk = self._compressor.compress(body) + self._compressor.flush()
+        else:
+            chunk = self._compressor.compress(body) + self._compressor.finish()
+        self._cpu_seconds += time.thread_time() - started
+        self._size_in += len(body)
+        self._size_out += len(chunk)
+
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            _record(self.encoding, self._size_in, self._size_out, self._cpu_seconds)
+
+    async def _send_complete(self, start: Message, body: bytes) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        if len(body) >= self.minimum_size:
+            body = compress_body(self.encoding, body)
+            self._set_encoding_headers(headers)
+            headers["content-length"] = str(len(body))
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body, "more_body": False})
+
+    def _set_encoding_headers(self, headers: MutableHeaders) -> None:
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+
+def encoded_response_headers(encoding: str | None) -> dict[str, Any]:
+    """Headers for a body that was compressed ahead of time."""
+    if encoding is None:
+        return {"vary": "Accept-Encoding"}
+    return {"content-encoding": encoding, "vary": "Accept-Encoding"}
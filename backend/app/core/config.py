@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,9 +12,62 @@ class Settings(BaseSettings):
     debug: bool = True
     secret_key: str = "your-app-secret-key"
     frontend_url: str = "http://localhost:5173"
+    web_concurrency: int | None = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_connection_budget: int = 80
+    # Shed low-priority requests above these per-worker limits (0 disables a limit)
+    admission_max_in_flight: int = 100
+    admission_max_pool_wait: float = 0.5
+    admission_retry_after: int = 2
+    # Optional item shards: name -> database URL, as JSON. Empty keeps items on the primary
+    item_shards: dict[str, str] = {}
+    item_shard_refresh_interval: float = 5.0
+    worker_max_requests: int = 10_000
+    worker_max_requests_jitter: int = 1_000
+    worker_max_memory_mb: int | None = None
+    worker_graceful_timeout: int = 30
+    loop_lag_threshold: float = 0.1
+    loop_debug: bool = False
+    error_log_summary_interval: float = 60.0
+    auth_ticket_ttl: int = 60
+    session_negative_ttl: int = 60
+    # "keys" (one key per session) or "buckets" (hashes by token prefix, less memory)
+    session_cache_layout: Literal["keys", "buckets"] = "keys"
+    # Buckets layout: also read and move over sessions cached by the keys layout
+    session_cache_dual_read: bool = True
+    session_filter_capacity: int = 100_000
+    # Seconds between deletions of expired session and verification rows (0 disables)
+    session_sweep_interval: float = 3600.0
+    session_sweep_batch_size: int = 1000
+    session_sweep_batch_pause: float = 0.05
+    usage_flush_interval: float = 5.0
+    usage_rollup_interval: float = 60.0
     rate_limit_requests: int = 100
     rate_limit_window: int = 60
     max_request_size: int = 10 * 1024 * 1024
+    compression_min_size: int = 1024
+    idempotency_ttl: int = 24 * 3600
+    idempotency_lock_ttl: int = 60
+    idempotency_wait_timeout: float = 10.0
+    # Inactive items move to items_archive after this many days (0 disables archival)
+    item_archive_after_days: int = 90
+    item_archive_interval: float = 3600.0
+    item_archive_batch_size: int = 500
+    item_archive_batch_pause: float = 0.1
+    item_archive_max_replication_lag: float = 1.0
+    import_max_size: int = 1024 * 1024 * 1024
+    import_inline_max_rows: int = 50_000
+    # Bytes of NDJSON an export may hold in Redis before it fails
+    export_max_size: int = 256 * 1024 * 1024
+    item_events_heartbeat: float = 15.0
+    item_events_buffer_size: int = 1000
+    item_events_queue_size: int = 100
+    worker_concurrency: int = 10
+    job_visibility_timeout: int = 60
+    job_max_attempts: int = 5
+    job_retry_backoff: float = 2.0
+    job_retry_backoff_max: float = 300.0
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
@@ -4,17 +4,26 @@ Provides consistent error responses across the application.
 CRITICAL: Never leak stack traces or internal details in production.
 """
 
+import json
 import traceback
+from functools import lru_cache
 from typing import Any
 
 from fastapi import HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.config import settings
+from app.core.log_throttle import exception_log
 from app.core.logging_config import logger
 
+DATABASE_ERROR_MESSAGE = "A database error occurred. Please try again later."
+UNEXPECTED_ERROR_MESSAGE = "An unexpected error occurred. Please try again later."
+
+# Stands in for the path while an error body is pre-rendered
+_PATH_PLACEHOLDER = "\0path\0"
+
 
 class AppException(Exception):
     """Base application exception for custom errors."""
@@ -31,14 +40,28 @@ class AppException(Exception):
         super().__init__(self.message)
 
 
+@lru_cache(maxsize=256)
+def _error_body_parts(status_code: int, message: str) -> tuple[bytes, bytes]:
+    """The error body for ``status_code`` and ``message``, rendered once, split at the path."""
+    content = {"error": {"code": status_code, "message": message, "path": _PATH_PLACEHOLDER}}
+    body = JSONResponse(content).body
+    head, _, tail = body.partition(json.dumps(_PATH_PLACEHOLDER, ensure_ascii=False).encode())
+    return head, tail
+
+
 def _create_error_response(
     status_code: int,
     message: str,
     path: str,
     details: dict[str, Any] | None = None,
     debug_info: str | None = None,
-) -> JSONResponse:
+) -> Response:
     """Create a standardized error response."""
+    if not details and not (debug_info and settings.debug):
+        head, tail = _error_body_parts(status_code, message)
+        body = head + json.dumps(path, ensure_ascii=False).encode() + tail
+        return Response(body, status_code=status_code, media_type="application/json")
+
     content: dict[str, Any] = {
         "error": {
             "code": status_code,
@@ -57,7 +80,12 @@ def _create_error_response(
     return JSONResponse(status_code=status_code, content=content)
 
 
-async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
+def error_response(status_code: int, message: str, path: str) -> Response:
+    """Build a standard error response outside an exception handler, e.g. in middleware."""
+    return _create_error_response(status_code=status_code, message=message, path=path)
+
+
+async def http_exception_handler(request: Request, exc: HTTPException) -> Response:
     """Handle HTTP exceptions (4xx, 5xx errors)."""
     return _create_error_response(
         status_code=exc.status_code,
@@ -66,9 +94,7 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
     )
 
 
-async def validation_exception_handler(
-    request: Request, exc: RequestValidationError
-) -> JSONResponse:
+async def validation_exception_handler(request: Request, exc: RequestValidationError) -> Response:
     """Handle Pydantic validation errors.
 
     Returns field-level error details for client-side handling.
@@ -91,30 +117,31 @@ async def validation_exception_handler(
     )
 
 
-async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError) -> JSONResponse:
+async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError) -> Response:
     """Handle database errors.
 
     CRITICAL: Never expose SQL or database internals to clients.
     """
-    # Log the full error internally
-    logger.error(
-        "Database error occurred",
-        extra={
-            "path": request.url.path,
-            "error": str(exc),
-        },
-        exc_info=True,
-    )
+    # Log the full error internally, once per storm of identical failures
+    if exception_log.first("Database error occurred", exc, request.url.path):
+        logger.error(
+            "Database error occurred",
+            extra={
+                "path": request.url.path,
+                "error": str(exc),
+            },
+            exc_info=exc,
+        )
 
     return _create_error_response(
         status_code=500,
-        message="A database error occurred. Please try again later.",
+        message=DATABASE_ERROR_MESSAGE,
         path=request.url.path,
         debug_info=str(exc) if settings.debug else None,
     )
 
 
-async def app_exception_handler(request: Request, exc: AppException) -> JSONResponse:
+async def app_exception_handler(request: Request, exc: AppException) -> Response:
     """Handle custom application exceptions."""
     logger.warning(
         "Application exception",
@@ -133,24 +160,32 @@ async def app_exception_handler(request: Request, exc: AppException) -> JSONResp
     )
 
 
-async def generic_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def generic_exception_handler(request: Request, exc: Exception) -> Response:
     """Handle all unhandled exceptions.
 
     CRITICAL: Never expose stack traces in production.
     """
-    # Log the full error internally
-    logger.error(
-        "Unhandled exception occurred",
-        extra={
-            "path": request.url.path,
-            "error": str(exc),
-        },
-        exc_info=True,
-    )
+    # Log the full error internally, once per storm of identical failures
+    first = exception_log.first("Unhandled exception occurred", exc, request.url.path)
+    if first:
+        logger.error(
+            "Unhandled exception occurred",
+            extra={
+                "path": request.url.path,
+                "error": str(exc),
+            },
+            exc_info=exc,
+        )
 
+    debug_info = None
+    if settings.debug:
+        # Formatting the traceback is costly: only for the occurrence that was logged
+        debug_info = (
+            "".join(traceback.format_exception(exc)) if first else f"{type(exc).__name__}: {exc}"
+        )
     return _create_error_response(
         status_code=500,
-        message="An unexpected error occurred. Please try again later.",
+        message=UNEXPECTED_ERROR_MESSAGE,
         path=request.url.path,
-        debug_info=traceback.format_exc() if settings.debug else None,
+        debug_info=debug_info,
     )
@@ -0,0 +1,330 @@
+"""Idempotency-Key Middleware.
+
+A write sent with an ``Idempotency-Key`` header runs at most once per key and
+session. The first request stores a fingerprint of itself and, once done, its
+response in Redis. Retries with the same key get the stored response back
+without reaching the route or Postgres; a retry arriving while the first request
+is still running waits for it instead of running alongside.
+
+- Reusing a key for a different request fails with 422
+- A request still running after ``IDEMPOTENCY_WAIT_TIMEOUT`` fails with 409
+- Server errors and retryable statuses (401, 408, 409, 425, 429) are not stored,
+  so the next retry runs the request again
+- Bodies larger than ``max_body_size`` are passed through unprotected
+- If Redis is unavailable, requests run as if no key had been sent
+
+The key is held with a value unique to the running request and its TTL is
+extended while the request runs, so a slow request keeps it. A request that
+lost the key anyway (Redis unreachable for a whole ``IDEMPOTENCY_LOCK_TTL``)
+neither releases nor overwrites it.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import get_binary_redis
+from app.core.config import settings
+from app.core.error_handlers import error_response
+from app.core.logging_config import logger
+from app.core.metrics import registry
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+KEY_PREFIX = "idempotency:"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+POLL_INTERVAL_MAX = 0.5
+
+# Responses a retry must not get back: trying again may succeed
+UNSTORED_STATUSES = frozenset({401, 408, 409, 425, 429})
+
+# Each runs only while the key still holds this request's lock value (ARGV[1])
+EXTEND_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+STORE_RESPONSE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+idempotent_requests = registry.counter(
+    "idempotent_requests_total", "Writes sent with an Idempotency-Key", ["outcome"]
+)
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    # None while the first request is still running
+    status: int | None = None
+    headers: list[tuple[str, str]] = field(default_factory=list)
+    body: bytes = b""
+    # Tells the running request's lock apart from a later one's
+    token: str = ""
+
+    def encode(self) -> bytes:
+        meta = {
+            "fingerprint": self.fingerprint,
+            "status": self.status,
+            "headers": self.headers,
+            "token": self.token,
+        }
+        return json.dumps(meta).encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, value: bytes) -> "StoredResponse":
+        meta, _, body = value.partition(b"\n")
+        data = json.loads(meta)
+        headers = [(name, header) for name, header in data["headers"]]
+        return cls(data["fingerprint"], data["status"], headers, body, data.get("token", ""))
+
+
+def request_fingerprint(scope: Scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope["query_string"], body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """Middleware that deduplicates retried writes carrying an ``Idempotency-Key``."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        path_prefixes: tuple[str, ...],
+        session_cookie: str,
+        methods: frozenset[str] = frozenset({"POST", "PATCH", "DELETE"}),
+        max_body_size: int = 1024 * 1024,
+    ) -> None:
+        self.app = app
+        self.path_prefixes = path_prefixes
+        self.session_cookie = session_cookie
+        self.methods = methods
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in self.methods
+            or not scope["path"].startswith(self.path_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        # Keys are scoped to the session; unauthenticated writes fail anyway
+        session = cookie_parser(headers.get("cookie", "")).get(self.session_cookie)
+        if key is None or not session:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            message = f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+            await error_response(400, message, scope["path"])(scope, receive, send)
+            return
+
+        messages, body = await self._read_body(receive)
+        receive = _replay(messages, receive)
+        if body is None:
+            idempotent_requests.inc(outcome="too_large")
+            await self.app(scope, receive, send)
+            return
+
+        fingerprint = request_fingerprint(scope, body)
+        redis_key = KEY_PREFIX + hashlib.sha256(f"{session}\0{key}".encode()).hexdigest()
+        lock = StoredResponse(fingerprint, token=uuid.uuid4().hex).encode()
+        try:
+            redis = await get_binary_redis()
+            stored = await self._claim(redis, redis_key, fingerprint, lock)
+        except RedisError as exc:
+            logger.warning("Idempotency keys unavailable", extra={"error": str(exc)})
+            idempotent_requests.inc(outcome="unavailable")
+            await self.app(scope, receive, send)
+            return
+
+        if stored is None:
+            idempotent_requests.inc(outcome="executed")
+            await self._execute(scope, receive, send, redis, redis_key, fingerprint, lock)
+        elif stored.fingerprint != fingerprint:
+            idempotent_requests.inc(outcome="mismatch")
+            message = "Idempotency-Key was already used for a different request"
+            await error_response(422, message, scope["path"])(scope, receive, send)
+        elif stored.status is None:
+            idempotent_requests.inc(outcome="in_progress")
+            message = "A request with this Idempotency-Key is still in progress"
+            await error_response(409, message, scope["path"])(scope, receive, send)
+        else:
+            idempotent_requests.inc(outcome="replayed")
+            await _send_stored(send, stored)
+
+    async def _read_body(self, receive: Receive) -> tuple[list[Message], bytes | None]:
+        """Buffer the request body; None if it outgrows ``max_body_size``."""
+        messages: list[Message] = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                return messages, None
+            size += len(message.get("body", b""))
+            if size > self.max_body_size:
+                return messages, None
+            if not message.get("more_body", False):
+                return messages, b"".join(part.get("body", b"") for part in messages)
+
+    async def _claim(
+        self, redis: Redis, redis_key: str, fingerprint: str, lock: bytes
+    ) -> StoredResponse | None:
+        """Take the key (None), or return what an earlier request left, waiting while it runs."""
+        deadline = time.monotonic() + settings.idempotency_wait_timeout
+        interval = POLL_INTERVAL
+        while True:
+            if await redis.set(redis_key, lock, nx=True, ex=settings.idempotency_lock_ttl):
+                return None
+            value = await redis.get(redis_key)
+            if value is None:
+                # Expired or released since the SET: try to take it again
+                continue
+            stored = StoredResponse.decode(value)
+            if stored.status is not None or stored.fingerprint != fingerprint:
+                return stored
+            if time.monotonic() >= deadline:
+                return stored
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, POLL_INTERVAL_MAX)
+
+    async def _execute(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        redis: Redis,
+        redis_key: str,
+        fingerprint: str,
+        lock: bytes,
+    ) -> None:
+        response = StoredResponse(fingerprint)
+        chunks: list[bytes] = []
+        size = 0
+
+        async def capture(message: Message) -> None:
+            nonlocal size
+            if message["type"] == "http.response.start":
+                response.status = message["status"]
+                response.headers = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                    if name.lower() != b"set-cookie"
+                ]
+            elif message["type"] == "http.response.body" and size <= self.max_body_size:
+                chunks.append(message.get("body", b""))
+                size += len(chunks[-1])
+            await send(message)
+
+        try:
+            async with _held(redis, redis_key, lock):
+                await self.app(scope, receive, capture)
+        except BaseException:
+            await _release(redis, redis_key, lock)
+            raise
+
+        if (
+            response.status is None
+            or response.status >= 500
+            or response.status in UNSTORED_STATUSES
+            or size > self.max_body_size
+        ):
+            await _release(redis, redis_key, lock)
+            return
+        response.body = b"".join(chunks)
+        try:
+            store = redis.register_script(STORE_RESPONSE_SCRIPT)
+            args = [lock, response.encode(), settings.idempotency_ttl]
+            if not await store(keys=[redis_key], args=args):
+                logger.warning("Idempotency key was lost before the response was stored")
+        except RedisError as exc:
+            logger.warning("Failed to store idempotent response", extra={"error": str(exc)})
+            await _release(redis, redis_key, lock)
+
+
+def _replay(messages: list[Message], receive: Receive) -> Receive:
+    """A ``receive`` that hands out the buffered messages before reading on."""
+    pending = list(messages)
+
+    async def replay() -> Message:
+        if pending:
+            return pending.pop(0)
+        return await receive()
+
+    return replay
+
+
+@contextlib.asynccontextmanager
+async def _held(redis: Redis, redis_key: str, lock: bytes) -> AsyncIterator[None]:
+    """Keep extending the lock's TTL while the request runs, as the worker does for jobs."""
+    extend = redis.register_script(EXTEND_LOCK_SCRIPT)
+    ttl = settings.idempotency_lock_ttl
+
+    async def extend_forever() -> None:
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                if not await extend(keys=[redis_key], args=[lock, ttl]):
+                    logger.warning("Idempotency key was lost while the request was running")
+                    return
+            except RedisError as exc:
+                logger.warning("Failed to extend idempotency key", extra={"error": str(exc)})
+
+    extending = asyncio.create_task(extend_forever())
+    try:
+        yield
+    finally:
+        extending.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await extending
+
+
+async def _release(redis: Redis, redis_key: str, lock: bytes) -> None:
+    try:
+        release = redis.register_script(RELEASE_LOCK_SCRIPT)
+        await release(keys=[redis_key], args=[lock])
+    except RedisError as exc:
+        logger.warning("Failed to release idempotency key", extra={"error": str(exc)})
+
+
+async def _send_stored(send: Send, stored: StoredResponse) -> None:
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers]
+    await send(
+        {
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": [*headers, REPLAYED_HEADER],
+        }
+    )
+    await send({"type": "http.response.body", "body": stored.body})
@@ -0,0 +1,290 @@
+"""Background Job Queue.
+
+Redis-backed, at-least-once job queue:
+- ``enqueue`` makes a job available immediately
+- ``enqueue_after_commit`` holds it until the session's transaction commits
+- workers claim jobs under a visibility timeout; unacknowledged jobs are redelivered
+- failed jobs are retried with exponential backoff, then moved to a dead-letter list
+
+Handlers are registered with ``@job("name")`` and executed by ``python -m app.worker``.
+Handlers must be idempotent: a job can run more than once after a worker crash.
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.metrics import registry
+
+READY_KEY = "jobs:ready"
+INFLIGHT_KEY = "jobs:inflight"
+DELAYED_KEY = "jobs:delayed"
+ATTEMPTS_KEY = "jobs:attempts"
+DEAD_KEY = "jobs:dead"
+JOB_KEY_PREFIX = "jobs:job:"
+
+DEAD_JOB_TTL = 7 * 24 * 3600
+DEAD_LIST_SIZE = 10_000
+PENDING_JOBS_KEY = "pending_jobs"
+
+# Pop the next ready job and start its visibility timeout in one step
+CLAIM_SCRIPT = """
+local id = redis.call('RPOP', KEYS[1])
+if not id then
+    return false
+end
+redis.call('ZADD', KEYS[2], ARGV[1], id)
+local attempts = redis.call('HINCRBY', KEYS[3], id, 1)
+local payload = redis.call('GET', ARGV[2] .. id) or ''
+return {id, payload, attempts}
+"""
+
+# Move due retries and jobs whose visibility timeout expired back to the ready list
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(due) do
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('LPUSH', KEYS[3], id)
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('RPUSH', KEYS[3], id)
+end
+return {#due, #expired}
+"""
+
+jobs_enqueued = registry.counter("jobs_enqueued_total", "Jobs added to the queue", ["job"])
+jobs_enqueue_errors = registry.counter(
+    "jobs_enqueue_errors_total", "Committed jobs that could not be enqueued", ["job"]
+)
+jobs_redelivered = registry.counter(
+    "jobs_redelivered_total", "Jobs requeued after their visibility timeout expired"
+)
+job_wait_seconds = registry.histogram(
+    "job_wait_seconds",
+    "Time from a job becoming available to a worker starting it",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+)
+job_run_seconds = registry.histogram(
+    "job_run_seconds",
+    "Job handler execution time",
+    ["job", "outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+)
+job_queue_depth = registry.gauge(
+    "job_queue_depth", "Jobs per queue state", ["state"], aggregate=False
+)
+
+JobHandler = Callable[..., Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    handler: JobHandler
+    max_attempts: int
+    # Called with the job's kwargs once it is moved to the dead-letter list
+    on_dead: JobHandler | None = None
+
+
+JOBS: dict[str, JobSpec] = {}
+
+
+def job(
+    name: str, max_attempts: int | None = None, on_dead: JobHandler | None = None
+) -> Callable[[JobHandler], JobHandler]:
+    """Register a coroutine as the handler for jobs called ``name``."""
+
+    def decorator(func: JobHandler) -> JobHandler:
+        JOBS[name] = JobSpec(func, max_attempts or settings.job_max_attempts, on_dead)
+        return func
+
+    return decorator
+
+
+@dataclass
+class Job:
+    name: str
+    kwargs: dict[str, Any] = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # Unix time the job last became runnable, for wait-time metrics
+    available_at: float = field(default_factory=time.time)
+    attempts: int = 0
+    last_error: str | None = None
+
+    def dumps(self) -> str:
+        data = asdict(self)
+        del data["attempts"]
+        return json.dumps(data)
+
+    @classmethod
+    def loads(cls, payload: str, attempts: int = 0) -> "Job":
+        return cls(**json.loads(payload), attempts=attempts)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for a job that has failed ``attempts`` times."""
+    delay = min(settings.job_retry_backoff * 2 ** (attempts - 1), settings.job_retry_backoff_max)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobQueue:
+    """Queue operations on the shared Redis instance."""
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+        self._claim = redis.register_script(CLAIM_SCRIPT)
+        self._promote = redis.register_script(PROMOTE_SCRIPT)
+
+    async def enqueue(self, *jobs: Job, delay: float = 0.0) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for queued in jobs:
+                queued.available_at = time.time() + delay
+                pipe.set(f"{JOB_KEY_PREFIX}{queued.id}", queued.dumps())
+                if delay > 0:
+                    pipe.zadd(DELAYED_KEY, {queued.id: queued.available_at})
+                else:
+                    pipe.lpush(READY_KEY, queued.id)
+            await pipe.execute()
+        for queued in jobs:
+            jobs_enqueued.inc(job=queued.name)
+
+    async def claim(self, visibility_timeout: float) -> Job | None:
+        """Take the next ready job, hiding it from other workers until the timeout."""
+        claimed = await self._claim(
+            keys=[READY_KEY, INFLIGHT_KEY, ATTEMPTS_KEY],
+            args=[time.time() + visibility_timeout, JOB_KEY_PREFIX],
+        )
+        if not claimed:
+            return None
+        job_id, payload, attempts = claimed
+        if not payload:
+            # Acknowledged by another worker after a redelivery
+            await self.ack(Job(name="", id=job_id))
+            return None
+        return Job.loads(payload, attempts=int(attempts))
+
+    async def extend(self, job_ids: list[str], visibility_timeout: float) -> None:
+        """Push back the visibility deadline of jobs that are still running."""
+        if job_ids:
+            deadline = time.time() + visibility_timeout
+            await self.redis.zadd(INFLIGHT_KEY, dict.fromkeys(job_ids, deadline), xx=True)
+
+    async def ack(self, finished: Job) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(INFLIGHT_KEY, finished.id)
+            pipe.hdel(ATTEMPTS_KEY, finished.id)
+            pipe.delete(f"{JOB_KEY_PREFIX}{finished.id}")
+            await pipe.execute()
+
+    async def retry(self, failed: Job, delay: float) -> None:
+        failed.available_at = time.time() + delay
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(f"{JOB_KEY_PREFIX}{failed.id}", failed.dumps())
+            pipe.zrem(INFLIGHT_KEY, failed.id)
+            pipe.zadd(DELAYED_KEY, {failed.id: failed.available_at})
+            await pipe.execute()
+
+    async def bury(self, failed: Job) -> None:
+        """Move a job that exhausted its attempts to the dead-letter list."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(f"{JOB_KEY_PREFIX}{failed.id}", failed.dumps(), ex=DEAD_JOB_TTL)
+            pipe.zrem(INFLIGHT_KEY, failed.id)
+            pipe.hdel(ATTEMPTS_KEY, failed.id)
+            pipe.lpush(DEAD_KEY, failed.id)
+            pipe.ltrim(DEAD_KEY, 0, DEAD_LIST_SIZE - 1)
+            await pipe.execute()
+
+    async def promote(self, limit: int = 1000) -> tuple[int, int]:
+        """Requeue due retries and expired claims; returns (retried, redelivered)."""
+        retried, redelivered = await self._promote(
+            keys=[DELAYED_KEY, INFLIGHT_KEY, READY_KEY], args=[time.time(), limit]
+        )
+        if redelivered:
+            jobs_redelivered.inc(redelivered)
+        return int(retried), int(redelivered)
+
+    async def depth(self) -> dict[str, int]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.llen(READY_KEY)
+            pipe.zcard(INFLIGHT_KEY)
+            pipe.zcard(DELAYED_KEY)
+            pipe.llen(DEAD_KEY)
+            ready, inflight, delayed, dead = await pipe.execute()
+        return {"ready": ready, "inflight": inflight, "delayed": delayed, "dead": dead}
+
+
+async def enqueue(name: str, **kwargs: Any) -> Job:
+    """Enqueue a job right away, independent of any database transaction."""
+    queued = Job(name=name, kwargs=kwargs)
+    await JobQueue(await get_redis()).enqueue(queued)
+    return queued
+
+
+def enqueue_after_commit(db: AsyncSession | Session, name: str, **kwargs: Any) -> Job:
+    """Enqueue a job once ``db`` commits; it is discarded if the transaction rolls back."""
+    queued = Job(name=name, kwargs=kwargs)
+    db.info.setdefault(PENDING_JOBS_KEY, []).append(queued)
+    return queued
+
+
+# Tasks pushing committed jobs to Redis, kept referenced until they finish
+_pending_enqueues: set[asyncio.Task[None]] = set()
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed_jobs(session: Session) -> None:
+    pending: list[Job] | None = session.info.pop(PENDING_JOBS_KEY, None)
+    if not pending:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.error(f"Dropped {len(pending)} jobs committed outside an event loop")
+        return
+    task = loop.create_task(_push_committed(pending))
+    _pending_enqueues.add(task)
+    task.add_done_callback(_pending_enqueues.discard)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_jobs(session: Session, previous_transaction: SessionTransaction) -> None:
+    # Savepoint rollbacks keep the jobs of the enclosing transaction
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_JOBS_KEY, None)
+
+
+async def _push_committed(pending: list[Job]) -> None:
+    try:
+        await JobQueue(await get_redis()).enqueue(*pending)
+    except RedisError as exc:
+        for dropped in pending:
+            jobs_enqueue_errors.inc(job=dropped.name)
+        logger.error(f"Failed to enqueue {len(pending)} committed jobs", extra={"error": str(exc)})
+
+
+async def drain_pending_enqueues() -> None:
+    """Wait for committed jobs still being pushed to Redis (call on shutdown)."""
+    if _pending_enqueues:
+        await asyncio.gather(*_pending_enqueues, return_exceptions=True)
+
+
+@registry.collector
+async def _collect_queue_depth() -> None:
+    for state, depth in (await JobQueue(await get_redis()).depth()).items():
+        job_queue_depth.set(depth, state=state)
@@ -0,0 +1,112 @@
+"""Exception Log Throttling.
+
+When a dependency goes down, every request fails the same way and logging a full
+traceback for each one burns CPU and I/O exactly when the process needs headroom.
+``exception_log`` groups exceptions by fingerprint (exception type plus the code
+locations of its traceback, not the message):
+
+- the first occurrence of a fingerprint for an event is logged in full
+- repeats are only counted, and a summary record with the ``suppressed`` count
+  is logged every ``ERROR_LOG_SUMMARY_INTERVAL`` seconds while they keep coming
+- after a quiet interval the next occurrence is logged in full again
+"""
+
+import asyncio
+import contextlib
+import hashlib
+from dataclasses import dataclass
+from types import TracebackType
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.metrics import registry
+
+# Fingerprints tracked at once; exceptions beyond this are logged in full
+MAX_FINGERPRINTS = 1000
+
+log_records_suppressed = registry.counter(
+    "log_records_suppressed_total",
+    "Repeated exception log records folded into summaries",
+    ["event"],
+)
+
+
+def exception_fingerprint(exc: BaseException) -> str:
+    """Identify where an exception comes from, ignoring its message."""
+    digest = hashlib.blake2b(digest_size=8)
+    seen: BaseException | None = exc
+    while seen is not None:
+        digest.update(f"{type(seen).__module__}.{type(seen).__qualname__}".encode())
+        tb: TracebackType | None = seen.__traceback__
+        while tb is not None:
+            digest.update(f"{tb.tb_frame.f_code.co_filename}:{tb.tb_lineno}".encode())
+            tb = tb.tb_next
+        seen = seen.__cause__
+    return digest.hexdigest()
+
+
+@dataclass
+class _Repeats:
+    event: str
+    error: str
+    path: str | None
+    suppressed: int = 0
+
+
+class ExceptionLogThrottle:
+    def __init__(self, interval: float, max_fingerprints: int = MAX_FINGERPRINTS) -> None:
+        self.interval = interval
+        self.max_fingerprints = max_fingerprints
+        self._repeats: dict[tuple[str, str], _Repeats] = {}
+        self._runner: asyncio.Task[None] | None = None
+
+    def first(self, event: str, exc: BaseException, path: str | None = None) -> bool:
+        """True if ``exc`` should be logged in full for ``event``; otherwise it is counted."""
+        key = (event, exception_fingerprint(exc))
+        repeats = self._repeats.get(key)
+        if repeats is not None:
+            repeats.suppressed += 1
+            log_records_suppressed.inc(event=event)
+            return False
+        if len(self._repeats) < self.max_fingerprints:
+            self._repeats[key] = _Repeats(event, f"{type(exc).__name__}: {exc}", path)
+        return True
+
+    def flush(self) -> None:
+        """Log a summary for every fingerprint repeated since the last flush."""
+        for key, repeats in list(self._repeats.items()):
+            if not repeats.suppressed:
+                # Quiet for a whole interval: the next occurrence is logged in full
+                del self._repeats[key]
+                continue
+            logger.warning(
+                f"{repeats.event} (repeated)",
+                extra={
+                    "fingerprint": key[1],
+                    "path": repeats.path,
+                    "error": repeats.error,
+                    "suppressed": repeats.suppressed,
+                },
+            )
+            repeats.suppressed = 0
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._flush_forever())
+
+    async def close(self) -> None:
+        """Stop the periodic summaries and log the last one."""
+        if self._runner is not None:
+            self._runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
+        self.flush()
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
+
+
+exception_log = ExceptionLogThrottle(settings.error_log_summary_interval)
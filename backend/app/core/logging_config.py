@@ -10,7 +10,18 @@ from datetime import datetime
 from typing import Any
 
 
-EXTRA_FIELDS = ("method", "path", "client_ip", "user_agent", "status_code", "duration_ms", "error")
+EXTRA_FIELDS = (
+    "method",
+    "path",
+    "client_ip",
+    "user_agent",
+    "status_code",
+    "duration_ms",
+    "error",
+    "stack",
+    "fingerprint",
+    "suppressed",
+)
 
 
 class JsonFormatter(logging.Formatter):
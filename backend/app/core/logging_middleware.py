@@ -10,7 +10,9 @@ from typing import Callable
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.core.log_throttle import exception_log
 from app.core.logging_config import logger
+from app.core.loop_watchdog import current_route
 
 
 class LoggingMiddleware(BaseHTTPMiddleware):
@@ -24,6 +26,8 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         path = request.url.path
         client_ip = self._get_client_ip(request)
         user_agent = request.headers.get("user-agent", "unknown")
+        # Inherited by the task running the endpoint, for the loop watchdog's reports
+        current_route.set(f"{method} {path}")
 
         # Log request start
         logger.info(
@@ -59,18 +63,19 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             duration_ms = round((time.time() - start_time) * 1000, 2)
 
-            # Log error
-            logger.error(
-                "Request failed",
-                extra={
-                    "method": method,
-                    "path": path,
-                    "error": str(e),
-                    "duration_ms": duration_ms,
-                    "client_ip": client_ip,
-                },
-                exc_info=True,
-            )
+            # Log error, once per storm of identical failures
+            if exception_log.first("Request failed", e, path):
+                logger.error(
+                    "Request failed",
+                    extra={
+                        "method": method,
+                        "path": path,
+                        "error": str(e),
+                        "duration_ms": duration_ms,
+                        "client_ip": client_ip,
+                    },
+                    exc_info=True,
+                )
             raise
 
     def _get_client_ip(self, request: Request) -> str:
@@ -0,0 +1,113 @@
+"""Event Loop Watchdog.
+
+Measures how late the event loop runs a periodic heartbeat. Any synchronous
+work on the loop (serialization, hashing, blocking I/O) delays every request
+being served concurrently, and shows up here as lag.
+
+- every heartbeat's lag is recorded in the ``event_loop_lag_seconds`` histogram
+- a helper thread notices when the heartbeat is overdue by more than the
+  threshold, captures the loop thread's stack *while it is still blocked* and
+  logs it with the route being served (see ``current_route``)
+- with ``LOOP_DEBUG=true`` asyncio's debug mode is enabled as well, which logs
+  every callback slower than the threshold (development only: it is expensive)
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.metrics import registry
+
+# Set to "<METHOD> <path>" (or "job <name>") for the duration of each unit of work
+current_route: ContextVar[str | None] = ContextVar("current_route", default=None)
+
+HEARTBEAT_INTERVAL = 0.05
+
+event_loop_lag_seconds = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a loop heartbeat was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+event_loop_blocked_total = registry.counter(
+    "event_loop_blocked_total", "Times the event loop was blocked for longer than the threshold"
+)
+
+
+class LoopWatchdog:
+    def __init__(self, threshold: float, interval: float = HEARTBEAT_INTERVAL) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id = 0
+        self._last_beat = 0.0
+        self._heartbeat: asyncio.Task[None] | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    async def start(self, debug: bool = False) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if debug:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.threshold
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    async def _beat(self) -> None:
+        while True:
+            due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self._last_beat = now = time.monotonic()
+            event_loop_lag_seconds.observe(max(now - due, 0.0))
+
+    def _watch(self) -> None:
+        """Runs in the helper thread: report each stall once, while it lasts."""
+        reported = 0.0
+        while not self._stopping.wait(self.threshold / 2):
+            last_beat = self._last_beat
+            overdue = time.monotonic() - last_beat - self.interval
+            if overdue > self.threshold and last_beat != reported:
+                reported = last_beat
+                self._report(overdue)
+
+    def _report(self, overdue: float) -> None:
+        event_loop_blocked_total.inc()
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else None
+        logger.warning(
+            "Event loop blocked",
+            extra={
+                "path": self._current_route(),
+                "duration_ms": round(overdue * 1000, 2),
+                "stack": stack,
+            },
+        )
+
+    def _current_route(self) -> str | None:
+        task = asyncio.current_task(self._loop)
+        # Task.get_context() is new in Python 3.12
+        get_context = getattr(task, "get_context", None)
+        if get_context is None:
+            return None
+        return get_context().get(current_route)
+
+
+watchdog = LoopWatchdog(threshold=settings.loop_lag_threshold)
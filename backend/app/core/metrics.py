@@ -0,0 +1,275 @@
+"""Application Metrics.
+
+Lightweight in-process counters and histograms, rendered in the Prometheus
+text exposition format by the ``/metrics`` endpoint.
+
+Every process (API workers and job workers) periodically publishes a snapshot of
+its registry to Redis; ``/metrics`` merges the other processes' snapshots into
+its own output.
+"""
+
+import copy
+import json
+import math
+import os
+import socket
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, TypeVar
+
+from redis.asyncio import Redis
+
+LabelValues = tuple[str, ...]
+Snapshot = dict[str, dict[str, Any]]
+
+SNAPSHOT_PREFIX = "metrics:snapshot:"
+
+# Identifies this process among the snapshots published to Redis
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: LabelValues, **extra: str) -> str:
+    pairs = [*zip(labelnames, values, strict=True), *extra.items()]
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{value}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        aggregate: bool = True,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Whether values are published to, and merged from, other processes
+        self.aggregate = aggregate
+        self.values: dict[LabelValues, Any] = {}
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labels": list(self.labelnames),
+            "samples": [[list(key), value] for key, value in self.values.items()],
+        }
+
+    def merged(self, snapshots: Iterable[dict[str, Any]]) -> "Metric":
+        """Return a copy of this metric with the samples of ``snapshots`` added in."""
+        combined = copy.deepcopy(self)
+        for snapshot in snapshots:
+            for key, value in snapshot["samples"]:
+                combined._merge_sample(tuple(key), value)
+        return combined
+
+    def _merge_sample(self, key: LabelValues, value: Any) -> None:
+        self.values[key] = self.values.get(key, 0.0) + value
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+MetricT = TypeVar("MetricT", bound=Metric)
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for key, value in sorted(self.values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Cumulative bucketed observations per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        aggregate: bool = True,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, aggregate)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., +Inf count, sum]
+        self.values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        state = self.values.get(key)
+        if state is None:
+            state = self.values[key] = [0.0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[index] += 1
+                break
+        else:
+            state[len(self.buckets)] += 1
+        state[-1] += value
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**super().snapshot(), "buckets": list(self.buckets)}
+
+    def _merge_sample(self, key: LabelValues, value: Any) -> None:
+        state = self.values.get(key)
+        if state is None or len(state) != len(value):
+            self.values[key] = list(value)
+            return
+        for index, amount in enumerate(value):
+            state[index] += amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for key, state in sorted(self.values.items()):
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), state[:-1], strict=True):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric exposed by this process."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self.collectors: list[Callable[[], Awaitable[None]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        aggregate: bool = True,
+    ) -> Gauge:
+        """Register a gauge; pass ``aggregate=False`` for values read from shared state."""
+        return self._register(Gauge(name, documentation, labelnames, aggregate))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, func: Callable[[], Awaitable[None]]) -> Callable[[], Awaitable[None]]:
+        """Register a coroutine that refreshes gauges right before they are rendered."""
+        self.collectors.append(func)
+        return func
+
+    async def collect(self) -> None:
+        for collector in self.collectors:
+            await collector()
+
+    def snapshot(self) -> Snapshot:
+        return {
+            name: metric.snapshot() for name, metric in self.metrics.items() if metric.aggregate
+        }
+
+    def render(self, snapshots: Iterable[Snapshot] = ()) -> str:
+        """Render every metric, summing in the samples of other processes' snapshots."""
+        snapshots = list(snapshots)
+        lines: list[str] = []
+        for name, metric in self.metrics.items():
+            remote = [snapshot[name] for snapshot in snapshots if name in snapshot]
+            if remote and metric.aggregate:
+                metric = metric.merged(remote)
+            lines.extend(metric.render())
+
+        # Metrics only registered in other processes
+        remote_only: dict[str, list[dict[str, Any]]] = {}
+        for snapshot in snapshots:
+            for name, data in snapshot.items():
+                if name not in self.metrics:
+                    remote_only.setdefault(name, []).append(data)
+        for name, data in remote_only.items():
+            lines.extend(_metric_from_snapshot(name, data[0]).merged(data).render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: MetricT) -> MetricT:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+            return existing  # type: ignore[return-value]
+        self.metrics[metric.name] = metric
+        return metric
+
+
+def _metric_from_snapshot(name: str, data: dict[str, Any]) -> Metric:
+    if data["kind"] == "histogram":
+        return Histogram(name, data["help"], data["labels"], data["buckets"])
+    metric_type = Gauge if data["kind"] == "gauge" else Counter
+    return metric_type(name, data["help"], data["labels"])
+
+
+# Global registry instance
+registry = MetricsRegistry()
+
+
+async def publish_snapshot(redis: Redis, ttl: int = 30) -> None:
+    """Store this process's metrics in Redis for ``/metrics`` to merge."""
+    await redis.set(f"{SNAPSHOT_PREFIX}{PROCESS_ID}", json.dumps(registry.snapshot()), ex=ttl)
+
+
+async def read_snapshots(redis: Redis) -> list[Snapshot]:
+    """Load the snapshots published by every other live process."""
+    keys = [
+        key
+        async for key in redis.scan_iter(match=f"{SNAPSHOT_PREFIX}*", count=100)
+        if key != f"{SNAPSHOT_PREFIX}{PROCESS_ID}"
+    ]
+    if not keys:
+        return []
+    return [json.loads(value) for value in await redis.mget(keys) if value]
@@ -1,27 +1,68 @@
 import json
+from collections.abc import Awaitable, Callable
 from functools import wraps
-from typing import Any, Awaitable, Callable, TypeVar
+from typing import Any, TypeVar
 
-from app.core.cache import get_redis
+from fastapi import Response
+
+from app.core.cache import get_binary_redis
+from app.core.compression_middleware import (
+    COMPRESSORS,
+    accepted_encoding,
+    compress_body,
+    encoded_response_headers,
+)
+from app.core.config import settings
 
 ResponseT = TypeVar("ResponseT")
 
+IDENTITY = b"identity"
+
 
 def cache_response(
-    key: str, ttl: int = 60
-) -> Callable[[Callable[..., Awaitable[ResponseT]]], Callable[..., Awaitable[ResponseT]]]:
-    def decorator(func: Callable[..., Awaitable[ResponseT]]) -> Callable[..., Awaitable[ResponseT]]:
+    key: str | Callable[..., str], ttl: int = 60
+) -> Callable[[Callable[..., Awaitable[ResponseT]]], Callable[..., Awaitable[Response]]]:
+    """Cache the JSON response of an endpoint in Redis.
+
+    ``key`` may be a function of the endpoint's keyword arguments, for responses
+    cached per user. Entries are stored per negotiated content encoding, already
+    compressed, so a cache hit is served as-is and never recompressed.
+    """
+
+    def decorator(func: Callable[..., Awaitable[ResponseT]]) -> Callable[..., Awaitable[Response]]:
         @wraps(func)
-        async def wrapper(*args: Any, **kwargs: Any) -> ResponseT:
-            redis = await get_redis()
-            cached = await redis.get(key)
+        async def wrapper(*args: Any, **kwargs: Any) -> Response:
+            encoding = accepted_encoding.get()
+            base_key = key(**kwargs) if callable(key) else key
+            cache_key = f"{base_key}:{encoding}" if encoding else base_key
+            redis = await get_binary_redis()
+            cached = await redis.get(cache_key)
             if cached:
-                return json.loads(cached)
+                stored_encoding, _, body = cached.partition(b"\n")
+                return _encoded_response(body, stored_encoding)
 
             response = await func(*args, **kwargs)
-            await redis.setex(key, ttl, json.dumps(response))
-            return response
+            body = json.dumps(response).encode()
+            stored_encoding = IDENTITY
+            if encoding and len(body) >= settings.compression_min_size:
+                body = compress_body(encoding, body)
+                stored_encoding = encoding.encode()
+            await redis.setex(cache_key, ttl, stored_encoding + b"\n" + body)
+            return _encoded_response(body, stored_encoding)
 
         return wrapper
 
     return decorator
+
+
+def cached_response_keys(key: str) -> list[str]:
+    """Every Redis key ``cache_response(key)`` may store, one per content encoding."""
+    return [key, *(f"{key}:{encoding}" for encoding in COMPRESSORS)]
+
+
+def _encoded_response(body: bytes, encoding: bytes) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=encoded_response_headers(None if encoding == IDENTITY else encoding.decode()),
+    )
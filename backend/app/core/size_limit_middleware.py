@@ -2,6 +2,7 @@
 
 Prevents oversized requests from consuming server resources.
 Returns 413 (Payload Too Large) for requests exceeding the limit.
+Upload endpoints that stream their body can be given a larger per-path limit.
 """
 
 from fastapi import HTTPException, Request
@@ -14,10 +15,13 @@ from app.core.config import settings
 class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
     """Middleware that limits request body size."""
 
-    def __init__(self, app, max_size: int | None = None) -> None:
+    def __init__(
+        self, app, max_size: int | None = None, path_limits: dict[str, int] | None = None
+    ) -> None:
         super().__init__(app)
         # Default to 10MB, configurable via settings
         self.max_size = max_size or getattr(settings, "max_request_size", 10 * 1024 * 1024)
+        self.path_limits = path_limits or {}
 
     async def dispatch(self, request: Request, call_next) -> Response:
         # Check Content-Length header if present
@@ -25,10 +29,11 @@ class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
 
         if content_length:
             size = int(content_length)
-            if size > self.max_size:
+            max_size = self.path_limits.get(request.url.path, self.max_size)
+            if size > max_size:
                 raise HTTPException(
                     status_code=413,
-                    detail=f"Request body too large. Maximum size: {self._format_size(self.max_size)}",
+                    detail=f"Request body too large. Maximum size: {self._format_size(max_size)}",
                 )
 
         return await call_next(request)
@@ -5,26 +5,45 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
+from app.api.deps import TicketIssuer, get_auth_ticket, get_current_user_cached, get_ticket_issuer
+from app.core.auth_ticket import AuthTicket
 from app.db.models.auth import User
 from app.db.models.subscription import Subscription
 from app.db.session import get_db
 
 
-async def get_active_subscription(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> Subscription | None:
-    """Get the user's active subscription if it exists."""
+async def find_active_subscription(db: AsyncSession, user_id: str) -> Subscription | None:
     result = await db.execute(
         select(Subscription)
-        .where(Subscription.reference_id == current_user.id)
+        .where(Subscription.reference_id == user_id)
         .where(Subscription.status.in_(["active", "trialing"]))
         .where((Subscription.period_end > datetime.now(UTC)) | (Subscription.period_end.is_(None)))
     )
     return result.scalar_one_or_none()
 
 
+async def get_active_subscription(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user_cached)],
+    ticket: Annotated[AuthTicket | None, Depends(get_auth_ticket)] = None,
+    issuer: Annotated[TicketIssuer | None, Depends(get_ticket_issuer)] = None,
+) -> Subscription | None:
+    """Get the user's active subscription if it exists.
+
+    A valid auth ticket answers from its plan; otherwise the subscription is
+    queried and a new ticket is issued with the result.
+    """
+    if ticket is not None:
+        if ticket.plan is None:
+            return None
+        return Subscription(plan=ticket.plan, reference_id=ticket.user_id, status="active")
+
+    subscription = await find_active_subscription(db, current_user.id)
+    if issuer is not None:
+        issuer.issue(current_user, subscription)
+    return subscription
+
+
 async def require_subscription(
     subscription: Annotated[Subscription | None, Depends(get_active_subscription)],
 ) -> Subscription:
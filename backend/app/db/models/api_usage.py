@@ -0,0 +1,32 @@
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ApiUsage(Base):
+    """Authenticated API calls per user and UTC day, rolled up from Redis."""
+
+    __tablename__ = "api_usage"
+
+    owner_id: Mapped[str] = mapped_column(
+        String, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    calls: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class ApiUsageRollup(Base):
+    """Redis batches already added to ``api_usage``, so a retried batch is not counted twice."""
+
+    __tablename__ = "api_usage_rollups"
+
+    batch_id: Mapped[str] = mapped_column(String, primary_key=True)
+    rolled_up_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
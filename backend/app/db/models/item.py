@@ -1,28 +1,100 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    Text,
+    event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, deferred, mapped_column, relationship
 
 from app.db.base import Base
 
+# Text search configuration used by the generated ``search_vector`` column
+SEARCH_CONFIG = "english"
+
+# Hash partitions of ``items`` on ``owner_id``; changing it means repartitioning
+ITEM_PARTITIONS = 16
+
 
 class Item(Base):
+    """Items, hash-partitioned on ``owner_id`` so owner-scoped queries touch one partition.
+
+    Unique constraints on a partitioned table must include the partition key, so
+    the primary key is ``(owner_id, id)``; ``ix_items_id`` serves lookups by id alone.
+    """
+
     __tablename__ = "items"
+    __table_args__ = (
+        PrimaryKeyConstraint("owner_id", "id", name="items_pkey"),
+        Index("ix_items_id", "id"),
+        Index("ix_items_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_items_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # Candidates for ``items_archive``
+        Index("ix_items_archivable", "updated_at", postgresql_where=text("NOT is_active")),
+        {"postgresql_partition_by": "HASH (owner_id)"},
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     owner_id: Mapped[str] = mapped_column(
-        String, ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+        String, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
+    # Bumped by every update; clients send it back in If-Match to avoid lost updates
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    # Maintained by Postgres; deferred so regular item reads never load it
+    search_vector: Mapped[str | None] = deferred(
+        mapped_column(
+            TSVECTOR,
+            Computed(
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+        )
+    )
 
     owner: Mapped["User"] = relationship("User", back_populates="items")
 
 
+# The trigram index needs pg_trgm; migrations create it too
+event.listen(
+    Item.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# Mirrors migration 0009 for databases built with ``metadata.create_all`` (tests)
+for remainder in range(ITEM_PARTITIONS):
+    event.listen(
+        Item.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TABLE items_p{remainder:02d} PARTITION OF items "
+            f"FOR VALUES WITH (MODULUS {ITEM_PARTITIONS}, REMAINDER {remainder})"
+        ).execute_if(dialect="postgresql"),
+    )
+
+
 from app.db.models.auth import User  # noqa: E402
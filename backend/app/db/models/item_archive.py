@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    Text,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ItemArchive(Base):
+    """Items inactive for longer than ``ITEM_ARCHIVE_AFTER_DAYS``, moved out of ``items``.
+
+    Same columns as ``items`` without the search vector, plus ``archived_at``. Rows
+    are moved here by ``app.services.item_archive`` and back by a restore; they
+    are only read when a request asks for archived items.
+    """
+
+    __tablename__ = "items_archive"
+    __table_args__ = (PrimaryKeyConstraint("owner_id", "id", name="items_archive_pkey"),)
+
+    id: Mapped[str] = mapped_column(String, nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    owner_id: Mapped[str] = mapped_column(
+        String, ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+    )
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
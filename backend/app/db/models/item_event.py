@@ -0,0 +1,84 @@
+from sqlalchemy import DDL, Sequence, event
+
+from app.db.base import Base
+from app.db.models.item import Item
+
+# Channel carrying item change notifications; payloads are JSON objects
+ITEM_EVENTS_CHANNEL = "item_events"
+
+# Above this many rows per owner in one statement, a single summary event is sent
+ITEM_EVENTS_ROW_CAP = 100
+
+# Transaction-local setting that silences events, e.g. while items move between shards
+ITEM_EVENTS_MUTE_SETTING = "app.mute_item_events"
+
+# Orders events so SSE clients can resume with ``Last-Event-ID``
+item_event_seq = Sequence("item_event_seq", metadata=Base.metadata)
+
+ITEM_EVENTS_EMIT_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION item_events_emit(op text, owner text, total bigint, ids text[])
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    changed_id text;
+BEGIN
+    IF current_setting('{ITEM_EVENTS_MUTE_SETTING}', true) = 'on' THEN
+        RETURN;
+    END IF;
+    IF total > {ITEM_EVENTS_ROW_CAP} THEN
+        PERFORM pg_notify('{ITEM_EVENTS_CHANNEL}', json_build_object(
+            'seq', nextval('item_event_seq'), 'owner_id', owner, 'op', op, 'count', total
+        )::text);
+        RETURN;
+    END IF;
+    FOREACH changed_id IN ARRAY ids LOOP
+        PERFORM pg_notify('{ITEM_EVENTS_CHANNEL}', json_build_object(
+            'seq', nextval('item_event_seq'), 'owner_id', owner, 'op', op, 'id', changed_id
+        )::text);
+    END LOOP;
+END;
+$$
+"""
+
+# One event per changed row, grouped by owner; transition tables only exist for their operation
+ITEM_EVENTS_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION item_events_notify() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    change record;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        FOR change IN
+            SELECT owner_id, count(*) AS total, (array_agg(id))[1:{ITEM_EVENTS_ROW_CAP}] AS ids
+            FROM old_rows GROUP BY owner_id
+        LOOP
+            PERFORM item_events_emit('deleted', change.owner_id, change.total, change.ids);
+        END LOOP;
+    ELSE
+        FOR change IN
+            SELECT owner_id, count(*) AS total, (array_agg(id))[1:{ITEM_EVENTS_ROW_CAP}] AS ids
+            FROM new_rows GROUP BY owner_id
+        LOOP
+            PERFORM item_events_emit(
+                CASE TG_OP WHEN 'INSERT' THEN 'created' ELSE 'updated' END,
+                change.owner_id, change.total, change.ids
+            );
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+ITEM_EVENTS_TRIGGERS = (
+    "CREATE TRIGGER items_events_insert AFTER INSERT ON items "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION item_events_notify()",
+    "CREATE TRIGGER items_events_update AFTER UPDATE ON items "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION item_events_notify()",
+    "CREATE TRIGGER items_events_delete AFTER DELETE ON items "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION item_events_notify()",
+)
+
+# Mirrors migration 0006 for databases built with ``metadata.create_all`` (tests)
+for statement in (ITEM_EVENTS_EMIT_FUNCTION, ITEM_EVENTS_FUNCTION, *ITEM_EVENTS_TRIGGERS):
+    event.listen(Item.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ItemImportRow(Base):
+    """Raw rows of an item import, COPY-loaded before being validated and merged.
+
+    Values are kept as uploaded text; parse failures are recorded in ``error``.
+    The table is unlogged: staged rows are transient and rebuilt by re-uploading.
+    """
+
+    __tablename__ = "item_import_rows"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    import_id: Mapped[str] = mapped_column(String, primary_key=True)
+    line: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[str | None] = mapped_column(Text, nullable=True)
+    name: Mapped[str | None] = mapped_column(Text, nullable=True)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    is_active: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    staged_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, String, false, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ItemShardOverride(Base):
+    """Owners pinned to an item shard other than the one the hash ring picks.
+
+    Kept on the primary and read by every process; ``moving`` fences writes
+    while ``python -m app.commands.move_item_owner`` copies the owner's items.
+    """
+
+    __tablename__ = "item_shard_overrides"
+
+    owner_id: Mapped[str] = mapped_column(
+        String, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    shard: Mapped[str] = mapped_column(String, nullable=False)
+    moving: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from sqlalchemy import DDL, DateTime, ForeignKey, Integer, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.models.item import Item
+
+
+class ItemStats(Base):
+    """Per-owner item counters, maintained by statement-level triggers on ``items``."""
+
+    __tablename__ = "item_stats"
+
+    owner_id: Mapped[str] = mapped_column(
+        String, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    item_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    active_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
+
+
+# Inserts upsert the owner's row; updates and deletes only adjust existing rows so a
+# cascading user delete never recreates counters for the user being removed.
+ITEM_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION item_stats_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO item_stats (owner_id, item_count, active_count, updated_at)
+        SELECT owner_id, count(*), count(*) FILTER (WHERE is_active), now()
+        FROM new_rows
+        GROUP BY owner_id
+        ORDER BY owner_id
+        ON CONFLICT (owner_id) DO UPDATE SET
+            item_count = item_stats.item_count + EXCLUDED.item_count,
+            active_count = item_stats.active_count + EXCLUDED.active_count,
+            updated_at = EXCLUDED.updated_at;
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE item_stats SET
+            item_count = item_stats.item_count + delta.item_count,
+            active_count = item_stats.active_count + delta.active_count,
+            updated_at = now()
+        FROM (
+            SELECT owner_id, sum(items) AS item_count, sum(active) AS active_count
+            FROM (
+                SELECT owner_id, -1 AS items, -(is_active IS TRUE)::int AS active FROM old_rows
+                UNION ALL
+                SELECT owner_id, 1, (is_active IS TRUE)::int FROM new_rows
+            ) AS changes
+            GROUP BY owner_id
+            HAVING sum(items) <> 0 OR sum(active) <> 0
+        ) AS delta
+        WHERE item_stats.owner_id = delta.owner_id;
+    ELSE
+        UPDATE item_stats SET
+            item_count = item_stats.item_count - delta.item_count,
+            active_count = item_stats.active_count - delta.active_count,
+            updated_at = now()
+        FROM (
+            SELECT
+                owner_id,
+                count(*) AS item_count,
+                count(*) FILTER (WHERE is_active) AS active_count
+            FROM old_rows
+            GROUP BY owner_id
+        ) AS delta
+        WHERE item_stats.owner_id = delta.owner_id;
+    END IF;
+    RETURN NULL;
+END;
+$$
+"""
+
+ITEM_STATS_TRIGGERS = (
+    "CREATE TRIGGER items_stats_insert AFTER INSERT ON items "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION item_stats_apply()",
+    "CREATE TRIGGER items_stats_update AFTER UPDATE ON items "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION item_stats_apply()",
+    "CREATE TRIGGER items_stats_delete AFTER DELETE ON items "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION item_stats_apply()",
+)
+
+# Mirrors migration 0004 for databases built with ``metadata.create_all`` (tests)
+for statement in (ITEM_STATS_FUNCTION, *ITEM_STATS_TRIGGERS):
+    event.listen(Item.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
@@ -0,0 +1,72 @@
+"""Connection Pool Wait Tracking.
+
+``TimedQueuePool`` is the async queue pool with the time each checkout spends
+waiting for a free connection measured. Admission control reads ``pool_wait`` to
+tell when Postgres is falling behind: it reports the recent average wait, or how
+long the oldest checkout still queued has been waiting, whichever is longer.
+
+The tracker is per process, shared by every engine using the pool.
+"""
+
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from app.core.metrics import registry
+
+db_pool_wait_seconds = registry.histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a database connection from the pool",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class PoolWaitTracker:
+    """Recent checkout wait: a moving average that fades once checkouts stop waiting."""
+
+    def __init__(self, smoothing: float = 0.1, half_life: float = 1.0) -> None:
+        self.smoothing = smoothing
+        self.half_life = half_life
+        self._average = 0.0
+        self._updated = time.monotonic()
+        # Start times of checkouts still waiting
+        self._waiting: list[float] = []
+
+    def begin(self) -> float:
+        started = time.monotonic()
+        self._waiting.append(started)
+        return started
+
+    def end(self, started: float) -> None:
+        self._waiting.remove(started)
+        now = time.monotonic()
+        waited = now - started
+        db_pool_wait_seconds.observe(waited)
+        self._average = self._decayed(now) * (1 - self.smoothing) + waited * self.smoothing
+        self._updated = now
+
+    def seconds(self) -> float:
+        now = time.monotonic()
+        oldest = now - min(self._waiting) if self._waiting else 0.0
+        return max(self._decayed(now), oldest)
+
+    def reset(self) -> None:
+        self._average = 0.0
+        self._waiting.clear()
+
+    def _decayed(self, now: float) -> float:
+        return self._average * 0.5 ** ((now - self._updated) / self.half_life)
+
+
+pool_wait = PoolWaitTracker()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that reports checkout waits to ``pool_wait``."""
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = pool_wait.begin()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.end(started)
@@ -0,0 +1,233 @@
+"""Owner-based item sharding.
+
+With ``ITEM_SHARDS`` set, each owner's items, item counters and import staging
+rows live in one of several Postgres databases; users, sessions and everything
+else stay on the primary. A consistent hash ring picks an owner's shard, so
+adding a shard only remaps about ``1/N`` of the owners, and
+``item_shard_overrides`` on the primary pins hot tenants elsewhere.
+
+Every process reloads the overrides every ``ITEM_SHARD_REFRESH_INTERVAL``
+seconds and refuses item requests once its copy is a few refreshes old, which
+is what lets ``python -m app.commands.move_item_owner`` switch an owner
+to another shard without a process still writing to the old one.
+"""
+
+import asyncio
+import bisect
+import contextlib
+import hashlib
+import time
+from collections.abc import Iterable
+
+from sqlalchemy import Connection, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.core.config import settings
+from app.core.error_handlers import AppException
+from app.core.logging_config import logger
+from app.db.models.item import Item
+from app.db.models.item_archive import ItemArchive
+from app.db.models.item_event import item_event_seq
+from app.db.models.item_import import ItemImportRow
+from app.db.models.item_shard import ItemShardOverride
+from app.db.models.item_stats import ItemStats
+from app.db.pool import TimedQueuePool
+from app.db.session import AsyncSessionLocal, engine
+
+# Points per shard on the ring; more points spread owners more evenly
+VIRTUAL_NODES = 128
+
+# Refreshes missed before a process stops serving items rather than risk a stale route
+STALE_AFTER_REFRESHES = 3
+
+# Tables that live on every shard, created by ``create_shard_schema``
+SHARD_TABLES = (
+    Item.__table__,
+    ItemArchive.__table__,
+    ItemStats.__table__,
+    ItemImportRow.__table__,
+)
+
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of owner IDs onto shard names."""
+
+    def __init__(self, names: Iterable[str], virtual_nodes: int = VIRTUAL_NODES) -> None:
+        points = sorted(
+            (_ring_hash(f"{name}#{replica}"), name)
+            for name in names
+            for replica in range(virtual_nodes)
+        )
+        if not points:
+            raise ValueError("A hash ring needs at least one shard")
+        self._hashes = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def lookup(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _ring_hash(key)) % len(self._hashes)
+        return self._names[index]
+
+
+def create_shard_schema(connection: Connection) -> None:
+    """Create the item tables on a shard, skipping any that already exist.
+
+    Shards hold no users, so foreign keys to ``user`` are left out; the tables'
+    DDL listeners still add the partitions, counters and event triggers. Indexes
+    added since a table was created are built on it, blocking its writes meanwhile.
+    """
+    item_event_seq.create(connection, checkfirst=True)
+    for table in SHARD_TABLES:
+        if connection.dialect.has_table(connection, table.name):
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+            continue
+        table.dispatch.before_create(table, connection, checkfirst=False, _ddl_runner=None)
+        connection.execute(CreateTable(table, include_foreign_key_constraints=[]))
+        for index in table.indexes:
+            connection.execute(CreateIndex(index))
+        table.dispatch.after_create(table, connection, checkfirst=False, _ddl_runner=None)
+
+
+class ShardRouter:
+    """Routes an owner's item queries to their shard's database."""
+
+    def __init__(
+        self, shards: dict[str, str], refresh_interval: float, primary: AsyncEngine = engine
+    ) -> None:
+        self.urls = dict(shards)
+        self.refresh_interval = refresh_interval
+        self.primary = primary
+        self.ring = HashRing(self.urls) if self.urls else None
+        self.overrides: dict[str, str] = {}
+        self.moving: set[str] = set()
+        self._refreshed_at: float | None = None
+        self._engines: dict[str, AsyncEngine] = {}
+        self._sessionmakers: dict[str, async_sessionmaker[AsyncSession]] = {}
+        self._runner: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ring is not None
+
+    @property
+    def stale_after(self) -> float:
+        """Seconds until a process stops using overrides it failed to refresh."""
+        return self.refresh_interval * STALE_AFTER_REFRESHES
+
+    @property
+    def fresh(self) -> bool:
+        if self._refreshed_at is None:
+            return False
+        return time.monotonic() - self._refreshed_at < self.stale_after
+
+    def shard_for(self, owner_id: str) -> str | None:
+        """The owner's shard name, or None when sharding is disabled."""
+        if self.ring is None:
+            return None
+        return self.overrides.get(owner_id) or self.ring.lookup(owner_id)
+
+    def shard_engine(self, shard: str) -> AsyncEngine:
+        if shard not in self._engines:
+            self._engines[shard] = create_async_engine(
+                self.urls[shard],
+                pool_size=settings.db_pool_size,
+                max_overflow=settings.db_max_overflow,
+                poolclass=TimedQueuePool,
+                echo=settings.debug,
+            )
+        return self._engines[shard]
+
+    def check(self, owner_id: str, write: bool) -> None:
+        """Refuse item access while routes may be stale, and writes during a move."""
+        if self.ring is None:
+            return
+        if not self.fresh:
+            raise AppException("Items are temporarily unavailable", status_code=503)
+        if write and owner_id in self.moving:
+            raise AppException("Items are being moved, retry shortly", status_code=503)
+
+    def session(self, owner_id: str) -> AsyncSession:
+        """A new session on the owner's item database: the primary unless sharded."""
+        shard = self.shard_for(owner_id)
+        if shard is None:
+            return AsyncSessionLocal()
+        if shard not in self._sessionmakers:
+            self._sessionmakers[shard] = async_sessionmaker(
+                self.shard_engine(shard), expire_on_commit=False
+            )
+        return self._sessionmakers[shard]()
+
+    async def refresh(self) -> None:
+        # Taken before reading: the loaded overrides are at least this recent
+        started = time.monotonic()
+        async with self.primary.connect() as conn:
+            rows = (
+                await conn.execute(
+                    select(
+                        ItemShardOverride.owner_id,
+                        ItemShardOverride.shard,
+                        ItemShardOverride.moving,
+                    )
+                )
+            ).all()
+        overrides = {}
+        for owner_id, shard, _moving in rows:
+            if shard in self.urls:
+                overrides[owner_id] = shard
+            else:
+                logger.error(f"Item shard override for {owner_id} names unknown shard {shard!r}")
+        self.overrides = overrides
+        self.moving = {owner_id for owner_id, _shard, moving in rows if moving}
+        self._refreshed_at = started
+
+    async def start(self) -> None:
+        """Load the overrides, then keep them fresh in the background."""
+        if self.ring is None or self._runner is not None:
+            return
+        try:
+            await self.refresh()
+        except (OSError, SQLAlchemyError) as exc:
+            logger.error("Failed to load item shard overrides", extra={"error": str(exc)})
+        self._runner = asyncio.create_task(self._refresh_forever())
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
+        for shard_engine in self._engines.values():
+            await shard_engine.dispose()
+        self._engines.clear()
+        self._sessionmakers.clear()
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except (OSError, SQLAlchemyError) as exc:
+                logger.warning("Failed to refresh item shard overrides", extra={"error": str(exc)})
+
+
+shard_router = ShardRouter(settings.item_shards, settings.item_shard_refresh_interval)
+
+
+def item_database_urls() -> list[str]:
+    """Databases holding items, and so emitting item events."""
+    return list(settings.item_shards.values()) or [settings.database_url]
+
+
+async def get_shard_router() -> ShardRouter:
+    return shard_router
@@ -0,0 +1,202 @@
+"""Production Server Launcher.
+
+Runs the API as several uvicorn worker processes under uvicorn's supervisor:
+
+    python -m app.launcher --host 0.0.0.0 --port 8000
+
+- one worker per CPU of the container's quota (cgroup v1/v2), or ``WEB_CONCURRENCY``
+- ``DB_CONNECTION_BUDGET`` is split between the workers' connection pools
+- workers exit gracefully after ``WORKER_MAX_REQUESTS`` (plus jitter) requests or
+  above ``WORKER_MAX_MEMORY_MB`` resident memory, and the supervisor replaces them
+- uvloop and httptools are used when installed
+
+Workers share nothing in memory: sessions, response caches and rate limits live
+in Redis, and each worker publishes its metrics to Redis so that ``/metrics``
+reports totals for all of them whichever worker serves it.
+"""
+
+import argparse
+import importlib.util
+import logging
+import math
+import os
+import random
+import socket
+from pathlib import Path
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+# Connections each worker opens outside its pool (the item events LISTEN connection)
+RESERVED_CONNECTIONS = 1
+
+# Share of the container memory limit the workers may use before recycling
+MEMORY_LIMIT_SHARE = 0.8
+
+# Anything above this is the cgroup v1 way of saying "no limit"
+UNLIMITED_MEMORY = 1 << 60
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit(cgroup_root: Path = CGROUP_ROOT) -> float:
+    """CPUs available to this process: the cgroup quota, capped by CPU affinity."""
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:  # not available on macOS
+        cpus = float(os.cpu_count() or 1)
+
+    cpu_max = _read(cgroup_root / "cpu.max")  # cgroup v2: "<quota> <period>" or "max <period>"
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return min(cpus, int(quota) / int(period))
+        return cpus
+
+    quota = _read(cgroup_root / "cpu" / "cpu.cfs_quota_us")  # cgroup v1; -1 means no quota
+    period = _read(cgroup_root / "cpu" / "cpu.cfs_period_us")
+    if quota is not None and period is not None and int(quota) > 0:
+        return min(cpus, int(quota) / int(period))
+    return cpus
+
+
+def memory_limit(cgroup_root: Path = CGROUP_ROOT) -> int | None:
+    """The container's memory limit in bytes, or None when unlimited."""
+    for path in (cgroup_root / "memory.max", cgroup_root / "memory" / "memory.limit_in_bytes"):
+        value = _read(path)
+        if value is not None:
+            if value == "max" or int(value) >= UNLIMITED_MEMORY:
+                return None
+            return int(value)
+    return None
+
+
+def worker_count(cpus: float) -> int:
+    if settings.web_concurrency:
+        return settings.web_concurrency
+    return max(1, math.ceil(cpus))
+
+
+def pool_sizes(budget: int, workers: int) -> tuple[int, int]:
+    """Split the connection budget into a (pool_size, max_overflow) per worker.
+
+    Keeps the configured ratio between persistent and overflow connections.
+    """
+    per_worker = budget // workers - RESERVED_CONNECTIONS
+    if per_worker < 1:
+        raise SystemExit(
+            f"DB_CONNECTION_BUDGET={budget} is too small for {workers} workers "
+            f"(each needs at least {RESERVED_CONNECTIONS + 1} connections)"
+        )
+    configured = settings.db_pool_size + settings.db_max_overflow
+    pool_size = max(1, round(per_worker * settings.db_pool_size / configured))
+    return pool_size, per_worker - pool_size
+
+
+def worker_memory_ceiling(workers: int, cgroup_root: Path = CGROUP_ROOT) -> int | None:
+    """Per-worker resident memory ceiling in bytes, or None to disable the check."""
+    if settings.worker_max_memory_mb is not None:
+        return settings.worker_max_memory_mb * 1024 * 1024 or None
+    limit = memory_limit(cgroup_root)
+    if limit is None:
+        return None
+    return int(limit * MEMORY_LIMIT_SHARE / workers)
+
+
+def resident_memory() -> int | None:
+    """This process's resident set size in bytes (Linux only)."""
+    statm = _read(Path("/proc/self/statm"))
+    if statm is None:
+        return None
+    return int(statm.split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+class RecyclingServer(uvicorn.Server):
+    """A uvicorn server that shuts down gracefully when it should be replaced."""
+
+    def __init__(
+        self, config: uvicorn.Config, max_requests_jitter: int, max_memory: int | None
+    ) -> None:
+        super().__init__(config)
+        self.max_requests_jitter = max_requests_jitter
+        self.max_memory = max_memory
+
+    async def startup(self, sockets: list[socket.socket] | None = None) -> None:
+        # Runs once in each worker; the jitter stops workers recycling in lockstep
+        if self.config.limit_max_requests:
+            self.config.limit_max_requests += random.randint(0, self.max_requests_jitter)
+        await super().startup(sockets)
+
+    async def on_tick(self, counter: int) -> bool:
+        if await super().on_tick(counter):
+            return True
+        # Ticks are 0.1s apart: check memory every 10 seconds
+        if self.max_memory is not None and counter % 100 == 0:
+            rss = resident_memory()
+            if rss is not None and rss > self.max_memory:
+                logger.warning(
+                    f"Worker [{os.getpid()}] uses {rss / 2**20:.0f} MiB, over its "
+                    f"{self.max_memory / 2**20:.0f} MiB ceiling. Restarting."
+                )
+                return True
+        return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API with multiple worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU quota)")
+    args = parser.parse_args()
+
+    workers = args.workers or worker_count(cpu_limit())
+    pool_size, max_overflow = pool_sizes(settings.db_connection_budget, workers)
+    # Workers are spawned fresh and read their settings from the environment
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    max_memory = worker_memory_ceiling(workers)
+
+    config = uvicorn.Config(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=event_loop(),
+        http=http_protocol(),
+        lifespan="on",
+        access_log=False,  # LoggingMiddleware logs every request
+        limit_max_requests=settings.worker_max_requests or None,
+        timeout_graceful_shutdown=settings.worker_graceful_timeout,
+    )
+    logger.info(
+        f"Starting {workers} workers (loop={config.loop}, http={config.http}, "
+        f"db pool={pool_size}+{max_overflow}, "
+        f"max requests={settings.worker_max_requests or 'unlimited'}, "
+        f"memory ceiling={f'{max_memory / 2**20:.0f} MiB' if max_memory else 'none'})"
+    )
+    server = RecyclingServer(config, settings.worker_max_requests_jitter, max_memory)
+    # Always supervised, even with one worker, so recycled workers are replaced
+    Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from datetime import datetime
+from functools import lru_cache
+from typing import Literal
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, create_model
 
 
 class ItemBase(BaseModel):
@@ -24,5 +26,74 @@ class ItemResponse(ItemBase):
     is_active: bool = Field(description="Whether the item is active")
     created_at: datetime = Field(description="Creation timestamp")
     updated_at: datetime = Field(description="Last update timestamp")
+    version: int = Field(description="Update counter; send as If-Match to update this version")
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ItemSearchResult(ItemResponse):
+    rank: float = Field(description="Relevance score, higher is better")
+
+
+class ItemSearchPage(BaseModel):
+    items: list[ItemSearchResult] = Field(description="Results ordered by relevance")
+    next_cursor: str | None = Field(
+        default=None, description="Cursor for the next page, if more results exist"
+    )
+
+
+class ItemStatsResponse(BaseModel):
+    item_count: int = Field(default=0, description="Total items owned by the user")
+    active_count: int = Field(default=0, description="Items with is_active set")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ItemExportResponse(BaseModel):
+    export_id: str = Field(description="Export ID")
+    status: Literal["queued", "running", "completed", "failed"] = Field(
+        description="Export progress"
+    )
+    rows: int = Field(default=0, description="Items written so far")
+    created_at: datetime = Field(description="When the export was requested")
+    finished_at: datetime | None = Field(default=None, description="When the export finished")
+    error: str | None = Field(default=None, description="Why the export failed")
+
+
+class ItemImportError(BaseModel):
+    line: int = Field(description="Line of the upload where the rejected row starts")
+    error: str = Field(description="Why the row was rejected")
+
+
+class ItemImportResponse(BaseModel):
+    import_id: str = Field(description="Import ID")
+    status: Literal["queued", "running", "completed", "failed"] = Field(
+        description="Import progress"
+    )
+    rows: int = Field(default=0, description="Rows read from the upload")
+    inserted: int = Field(default=0, description="Items created")
+    updated: int = Field(default=0, description="Existing items updated by id")
+    failed: int = Field(default=0, description="Rows rejected")
+    errors: list[ItemImportError] = Field(
+        default_factory=list, description="Rejected rows (first 1000)"
+    )
+
+
+# Fields that may be requested through ``?fields=``, in response order.
+ITEM_FIELDS: tuple[str, ...] = tuple(ItemResponse.model_fields)
+
+
+@lru_cache(maxsize=128)
+def partial_item_response(fields: tuple[str, ...]) -> type[BaseModel]:
+    """Build a response model exposing only ``fields`` of ``ItemResponse``."""
+    definitions: dict[str, tuple[object, object]] = {
+        name: (ItemResponse.model_fields[name].annotation, ItemResponse.model_fields[name])
+        for name in fields
+    }
+    return create_model("PartialItemResponse", **definitions)  # type: ignore[call-overload]
+
+
+@lru_cache(maxsize=128)
+def partial_item_list_adapter(fields: tuple[str, ...]) -> TypeAdapter:
+    """Return a cached adapter serializing lists of partial items."""
+    return TypeAdapter(list[partial_item_response(fields)])  # type: ignore[misc]
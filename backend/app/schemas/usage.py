@@ -0,0 +1,9 @@
+from datetime import date
+
+from pydantic import BaseModel, Field
+
+
+class UsageResponse(BaseModel):
+    period_start: date = Field(description="First UTC day of the current billing period")
+    period_end: date = Field(description="First UTC day after the current billing period")
+    calls: int = Field(description="Authenticated API calls made in the period so far")
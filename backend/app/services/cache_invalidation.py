@@ -0,0 +1,45 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.core.job_queue import Job, enqueue_after_commit, job
+from app.core.response_cache import cached_response_keys
+
+UNLINK_BATCH_SIZE = 500
+SCAN_COUNT = 1000
+
+
+def invalidate_after_commit(
+    db: AsyncSession, keys: list[str] | None = None, prefixes: list[str] | None = None
+) -> Job:
+    """Drop cached keys, and every key under ``prefixes``, once ``db`` commits."""
+    return enqueue_after_commit(
+        db, "cache.invalidate", keys=list(keys or ()), prefixes=list(prefixes or ())
+    )
+
+
+def item_stats_cache_key(owner_id: str) -> str:
+    """Key of the owner's cached ``GET /items/stats`` response."""
+    return f"items:{owner_id}:stats"
+
+
+def invalidate_items_after_commit(db: AsyncSession, owner_id: str) -> Job:
+    """Drop the owner's cached item responses once a write to their items commits."""
+    return invalidate_after_commit(db, keys=cached_response_keys(item_stats_cache_key(owner_id)))
+
+
+@job("cache.invalidate")
+async def invalidate_cache(keys: list[str], prefixes: list[str]) -> None:
+    """Unlink explicit keys and scan out prefixed keys in bounded batches."""
+    redis = await get_redis()
+    for start in range(0, len(keys), UNLINK_BATCH_SIZE):
+        await redis.unlink(*keys[start : start + UNLINK_BATCH_SIZE])
+
+    for prefix in prefixes:
+        batch: list[str] = []
+        async for key in redis.scan_iter(match=f"{prefix}*", count=SCAN_COUNT):
+            batch.append(key)
+            if len(batch) >= UNLINK_BATCH_SIZE:
+                await redis.unlink(*batch)
+                batch.clear()
+        if batch:
+            await redis.unlink(*batch)
@@ -1,23 +1,134 @@
 import hashlib
+import time
+from collections.abc import Iterable
 
 from redis.asyncio import Redis
 
+from app.core.config import settings
+
+# Failed lookups before a token is treated as known-bad. A single failure is not
+# cached, so a session used before its row is visible is not locked out.
+REJECT_AFTER = 2
+
+# Token hash digits naming the bucket of the "buckets" layout. 65,536 buckets stay
+# under the 128 fields of a listpack-encoded hash up to about 8 million sessions.
+BUCKET_PREFIX_LENGTH = 4
+BUCKET_PREFIX = "sessions:"
+
+# Stores "<expires at>:<user id>" in the token's bucket. With per-field TTLs
+# (Redis 7.4+) the field expires by itself; otherwise expired fields are dropped
+# whenever the bucket is written, and the bucket expires with its last field.
+SET_BUCKET_FIELD_SCRIPT = """
+local expires_at = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+local set = redis.pcall('HEXPIREAT', KEYS[1], expires_at, 'FIELDS', 1, ARGV[1])
+if type(set) == 'table' and not set.err then
+    redis.call('PERSIST', KEYS[1])
+    return 1
+end
+local latest = expires_at
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+    local field_expires_at = tonumber(string.match(entries[i + 1], '^(%d+):'))
+    if field_expires_at <= now then
+        redis.call('HDEL', KEYS[1], entries[i])
+    elseif field_expires_at > latest then
+        latest = field_expires_at
+    end
+end
+redis.call('EXPIREAT', KEYS[1], latest)
+return 0
+"""
+
 
 class SessionCache:
-    def __init__(self, redis: Redis) -> None:
+    """Maps session tokens to user IDs in Redis, keyed by a hash of the token.
+
+    ``SESSION_CACHE_LAYOUT=keys`` stores one ``session:<hash>`` key per token.
+    ``buckets`` groups tokens into small hashes by hash prefix, which Redis keeps
+    listpack-encoded at a fraction of the per-key overhead. With ``dual_read``
+    the buckets layout falls back to ``session:<hash>`` keys and moves the ones
+    it finds into their bucket, for switching layouts without a cold cache.
+    """
+
+    def __init__(
+        self, redis: Redis, layout: str | None = None, dual_read: bool | None = None
+    ) -> None:
         self.redis = redis
+        self.layout = layout or settings.session_cache_layout
+        self.dual_read = settings.session_cache_dual_read if dual_read is None else dual_read
 
     async def get_user_id(self, token: str) -> str | None:
-        key = f"session:{self._hash(token)}"
-        return await self.redis.get(key)
+        token_hash = self._hash(token)
+        if self.layout != "buckets":
+            return await self.redis.get(f"session:{token_hash}")
+
+        bucket, field = self._bucket(token_hash)
+        value = await self.redis.hget(bucket, field)
+        if value is not None:
+            expires_at, _, user_id = value.partition(":")
+            return user_id if int(expires_at) > time.time() else None
+        if self.dual_read:
+            return await self._migrate(token_hash)
+        return None
 
     async def set_user_id(self, token: str, user_id: str, ttl: int = 300) -> None:
-        key = f"session:{self._hash(token)}"
-        await self.redis.setex(key, ttl, user_id)
+        token_hash = self._hash(token)
+        if self.layout != "buckets":
+            await self.redis.setex(f"session:{token_hash}", ttl, user_id)
+            return
+        await self._set_field(token_hash, user_id, int(time.time()) + ttl)
 
     async def delete(self, token: str) -> None:
-        key = f"session:{self._hash(token)}"
+        await self.delete_many([token])
+
+    async def delete_many(self, tokens: Iterable[str]) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for token in tokens:
+                token_hash = self._hash(token)
+                if self.layout != "buckets" or self.dual_read:
+                    pipe.delete(f"session:{token_hash}")
+                if self.layout == "buckets":
+                    pipe.hdel(*self._bucket(token_hash))
+            await pipe.execute()
+
+    async def is_rejected(self, token: str) -> bool:
+        strikes = await self.redis.get(f"session:invalid:{self._hash(token)}")
+        return strikes is not None and int(strikes) >= REJECT_AFTER
+
+    async def reject(self, token: str, ttl: int = 60) -> bool:
+        """Record a failed lookup; returns True once the token counts as known-bad."""
+        key = f"session:invalid:{self._hash(token)}"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            # The TTL runs from the first failure and is not extended by later ones
+            pipe.set(key, 0, ex=ttl, nx=True)
+            pipe.incr(key)
+            _, strikes = await pipe.execute()
+        return strikes >= REJECT_AFTER
+
+    async def _set_field(self, token_hash: str, user_id: str, expires_at: int) -> None:
+        bucket, field = self._bucket(token_hash)
+        set_field = self.redis.register_script(SET_BUCKET_FIELD_SCRIPT)
+        await set_field(
+            keys=[bucket], args=[field, f"{expires_at}:{user_id}", expires_at, int(time.time())]
+        )
+
+    async def _migrate(self, token_hash: str) -> str | None:
+        """Move a ``session:<hash>`` key of the keys layout into its bucket."""
+        key = f"session:{token_hash}"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.ttl(key)
+            user_id, ttl = await pipe.execute()
+        if user_id is None or ttl <= 0:
+            return user_id
+        await self._set_field(token_hash, user_id, int(time.time()) + ttl)
         await self.redis.delete(key)
+        return user_id
+
+    def _bucket(self, token_hash: str) -> tuple[str, str]:
+        return BUCKET_PREFIX + token_hash[:BUCKET_PREFIX_LENGTH], token_hash[BUCKET_PREFIX_LENGTH:]
 
     def _hash(self, token: str) -> str:
         return hashlib.sha256(token.encode()).hexdigest()[:16]
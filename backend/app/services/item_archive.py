@@ -0,0 +1,217 @@
+"""Item Archive.
+
+Items inactive for longer than ``ITEM_ARCHIVE_AFTER_DAYS`` are moved from the
+hot ``items`` table to ``items_archive``, keeping ``items`` and its indexes to
+the rows owners actually work with. The worker runs ``archive_items`` every
+``ITEM_ARCHIVE_INTERVAL`` seconds:
+
+- each batch is one ``DELETE ... RETURNING`` feeding an ``INSERT``, so a row is
+  never in both tables or in neither
+- candidates are locked with ``SKIP LOCKED``: rows being written are left for
+  the next run, and several workers can archive at once
+- between batches it waits until standbys have replayed to within
+  ``ITEM_ARCHIVE_MAX_REPLICATION_LAG`` seconds
+- with sharding, every shard archives its own items, except owners being moved
+
+Archived items leave the item counters and emit ``deleted`` events; a restore
+puts them back (``created``). Lists and reads include them on request.
+"""
+
+import asyncio
+from collections.abc import Callable, Collection
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    DateTime,
+    Select,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.sql.dml import Insert
+
+from app.core.config import settings
+from app.core.error_handlers import AppException
+from app.core.logging_config import logger
+from app.core.metrics import registry
+from app.db.models.item import Item
+from app.db.models.item_archive import ItemArchive
+from app.db.shards import ShardRouter, shard_router
+
+# Columns carried between ``items`` and ``items_archive``
+ARCHIVED_COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "owner_id",
+    "is_active",
+    "created_at",
+    "updated_at",
+    "version",
+)
+
+# Longest single wait for standbys before checking their lag again
+MAX_LAG_WAIT = 5.0
+
+REPLICATION_LAG = text(
+    "SELECT coalesce(max(extract(epoch FROM replay_lag)), 0) FROM pg_stat_replication"
+)
+
+items_archived = registry.counter("items_archived_total", "Items moved to items_archive")
+items_restored = registry.counter("items_restored_total", "Items restored from items_archive")
+item_archive_throttled_seconds = registry.counter(
+    "item_archive_throttled_seconds_total", "Time item archival waited for standbys to catch up"
+)
+
+
+class RestoreConflictError(AppException):
+    """An item with the archived item's id was created after it was archived."""
+
+    def __init__(self, item_id: str) -> None:
+        super().__init__(f"An item with id {item_id!r} already exists", status_code=409)
+
+
+def archive_batch(cutoff: datetime, batch_size: int, excluded: Collection[str] = ()) -> Insert:
+    """Move up to ``batch_size`` items inactive since before ``cutoff`` to the archive."""
+    candidates = (
+        select(Item.owner_id, Item.id)
+        .where(~Item.is_active, Item.updated_at < cutoff)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    if excluded:
+        candidates = candidates.where(Item.owner_id.not_in(list(excluded)))
+    moved = (
+        delete(Item)
+        .where(tuple_(Item.owner_id, Item.id).in_(candidates))
+        .returning(*(getattr(Item, name) for name in ARCHIVED_COLUMNS))
+        .cte("moved")
+    )
+    return insert(ItemArchive).from_select(
+        ARCHIVED_COLUMNS, select(*(moved.c[name] for name in ARCHIVED_COLUMNS))
+    )
+
+
+async def replication_lag(engine: AsyncEngine) -> float:
+    """Seconds the slowest standby is behind in replaying; 0 without standbys."""
+    async with engine.connect() as conn:
+        return float(await conn.scalar(REPLICATION_LAG))
+
+
+async def _wait_for_standbys(engine: AsyncEngine, max_lag: float, pause: float) -> None:
+    await asyncio.sleep(pause)
+    while (lag := await replication_lag(engine)) > max_lag:
+        wait = min(lag, MAX_LAG_WAIT)
+        item_archive_throttled_seconds.inc(wait)
+        await asyncio.sleep(wait)
+
+
+async def archive_inactive_items(
+    engine: AsyncEngine,
+    older_than: timedelta,
+    batch_size: int = 500,
+    max_lag: float = 1.0,
+    pause: float = 0.1,
+    excluded: Callable[[], Collection[str]] = frozenset,
+) -> int:
+    """Archive one database's items inactive for ``older_than``; returns how many moved.
+
+    ``excluded`` is asked before each batch for owners whose items must stay put.
+    """
+    cutoff = datetime.utcnow() - older_than
+    archived = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(archive_batch(cutoff, batch_size, excluded()))
+        archived += result.rowcount
+        items_archived.inc(result.rowcount)
+        if result.rowcount < batch_size:
+            return archived
+        await _wait_for_standbys(engine, max_lag, pause)
+
+
+async def archive_items(router: ShardRouter = shard_router) -> int:
+    """Archive inactive items on the primary, or on every shard; returns how many moved."""
+    if settings.item_archive_after_days <= 0:
+        return 0
+    if router.enabled and not router.fresh:
+        # Owners being moved are unknown: archiving could race the move
+        logger.warning("Skipping item archival: item shard routes are stale")
+        return 0
+
+    engines = [router.shard_engine(shard) for shard in router.urls] if router.enabled else []
+    archived = 0
+    for engine in engines or [router.primary]:
+        archived += await archive_inactive_items(
+            engine,
+            timedelta(days=settings.item_archive_after_days),
+            settings.item_archive_batch_size,
+            settings.item_archive_max_replication_lag,
+            settings.item_archive_batch_pause,
+            excluded=lambda: router.moving,
+        )
+    if archived:
+        logger.info(f"Archived {archived} inactive items")
+    return archived
+
+
+def select_items(owner_id: str, fields: tuple[str, ...], include_archived: bool) -> Select:
+    """The owner's items as ``fields`` columns by id, followed by their archived items if asked."""
+    items = select(*(getattr(Item, field) for field in fields)).where(Item.owner_id == owner_id)
+    if not include_archived:
+        return items.order_by(Item.id)
+    # The id and an archived flag ride along for ordering, whatever the fields
+    items = items.add_columns(Item.id.label("sort_id"), literal(False).label("archived"))
+    archived = select(
+        *(getattr(ItemArchive, field) for field in fields),
+        ItemArchive.id.label("sort_id"),
+        literal(True).label("archived"),
+    ).where(ItemArchive.owner_id == owner_id)
+    union = union_all(items, archived).subquery()
+    return select(*(union.c[field] for field in fields)).order_by(union.c.archived, union.c.sort_id)
+
+
+async def count_archived_items(db: AsyncSession, owner_id: str) -> int:
+    count = await db.scalar(
+        select(func.count()).select_from(ItemArchive).where(ItemArchive.owner_id == owner_id)
+    )
+    return count or 0
+
+
+async def restore_item(db: AsyncSession, owner_id: str, item_id: str) -> Item | None:
+    """Move an archived item back to ``items`` as a new version; None if not archived.
+
+    Raises ``RestoreConflictError``, leaving the item archived, when ``items``
+    already has its id, e.g. from an import since it was archived.
+    """
+    restored = (
+        delete(ItemArchive)
+        .where(ItemArchive.owner_id == owner_id, ItemArchive.id == item_id)
+        .returning(*(getattr(ItemArchive, name) for name in ARCHIVED_COLUMNS))
+        .cte("restored")
+    )
+    # A fresh updated_at keeps it from being archived again on the next run
+    values = {name: restored.c[name] for name in ARCHIVED_COLUMNS}
+    values["updated_at"] = literal(datetime.utcnow(), DateTime)
+    values["version"] = restored.c.version + 1
+    try:
+        # The savepoint also rolls back the archive delete when the insert conflicts
+        async with db.begin_nested():
+            item = await db.scalar(
+                insert(Item)
+                .from_select(ARCHIVED_COLUMNS, select(*values.values()))
+                .returning(Item)
+                .execution_options(populate_existing=True)
+            )
+    except IntegrityError as exc:
+        raise RestoreConflictError(item_id) from exc
+    if item is not None:
+        items_restored.inc()
+    return item
@@ -0,0 +1,247 @@
+"""Item change feed.
+
+Item triggers ``NOTIFY`` on commit; each process holds one ``LISTEN`` connection
+per item database (the primary, or every shard) and fans events out to in-memory,
+per-owner subscriber queues. A ring buffer of recent events lets reconnecting
+clients resume from ``Last-Event-ID``.
+"""
+
+import asyncio
+import contextlib
+import json
+from collections import deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.error_handlers import AppException
+from app.core.logging_config import logger
+from app.core.metrics import registry
+from app.db.models.item_event import ITEM_EVENTS_CHANNEL
+from app.db.shards import item_database_urls
+
+RECONNECT_DELAY = 1.0
+RECONNECT_DELAY_MAX = 30.0
+CONNECT_TIMEOUT = 5.0
+
+item_event_subscribers = registry.gauge(
+    "item_event_subscribers", "Open item event streams in this process"
+)
+item_events_dropped = registry.counter(
+    "item_events_dropped_total", "Item event streams closed because the client fell behind"
+)
+
+
+@dataclass(frozen=True)
+class ItemEvent:
+    seq: int
+    owner_id: str
+    data: dict[str, Any]
+
+
+@dataclass(eq=False)
+class Subscriber:
+    owner_id: str
+    queue: asyncio.Queue[ItemEvent | None]
+    # Set when events had to be dropped; the stream tells the client to refetch
+    lagging: bool = False
+    missed: list[ItemEvent] = field(default_factory=list)
+
+
+class ItemEventBroker:
+    """Shares ``LISTEN`` connections between every item event stream of a process.
+
+    Each database numbers its events with its own sequence, so with several item
+    databases an event is identified by its owner and ``seq`` together.
+    """
+
+    def __init__(self, *database_urls: str, buffer_size: int = 1000, queue_size: int = 100) -> None:
+        self.dsns = [
+            make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+            for url in database_urls
+        ]
+        self.queue_size = queue_size
+        self.buffer: deque[ItemEvent] = deque(maxlen=buffer_size)
+        self.subscribers: dict[str, set[Subscriber]] = {}
+        self._connections: dict[str, asyncpg.Connection] = {}
+        self._runners: list[asyncio.Task[None]] = []
+        # Set while every database is being listened to
+        self._connected = asyncio.Event()
+        self._closed = asyncio.Event()
+
+    async def start(self, timeout: float = CONNECT_TIMEOUT) -> None:
+        """Start listening in the background and wait until every connection is up."""
+        if not self._runners:
+            self._closed.clear()
+            self._runners = [asyncio.create_task(self._listen_forever(dsn)) for dsn in self.dsns]
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except TimeoutError:
+            raise AppException("Item events are temporarily unavailable", status_code=503) from None
+
+    async def close(self) -> None:
+        self._closed.set()
+        for runner in self._runners:
+            runner.cancel()
+        for runner in self._runners:
+            with contextlib.suppress(asyncio.CancelledError):
+                await runner
+        self._runners = []
+        self._connected.clear()
+        for subscribers in self.subscribers.values():
+            for subscriber in subscribers:
+                self._offer(subscriber, None)
+
+    def subscribe(self, owner_id: str, last_event_id: str | None = None) -> Subscriber:
+        """Register a stream, queueing buffered events after ``last_event_id``.
+
+        If the event is no longer buffered the subscriber starts out lagging, so
+        the client is told to refetch instead of silently missing changes.
+        """
+        subscriber = Subscriber(owner_id, asyncio.Queue(self.queue_size))
+        if last_event_id is not None:
+            replay = self._events_after(owner_id, last_event_id)
+            if replay is None:
+                subscriber.lagging = True
+            else:
+                subscriber.missed = replay
+        self.subscribers.setdefault(owner_id, set()).add(subscriber)
+        item_event_subscribers.set(self._subscriber_count())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self.subscribers.get(subscriber.owner_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[subscriber.owner_id]
+        item_event_subscribers.set(self._subscriber_count())
+
+    def publish(self, payload: str) -> None:
+        """Buffer a notification payload and fan it out to the owner's streams."""
+        try:
+            data = json.loads(payload)
+            event = ItemEvent(int(data.pop("seq")), data.pop("owner_id"), data)
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed item event", extra={"error": payload[:200]})
+            return
+        self.buffer.append(event)
+        for subscriber in self.subscribers.get(event.owner_id, ()):
+            self._offer(subscriber, event)
+
+    def _offer(self, subscriber: Subscriber, event: ItemEvent | None) -> None:
+        if subscriber.lagging:
+            return
+        try:
+            subscriber.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Never block the listener on a slow client: drop its backlog instead
+            subscriber.lagging = True
+            item_events_dropped.inc()
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+
+    def _events_after(self, owner_id: str, last_event_id: str) -> list[ItemEvent] | None:
+        try:
+            last_seq = int(last_event_id)
+        except ValueError:
+            return None
+        # Replay in arrival (commit) order, which can differ from sequence order
+        for index, event in enumerate(self.buffer):
+            if event.seq == last_seq and event.owner_id == owner_id:
+                return [
+                    later for later in list(self.buffer)[index + 1 :] if later.owner_id == owner_id
+                ]
+        return None
+
+    def _subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self.subscribers.values())
+
+    async def _listen_forever(self, dsn: str) -> None:
+        delay = RECONNECT_DELAY
+        while not self._closed.is_set():
+            lost = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(dsn, timeout=CONNECT_TIMEOUT)
+                self._connections[dsn] = connection
+                connection.add_termination_listener(lambda _connection, lost=lost: lost.set())
+                await connection.add_listener(ITEM_EVENTS_CHANNEL, self._on_notify)
+                if len(self._connections) == len(self.dsns):
+                    self._connected.set()
+                delay = RECONNECT_DELAY
+                await lost.wait()
+            except (OSError, TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                logger.error("Item event listener connection failed", extra={"error": str(exc)})
+            finally:
+                connection = self._connections.pop(dsn, None)
+                if connection is not None:
+                    with contextlib.suppress(Exception):
+                        await asyncio.shield(connection.close(timeout=5))
+
+            # Notifications sent while disconnected are lost: every stream must resync
+            self._connected.clear()
+            for subscribers in self.subscribers.values():
+                for subscriber in subscribers:
+                    self._offer_lag(subscriber)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    def _on_notify(self, _connection: object, _pid: int, _channel: str, payload: str) -> None:
+        self.publish(payload)
+
+    def _offer_lag(self, subscriber: Subscriber) -> None:
+        if not subscriber.lagging:
+            subscriber.lagging = True
+            with contextlib.suppress(asyncio.QueueFull):
+                subscriber.queue.put_nowait(None)
+
+
+def format_event(event: ItemEvent) -> str:
+    return f"id: {event.seq}\nevent: item\ndata: {json.dumps(event.data)}\n\n"
+
+
+RESYNC_EVENT = 'event: resync\ndata: {"reason": "events were missed, refetch items"}\n\n'
+
+
+async def stream_events(
+    broker: ItemEventBroker, subscriber: Subscriber, heartbeat: float
+) -> AsyncIterator[str]:
+    """Render a subscriber's events as SSE, with comment heartbeats while idle."""
+    try:
+        yield f"retry: {int(RECONNECT_DELAY * 1000)}\n\n"
+        for event in subscriber.missed:
+            yield format_event(event)
+        subscriber.missed = []
+        while True:
+            if subscriber.lagging:
+                yield RESYNC_EVENT
+                return
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                if subscriber.lagging:
+                    continue
+                return
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscriber)
+
+
+broker = ItemEventBroker(
+    *item_database_urls(),
+    buffer_size=settings.item_events_buffer_size,
+    queue_size=settings.item_events_queue_size,
+)
+
+
+async def get_item_event_broker() -> ItemEventBroker:
+    await broker.start()
+    return broker
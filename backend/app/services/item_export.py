@@ -0,0 +1,132 @@
+import uuid
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+
+from app.core.cache import get_binary_redis, get_redis
+from app.core.config import settings
+from app.core.job_queue import Job, JobQueue, job
+from app.db.models.item import Item
+from app.db.shards import shard_router
+from app.schemas.item import ItemResponse
+
+EXPORT_TTL = 3600
+EXPORT_BATCH_SIZE = 1000
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+def _status_key(export_id: str) -> str:
+    return f"exports:{export_id}"
+
+
+def _data_key(export_id: str) -> str:
+    return f"exports:{export_id}:data"
+
+
+async def create_export(redis: Redis, owner_id: str) -> dict[str, str]:
+    """Record a queued export for ``owner_id`` and enqueue the job that builds it."""
+    export_id = uuid.uuid4().hex
+    status = {
+        "export_id": export_id,
+        "owner_id": owner_id,
+        "status": "queued",
+        "rows": "0",
+        "created_at": _now(),
+    }
+    await _set_status(redis, export_id, **status)
+    await JobQueue(redis).enqueue(
+        Job(name="items.export", kwargs={"export_id": export_id, "owner_id": owner_id})
+    )
+    return status
+
+
+async def get_export(redis: Redis, export_id: str, owner_id: str) -> dict[str, str] | None:
+    """Return the export's status, or None if it expired or belongs to someone else."""
+    status = await redis.hgetall(_status_key(export_id))
+    if not status or status.get("owner_id") != owner_id:
+        return None
+    return status
+
+
+async def read_export(export_id: str) -> AsyncIterator[bytes]:
+    """Stream a finished export's NDJSON body from Redis, one stored batch at a time."""
+    redis = await get_binary_redis()
+    key = _data_key(export_id)
+    index = 0
+    while (chunk := await redis.lindex(key, index)) is not None:
+        yield chunk
+        index += 1
+
+
+async def _set_status(redis: Redis, export_id: str, /, **fields: str) -> None:
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(_status_key(export_id), mapping=fields)
+        pipe.expire(_status_key(export_id), EXPORT_TTL)
+        await pipe.execute()
+
+
+async def _mark_export_failed(export_id: str, owner_id: str) -> None:
+    await _set_status(await get_redis(), export_id, status="failed", finished_at=_now())
+
+
+@job("items.export", on_dead=_mark_export_failed)
+async def export_items(export_id: str, owner_id: str) -> None:
+    """Write every item of ``owner_id`` as NDJSON, one keyset batch at a time.
+
+    Each batch is a separate element of a Redis list, so no single value grows with
+    the export; past ``EXPORT_MAX_SIZE`` bytes in total the export fails.
+    """
+    redis = await get_redis()
+    data_key = _data_key(export_id)
+    await redis.delete(data_key)
+    await _set_status(redis, export_id, status="running")
+
+    rows = 0
+    size = 0
+    after = ""
+    shard_router.check(owner_id, write=False)
+    async with shard_router.session(owner_id) as db:
+        while True:
+            result = await db.execute(
+                select(Item)
+                .where(Item.owner_id == owner_id, Item.id > after)
+                .order_by(Item.id)
+                .limit(EXPORT_BATCH_SIZE)
+            )
+            batch = result.scalars().all()
+            if not batch:
+                break
+            lines = [ItemResponse.model_validate(item).model_dump_json() for item in batch]
+            chunk = "\n".join(lines) + "\n"
+            size += len(chunk.encode())
+            if size > settings.export_max_size:
+                await redis.delete(data_key)
+                await _set_status(
+                    redis,
+                    export_id,
+                    status="failed",
+                    error=f"Export exceeds {settings.export_max_size} bytes",
+                    finished_at=_now(),
+                )
+                return
+            async with redis.pipeline(transaction=False) as pipe:
+                # Expires with the status even if the worker dies mid-export
+                pipe.rpush(data_key, chunk)
+                pipe.expire(data_key, EXPORT_TTL)
+                await pipe.execute()
+            rows += len(batch)
+            after = batch[-1].id
+            db.expunge_all()
+
+    await _set_status(
+        redis,
+        export_id,
+        status="completed",
+        rows=str(rows),
+        finished_at=_now(),
+    )
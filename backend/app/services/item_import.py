@@ -0,0 +1,364 @@
+import codecs
+import csv
+import io
+import json
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.core.error_handlers import AppException
+from app.core.job_queue import enqueue_after_commit, job
+from app.db.models.item_import import ItemImportRow
+from app.db.shards import shard_router
+from app.services.cache_invalidation import invalidate_items_after_commit
+
+IMPORT_TTL = 24 * 3600
+STAGE_BATCH_SIZE = 5000
+MAX_RECORD_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+IMPORT_FIELDS = ("id", "name", "description", "is_active")
+STAGE_COLUMNS = ("import_id", "line", "id", "name", "description", "is_active", "error")
+
+
+class InvalidUploadError(AppException):
+    """The upload cannot be parsed at all (as opposed to individual bad rows)."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message, status_code=422)
+
+
+class ParsedRow(NamedTuple):
+    line: int
+    id: str | None = None
+    name: str | None = None
+    description: str | None = None
+    is_active: str | None = None
+    error: str | None = None
+
+
+@dataclass
+class ImportSummary:
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list[dict[str, int | str]] = field(default_factory=list)
+
+
+async def limit_size(chunks: AsyncIterator[bytes], max_size: int) -> AsyncIterator[bytes]:
+    """Pass chunks through, failing once more than ``max_size`` bytes have been read."""
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_size:
+            raise AppException("Upload too large", status_code=413)
+        yield chunk
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """Decode a UTF-8 byte stream incrementally into numbered lines."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    number = 0
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                number += 1
+                yield number, line.removesuffix("\r")
+            if len(pending) > MAX_RECORD_SIZE:
+                raise InvalidUploadError(f"Line {number + 1} exceeds {MAX_RECORD_SIZE} bytes")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as exc:
+        raise InvalidUploadError(f"Upload is not valid UTF-8 after line {number}") from exc
+    if pending:
+        yield number + 1, pending.removesuffix("\r")
+
+
+async def parse_csv(lines: AsyncIterator[tuple[int, str]]) -> AsyncIterator[ParsedRow]:
+    """Parse CSV with a header row; quoted fields may span lines."""
+    header: list[str] | None = None
+    record: list[str] = []
+    start = 0
+    async for number, line in lines:
+        if not record:
+            start = number
+        record.append(line)
+        # A record is complete once its quotes are balanced (RFC 4180 escapes as "")
+        if sum(part.count('"') for part in record) % 2:
+            if sum(len(part) for part in record) > MAX_RECORD_SIZE:
+                raise InvalidUploadError(f"Record at line {start} exceeds {MAX_RECORD_SIZE} bytes")
+            continue
+
+        raw, record = "\n".join(record), []
+        if not raw.strip():
+            continue
+        try:
+            values = next(csv.reader(io.StringIO(raw)))
+        except csv.Error as exc:
+            yield ParsedRow(start, error=f"Malformed CSV: {exc}")
+            continue
+
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            if "name" not in header:
+                raise InvalidUploadError("CSV header must include a name column")
+            continue
+        if len(values) != len(header):
+            yield ParsedRow(start, error=f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        row = dict(zip(header, values, strict=True))
+        yield ParsedRow(start, *(row.get(name) or None for name in IMPORT_FIELDS))
+
+    if record:
+        yield ParsedRow(start, error="Unterminated quoted field")
+
+
+async def parse_ndjson(lines: AsyncIterator[tuple[int, str]]) -> AsyncIterator[ParsedRow]:
+    """Parse one JSON object per line."""
+    async for number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield ParsedRow(number, error=f"Malformed JSON: {exc}")
+            continue
+        if not isinstance(data, dict):
+            yield ParsedRow(number, error="Expected a JSON object")
+            continue
+        values = []
+        for name in IMPORT_FIELDS:
+            value = data.get(name)
+            if isinstance(value, bool):
+                value = "true" if value else "false"
+            elif value is not None and not isinstance(value, str):
+                value = json.dumps(value)
+            values.append(value)
+        yield ParsedRow(number, *values)
+
+
+async def stage_import(db: AsyncSession, import_id: str, rows: AsyncIterator[ParsedRow]) -> int:
+    """COPY parsed rows into the staging table in fixed-size batches; returns the row count."""
+    connection = await db.connection()
+    # asyncpg opens the transaction lazily; issue a statement before using the raw driver
+    await connection.execute(
+        text("DELETE FROM item_import_rows WHERE import_id = :import_id"), {"import_id": import_id}
+    )
+    driver = (await connection.get_raw_connection()).driver_connection
+
+    staged = 0
+    batch: list[tuple[str | int | None, ...]] = []
+    async for row in rows:
+        batch.append((import_id, *row))
+        if len(batch) >= STAGE_BATCH_SIZE:
+            await driver.copy_records_to_table(
+                ItemImportRow.__tablename__, records=batch, columns=STAGE_COLUMNS
+            )
+            staged += len(batch)
+            batch = []
+    if batch:
+        await driver.copy_records_to_table(
+            ItemImportRow.__tablename__, records=batch, columns=STAGE_COLUMNS
+        )
+        staged += len(batch)
+    return staged
+
+
+VALIDATE_ROWS = text(
+    """
+    UPDATE item_import_rows AS staged SET error = CASE
+        WHEN staged.name IS NULL OR btrim(staged.name) = '' THEN 'name is required'
+        WHEN char_length(btrim(staged.name)) > 255 THEN 'name exceeds 255 characters'
+        WHEN staged.is_active IS NOT NULL AND lower(btrim(staged.is_active))
+            NOT IN ('', 'true', 'false', 't', 'f', '1', '0', 'yes', 'no')
+            THEN 'is_active must be a boolean'
+        WHEN EXISTS (
+            SELECT 1 FROM items
+            WHERE items.id = btrim(staged.id) AND items.owner_id <> :owner_id
+        ) THEN 'id is not available'
+        WHEN EXISTS (
+            SELECT 1 FROM items_archive
+            WHERE items_archive.id = btrim(staged.id) AND items_archive.owner_id <> :owner_id
+        ) THEN 'id is not available'
+        WHEN EXISTS (
+            SELECT 1 FROM items_archive
+            WHERE items_archive.id = btrim(staged.id) AND items_archive.owner_id = :owner_id
+        ) THEN 'id belongs to an archived item; restore it instead'
+    END
+    WHERE staged.import_id = :import_id AND staged.error IS NULL
+    """
+)
+
+# Only the first occurrence of an id is merged; ON CONFLICT cannot touch a row twice
+REJECT_DUPLICATE_IDS = text(
+    """
+    UPDATE item_import_rows AS staged SET error = 'duplicate id in upload'
+    FROM (
+        SELECT line, row_number() OVER (PARTITION BY btrim(id) ORDER BY line) AS occurrence
+        FROM item_import_rows
+        WHERE import_id = :import_id AND error IS NULL AND nullif(btrim(id), '') IS NOT NULL
+    ) AS ranked
+    WHERE staged.import_id = :import_id AND staged.line = ranked.line AND ranked.occurrence > 1
+    """
+)
+
+MERGE_ROWS = text(
+    """
+    WITH merged AS (
+        INSERT INTO items (id, name, description, owner_id, is_active, created_at, updated_at)
+        SELECT
+            coalesce(nullif(btrim(id), ''), gen_random_uuid()::text),
+            btrim(name),
+            nullif(description, ''),
+            :owner_id,
+            coalesce(CAST(nullif(lower(btrim(is_active)), '') AS boolean), true),
+            timezone('utc', now()),
+            timezone('utc', now())
+        FROM item_import_rows
+        WHERE import_id = :import_id AND error IS NULL
+        ON CONFLICT (owner_id, id) DO UPDATE SET
+            name = EXCLUDED.name,
+            description = EXCLUDED.description,
+            is_active = EXCLUDED.is_active,
+            updated_at = EXCLUDED.updated_at,
+            version = items.version + 1
+        -- Inserted rows start at version 1, updates bump it (xmax is unavailable on partitions)
+        RETURNING version = 1 AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+    """
+)
+
+ROW_ERRORS = text(
+    """
+    SELECT line, error, count(*) OVER () AS failed
+    FROM item_import_rows
+    WHERE import_id = :import_id AND error IS NOT NULL
+    ORDER BY line
+    LIMIT :limit
+    """
+)
+
+
+async def merge_import(db: AsyncSession, import_id: str, owner_id: str) -> ImportSummary:
+    """Validate staged rows and upsert the valid ones into the owner's items.
+
+    Runs in the caller's transaction and removes the staged rows; ids owned by
+    another user are rejected, never overwritten.
+    """
+    params = {"import_id": import_id, "owner_id": owner_id}
+    rows = await db.scalar(
+        text("SELECT count(*) FROM item_import_rows WHERE import_id = :import_id"), params
+    )
+    await db.execute(VALIDATE_ROWS, params)
+    await db.execute(REJECT_DUPLICATE_IDS, params)
+    inserted, updated = (await db.execute(MERGE_ROWS, params)).one()
+    if inserted or updated:
+        invalidate_items_after_commit(db, owner_id)
+    errors = (await db.execute(ROW_ERRORS, {**params, "limit": MAX_REPORTED_ERRORS})).all()
+    await db.execute(text("DELETE FROM item_import_rows WHERE import_id = :import_id"), params)
+    return ImportSummary(
+        rows=rows or 0,
+        inserted=inserted,
+        updated=updated,
+        failed=errors[0].failed if errors else 0,
+        errors=[{"line": error.line, "error": error.error} for error in errors],
+    )
+
+
+def new_import_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _status_key(import_id: str) -> str:
+    return f"imports:{import_id}"
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+async def _set_status(redis: Redis, import_id: str, /, **fields: str) -> None:
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(_status_key(import_id), mapping=fields)
+        pipe.expire(_status_key(import_id), IMPORT_TTL)
+        await pipe.execute()
+
+
+def summary_status(import_id: str, summary: ImportSummary) -> dict[str, object]:
+    return {
+        "import_id": import_id,
+        "status": "completed",
+        "rows": summary.rows,
+        "inserted": summary.inserted,
+        "updated": summary.updated,
+        "failed": summary.failed,
+        "errors": summary.errors,
+    }
+
+
+async def queue_import(
+    db: AsyncSession, redis: Redis, import_id: str, owner_id: str, rows: int
+) -> dict[str, object]:
+    """Record a staged import and merge it in the worker once the staging commits."""
+    await _set_status(
+        redis,
+        import_id,
+        import_id=import_id,
+        owner_id=owner_id,
+        status="queued",
+        rows=str(rows),
+        created_at=_now(),
+    )
+    enqueue_after_commit(db, "items.import", import_id=import_id, owner_id=owner_id)
+    return {"import_id": import_id, "status": "queued", "rows": rows}
+
+
+async def get_import(redis: Redis, import_id: str, owner_id: str) -> dict[str, object] | None:
+    """Return a background import's status, or None if it expired or belongs to someone else."""
+    status = await redis.hgetall(_status_key(import_id))
+    if not status or status.get("owner_id") != owner_id:
+        return None
+    return {**status, "errors": json.loads(status.get("errors", "[]"))}
+
+
+async def _mark_import_failed(import_id: str, owner_id: str) -> None:
+    await _set_status(await get_redis(), import_id, status="failed", finished_at=_now())
+
+
+@job("items.import", on_dead=_mark_import_failed)
+async def merge_staged_import(import_id: str, owner_id: str) -> None:
+    """Merge a staged import; a redelivered job finds the rows gone and keeps the result."""
+    redis = await get_redis()
+    if await redis.hget(_status_key(import_id), "status") == "completed":
+        return
+    await _set_status(redis, import_id, status="running")
+
+    shard_router.check(owner_id, write=True)
+    async with shard_router.session(owner_id) as db:
+        summary = await merge_import(db, import_id, owner_id)
+        await db.commit()
+
+    await _set_status(
+        redis,
+        import_id,
+        status="completed",
+        rows=str(summary.rows),
+        inserted=str(summary.inserted),
+        updated=str(summary.updated),
+        failed=str(summary.failed),
+        errors=json.dumps(summary.errors),
+        finished_at=_now(),
+    )
@@ -0,0 +1,57 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+
+from sqlalchemy import Select, and_, func, literal_column, or_, select
+
+from app.db.models.item import SEARCH_CONFIG, Item
+
+
+@dataclass(frozen=True)
+class SearchCursor:
+    """Position after the last returned result: ranks descend, ids ascend."""
+
+    rank: float
+    item_id: str
+
+    def encode(self) -> str:
+        raw = json.dumps([self.rank, self.item_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> "SearchCursor":
+        try:
+            raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+            rank, item_id = json.loads(raw)
+            return cls(rank=float(rank), item_id=str(item_id))
+        except (binascii.Error, ValueError, TypeError) as exc:
+            raise ValueError("Malformed search cursor") from exc
+
+
+def build_item_search_query(
+    owner_id: str, query: str, limit: int, after: SearchCursor | None = None
+) -> Select:
+    """Build a ranked, owner-scoped search over item names and descriptions.
+
+    Full-text matches use the GIN index on ``search_vector``; typo-tolerant name
+    matches use the ``pg_trgm`` GIN index on ``name``. Results are ordered by
+    rank, then id, so ``after`` can resume with a keyset predicate.
+    """
+    ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query)
+    rank = func.ts_rank_cd(Item.search_vector, ts_query) + func.similarity(Item.name, query)
+
+    statement = (
+        select(Item, rank.label("rank"))
+        .where(
+            Item.owner_id == owner_id,
+            or_(Item.search_vector.bool_op("@@")(ts_query), Item.name.bool_op("%")(query)),
+        )
+        .order_by(rank.desc(), Item.id)
+        .limit(limit)
+    )
+    if after is not None:
+        statement = statement.where(
+            or_(rank < after.rank, and_(rank == after.rank, Item.id > after.item_id))
+        )
+    return statement
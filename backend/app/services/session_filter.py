@@ -0,0 +1,130 @@
+"""Rejected Session Filter.
+
+A per-process Bloom filter of session tokens that recently failed validation,
+shared between processes through a Redis sorted set (``session:rejected``,
+scored by rejection time). Processes add their own rejections immediately and
+pull everyone else's every ``SYNC_INTERVAL`` seconds.
+
+The filter only says "possibly rejected": a hit is confirmed against the
+negative cache in Redis before a request is refused, so a false positive costs
+one Redis read and never rejects a valid session.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import math
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.metrics import registry
+
+REJECTED_KEY = "session:rejected"
+SYNC_INTERVAL = 5.0
+ERROR_RATE = 0.01
+
+session_rejections = registry.counter(
+    "session_rejections_total",
+    "Requests refused for an invalid or expired session token",
+    ["source"],
+)
+session_filter_false_positives = registry.counter(
+    "session_filter_false_positives_total",
+    "Rejected-session filter hits that the negative cache did not confirm",
+)
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = ERROR_RATE) -> None:
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, digest: bytes) -> None:
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+    def _positions(self, digest: bytes) -> list[int]:
+        # Double hashing: k positions from the two halves of one digest
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+
+class RejectedSessionFilter:
+    def __init__(self, ttl: int, capacity: int) -> None:
+        self.ttl = ttl
+        self.capacity = capacity
+        self.filter = BloomFilter(capacity)
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        self._runner: asyncio.Task[None] | None = None
+
+    def might_be_rejected(self, token: str) -> bool:
+        return token_digest(token) in self.filter
+
+    async def add(self, redis: Redis, token: str) -> None:
+        digest = token_digest(token)
+        self.filter.add(digest)
+        await redis.zadd(REJECTED_KEY, {digest.hex(): time.time()})
+
+    async def sync(self, redis: Redis) -> None:
+        """Pull rejections published since the last sync.
+
+        Bloom filters can't forget, so every ``ttl`` seconds the filter is rebuilt
+        from the rejections that are still recent.
+        """
+        now = time.time()
+        if now - self._built_at >= self.ttl:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(REJECTED_KEY, "-inf", now - self.ttl)
+                pipe.zremrangebyrank(REJECTED_KEY, 0, -self.capacity - 1)
+                pipe.zrangebyscore(REJECTED_KEY, now - self.ttl, "+inf")
+                *_, members = await pipe.execute()
+            rebuilt = BloomFilter(self.capacity)
+            for member in members:
+                rebuilt.add(bytes.fromhex(member))
+            self.filter = rebuilt
+            self._built_at = now
+        else:
+            # Overlap by a second to allow for clock skew between processes
+            members = await redis.zrangebyscore(REJECTED_KEY, self._synced_at - 1, "+inf")
+            for member in members:
+                self.filter.add(bytes.fromhex(member))
+        self._synced_at = now
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._sync_forever())
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
+
+    async def _sync_forever(self) -> None:
+        while True:
+            try:
+                await self.sync(await get_redis())
+            except RedisError as exc:
+                logger.warning("Failed to sync rejected sessions", extra={"error": str(exc)})
+            await asyncio.sleep(SYNC_INTERVAL)
+
+
+session_filter = RejectedSessionFilter(
+    ttl=settings.session_negative_ttl, capacity=settings.session_filter_capacity
+)
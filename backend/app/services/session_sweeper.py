@@ -0,0 +1,110 @@
+"""Expired Session Sweeper.
+
+better-auth only deletes an expired ``session`` or ``verification`` row when it
+is used again, so abandoned rows pile up and bloat the tables and their token
+indexes. The worker runs ``sweep_expired_auth_rows`` every
+``SESSION_SWEEP_INTERVAL`` seconds:
+
+- the tables belong to better-auth and have no ``expires_at`` index, so each
+  table is walked in primary key order, ``SESSION_SWEEP_BATCH_SIZE`` ids per
+  transaction, deleting the expired rows of that window
+- rows are locked with ``SKIP LOCKED``: rows being written are left for the
+  next run, and several workers can sweep at once
+- deleted sessions are evicted from the Redis session cache
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import UTC, datetime
+
+from redis.asyncio import Redis
+from sqlalchemy import Delete, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.metrics import registry
+from app.db.models.auth import Session, Verification
+from app.services.cache_service import SessionCache
+
+ExpiringModel = type[Session] | type[Verification]
+
+expired_auth_rows_deleted = registry.counter(
+    "expired_auth_rows_deleted_total", "Expired better-auth rows deleted by the sweeper", ["table"]
+)
+expired_auth_sweep_seconds = registry.histogram(
+    "expired_auth_sweep_seconds",
+    "Duration of a sweep of expired rows from one better-auth table",
+    ["table"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+)
+
+
+def delete_expired(model: ExpiringModel, after: str | None, last: str, now: datetime) -> Delete:
+    """Delete the expired rows with ids in ``(after, last]`` that nobody holds locked."""
+    expired = select(model.id).where(model.id <= last, model.expires_at < now)
+    if after is not None:
+        expired = expired.where(model.id > after)
+    expired = expired.with_for_update(skip_locked=True)
+    return delete(model).where(model.id.in_(expired))
+
+
+async def sweep_expired(
+    engine: AsyncEngine,
+    model: ExpiringModel,
+    batch_size: int = 1000,
+    pause: float = 0.05,
+    on_deleted: Callable[[Sequence[str]], Awaitable[object]] | None = None,
+) -> int:
+    """Delete one table's expired rows; returns how many were deleted.
+
+    ``on_deleted`` gets the ``token`` of each deleted session after its batch commits.
+    """
+    table = model.__tablename__
+    started = time.perf_counter()
+    now = datetime.now(UTC)
+    deleted = 0
+    after: str | None = None
+    while True:
+        window = select(model.id).order_by(model.id).limit(batch_size)
+        if after is not None:
+            window = window.where(model.id > after)
+        async with engine.begin() as conn:
+            last = await conn.scalar(select(func.max(window.subquery().c.id)))
+            if last is None:
+                break
+            statement = delete_expired(model, after, last, now)
+            if model is Session:
+                tokens = (await conn.scalars(statement.returning(Session.token))).all()
+                count = len(tokens)
+            else:
+                tokens = []
+                count = (await conn.execute(statement)).rowcount
+        deleted += count
+        expired_auth_rows_deleted.inc(count, table=table)
+        if tokens and on_deleted is not None:
+            await on_deleted(tokens)
+        after = last
+        await asyncio.sleep(pause)
+
+    duration = time.perf_counter() - started
+    expired_auth_sweep_seconds.observe(duration, table=table)
+    if deleted:
+        logger.info(f"Deleted {deleted} expired rows from {table} in {duration:.1f}s")
+    return deleted
+
+
+async def sweep_expired_auth_rows(redis: Redis, engine: AsyncEngine) -> int:
+    """Delete expired sessions and verifications; returns how many rows were deleted."""
+    cache = SessionCache(redis)
+    deleted = 0
+    for model in (Session, Verification):
+        deleted += await sweep_expired(
+            engine,
+            model,
+            settings.session_sweep_batch_size,
+            settings.session_sweep_batch_pause,
+            on_deleted=cache.delete_many if model is Session else None,
+        )
+    return deleted
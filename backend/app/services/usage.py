@@ -0,0 +1,226 @@
+"""API Usage Metering.
+
+Counts authenticated API calls per user and UTC day for metered billing.
+
+- ``usage_meter.record`` is a dict increment on the request path; each API
+  process adds its counts to the ``usage:pending`` Redis hash every
+  ``USAGE_FLUSH_INTERVAL`` seconds (HINCRBY in one MULTI/EXEC) and once more on
+  shutdown. A failed flush keeps the counts for the next attempt
+- the job worker runs ``rollup_usage`` every ``USAGE_ROLLUP_INTERVAL`` seconds: it
+  renames the pending hash to a batch key, adds the batch to ``api_usage`` and
+  deletes it. Applied batch ids are recorded in the same transaction, so a batch
+  left behind by a crash is retried without being counted twice
+"""
+
+import asyncio
+import contextlib
+import time
+import uuid
+from datetime import UTC, date, timedelta
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.core.metrics import registry
+from app.db.models.api_usage import ApiUsage
+from app.db.models.subscription import Subscription
+
+PENDING_KEY = "usage:pending"
+BATCH_PREFIX = "usage:batch:"
+SECONDS_PER_DAY = 86_400
+EPOCH = date(1970, 1, 1)
+SHUTDOWN_FLUSH_ATTEMPTS = 3
+
+usage_flush_failures = registry.counter(
+    "usage_flush_failures_total", "Failed flushes of metered API calls to Redis"
+)
+usage_rolled_up = registry.counter(
+    "usage_rolled_up_calls_total", "Metered API calls added to the api_usage table"
+)
+
+# Returns the calls added: those of deleted users are dropped by the join
+APPLY_BATCH = text(
+    """
+    WITH batch AS (
+        SELECT batch.owner_id, batch.day, batch.calls
+        FROM unnest(
+            CAST(:owner_ids AS varchar[]), CAST(:days AS date[]), CAST(:calls AS bigint[])
+        ) AS batch (owner_id, day, calls)
+    ), applied AS (
+        INSERT INTO api_usage (owner_id, day, calls, updated_at)
+        SELECT batch.owner_id, batch.day, batch.calls, now()
+        FROM batch
+        JOIN "user" ON "user".id = batch.owner_id
+        ORDER BY batch.owner_id, batch.day
+        ON CONFLICT (owner_id, day) DO UPDATE SET
+            calls = api_usage.calls + EXCLUDED.calls,
+            updated_at = EXCLUDED.updated_at
+        RETURNING api_usage.owner_id, api_usage.day
+    )
+    SELECT CAST(coalesce(sum(batch.calls), 0) AS bigint)
+    FROM batch JOIN applied USING (owner_id, day)
+    """
+)
+
+
+def _field(owner_id: str, day: int) -> str:
+    return f"{day}:{owner_id}"
+
+
+def _epoch_day(value: date) -> int:
+    return (value - EPOCH).days
+
+
+class UsageMeter:
+    """This process's API call counts that have not reached Redis yet."""
+
+    def __init__(self, flush_interval: float) -> None:
+        self.flush_interval = flush_interval
+        self.counts: dict[tuple[str, int], int] = {}
+        self._runner: asyncio.Task[None] | None = None
+
+    def record(self, owner_id: str) -> None:
+        key = (owner_id, int(time.time()) // SECONDS_PER_DAY)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def pending(self, owner_id: str, first_day: int, last_day: int) -> int:
+        return sum(self.counts.get((owner_id, day), 0) for day in range(first_day, last_day + 1))
+
+    async def flush(self, redis: Redis) -> None:
+        if not self.counts:
+            return
+        counts, self.counts = self.counts, {}
+        try:
+            # MULTI/EXEC: either every count is added or none is, so a retry can't double count
+            async with redis.pipeline(transaction=True) as pipe:
+                for (owner_id, day), calls in counts.items():
+                    pipe.hincrby(PENDING_KEY, _field(owner_id, day), calls)
+                await pipe.execute()
+        except RedisError:
+            usage_flush_failures.inc()
+            for key, calls in counts.items():
+                self.counts[key] = self.counts.get(key, 0) + calls
+            raise
+
+    async def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._flush_forever())
+
+    async def close(self) -> None:
+        """Stop the periodic flush and hand the remaining counts to Redis."""
+        if self._runner is not None:
+            self._runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
+        for attempt in range(1, SHUTDOWN_FLUSH_ATTEMPTS + 1):
+            try:
+                await self.flush(await get_redis())
+                return
+            except RedisError as exc:
+                if attempt == SHUTDOWN_FLUSH_ATTEMPTS:
+                    logger.error(
+                        f"Dropping {sum(self.counts.values())} metered API calls on shutdown",
+                        extra={"error": str(exc)},
+                    )
+                    return
+                await asyncio.sleep(0.5 * attempt)
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush(await get_redis())
+            except RedisError as exc:
+                logger.warning("Failed to flush API usage", extra={"error": str(exc)})
+
+
+async def rollup_usage(redis: Redis, engine: AsyncEngine) -> int:
+    """Move pending counts from Redis into ``api_usage``; returns the calls added.
+
+    Also retries batches that an interrupted rollup left in Redis.
+    """
+    with contextlib.suppress(ResponseError):  # no such key: nothing pending
+        await redis.rename(PENDING_KEY, f"{BATCH_PREFIX}{uuid.uuid4().hex}")
+    added = 0
+    async for key in redis.scan_iter(match=f"{BATCH_PREFIX}*"):
+        added += await _apply_batch(redis, engine, key)
+    return added
+
+
+async def _apply_batch(redis: Redis, engine: AsyncEngine, key: str) -> int:
+    owner_ids: list[str] = []
+    days: list[date] = []
+    calls: list[int] = []
+    for field, count in (await redis.hgetall(key)).items():
+        day, _, owner_id = field.partition(":")
+        owner_ids.append(owner_id)
+        days.append(EPOCH + timedelta(days=int(day)))
+        calls.append(int(count))
+
+    async with engine.begin() as conn:
+        # Concurrent rollups of the same batch serialize on this insert; only one applies it
+        claimed = await conn.scalar(
+            text(
+                "INSERT INTO api_usage_rollups (batch_id) VALUES (:batch_id) "
+                "ON CONFLICT DO NOTHING RETURNING batch_id"
+            ),
+            {"batch_id": key},
+        )
+        added = 0
+        if claimed is not None and owner_ids:
+            added = await conn.scalar(
+                APPLY_BATCH, {"owner_ids": owner_ids, "days": days, "calls": calls}
+            )
+        await conn.execute(
+            text("DELETE FROM api_usage_rollups WHERE rolled_up_at < now() - interval '1 day'")
+        )
+    await redis.delete(key)
+
+    usage_rolled_up.inc(added)
+    return added
+
+
+def billing_period(subscription: Subscription | None, today: date) -> tuple[date, date]:
+    """Return the first and the day after the last UTC day of the current period.
+
+    Subscriptions are billed by their own period, rounded to whole days; without
+    one the calendar month is used.
+    """
+    if subscription is not None and subscription.period_start and subscription.period_end:
+        return (
+            subscription.period_start.astimezone(UTC).date(),
+            subscription.period_end.astimezone(UTC).date(),
+        )
+    start = today.replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+async def period_usage(
+    db: AsyncSession, redis: Redis, owner_id: str, start: date, end: date
+) -> int:
+    """Calls between ``start`` and ``end`` (exclusive): rolled up, pending and local.
+
+    Calls served by other processes appear once they flush, within
+    ``USAGE_FLUSH_INTERVAL`` seconds.
+    """
+    rolled_up = await db.scalar(
+        select(func.coalesce(func.sum(ApiUsage.calls), 0)).where(
+            ApiUsage.owner_id == owner_id, ApiUsage.day >= start, ApiUsage.day < end
+        )
+    )
+    first_day = _epoch_day(start)
+    last_day = min(_epoch_day(end) - 1, int(time.time()) // SECONDS_PER_DAY)
+    pending = 0
+    if last_day >= first_day:
+        fields = [_field(owner_id, day) for day in range(first_day, last_day + 1)]
+        pending = sum(int(count or 0) for count in await redis.hmget(PENDING_KEY, fields))
+    return int(rolled_up or 0) + pending + usage_meter.pending(owner_id, first_day, last_day)
+
+
+usage_meter = UsageMeter(flush_interval=settings.usage_flush_interval)
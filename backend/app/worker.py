@@ -0,0 +1,229 @@
+"""Background job worker.
+
+Runs handlers registered with ``app.core.job_queue.job`` against the shared
+Redis queue, using the application's database engine and Redis client.
+
+Usage:
+    python -m app.worker [--concurrency 10] [--visibility-timeout 60]
+
+At most ``--concurrency`` jobs run at once. Running jobs have their visibility
+timeout extended periodically; on SIGTERM the worker stops claiming, waits for
+running jobs up to ``--shutdown-timeout`` and leaves the rest to be redelivered.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import signal
+import time
+from collections.abc import Awaitable, Callable
+
+import app.services.cache_invalidation  # noqa: F401  (registers job handlers)
+import app.services.item_export  # noqa: F401
+import app.services.item_import  # noqa: F401
+from app.core.cache import close_redis, get_redis, init_redis
+from app.core.config import settings
+from app.core.job_queue import (
+    JOBS,
+    Job,
+    JobQueue,
+    job_run_seconds,
+    job_wait_seconds,
+    retry_delay,
+)
+from app.core.logging_config import logger
+from app.core.loop_watchdog import current_route, watchdog
+from app.core.metrics import publish_snapshot
+from app.db.session import engine
+from app.db.shards import shard_router
+from app.services.item_archive import archive_items
+from app.services.session_sweeper import sweep_expired_auth_rows
+from app.services.usage import rollup_usage
+
+PROMOTE_INTERVAL = 1.0
+METRICS_INTERVAL = 10.0
+MAX_IDLE_SLEEP = 0.5
+
+
+class Worker:
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int,
+        visibility_timeout: float,
+        shutdown_timeout: float = 30.0,
+    ) -> None:
+        self.queue = queue
+        self.visibility_timeout = visibility_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self._slots = asyncio.Semaphore(concurrency)
+        self._running: dict[str, asyncio.Task[None]] = {}
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        loops = [
+            asyncio.create_task(self._every(PROMOTE_INTERVAL, self.queue.promote)),
+            asyncio.create_task(self._every(self.visibility_timeout / 3, self._extend_running)),
+            asyncio.create_task(
+                self._every(METRICS_INTERVAL, lambda: publish_snapshot(self.queue.redis))
+            ),
+            asyncio.create_task(
+                self._every(
+                    settings.usage_rollup_interval, lambda: rollup_usage(self.queue.redis, engine)
+                )
+            ),
+            asyncio.create_task(self._every(settings.item_archive_interval, archive_items)),
+        ]
+        if settings.session_sweep_interval > 0:
+            loops.append(
+                asyncio.create_task(
+                    self._every(
+                        settings.session_sweep_interval,
+                        lambda: sweep_expired_auth_rows(self.queue.redis, engine),
+                    )
+                )
+            )
+        try:
+            await self._claim_loop()
+        finally:
+            if self._running:
+                _, pending = await asyncio.wait(
+                    self._running.values(), timeout=self.shutdown_timeout
+                )
+                for task in pending:
+                    task.cancel()
+            for task in loops:
+                task.cancel()
+            await asyncio.gather(*loops, *self._running.values(), return_exceptions=True)
+            await publish_snapshot(self.queue.redis)
+
+    async def _claim_loop(self) -> None:
+        idle_sleep = 0.05
+        while not self._stopping.is_set():
+            await self._slots.acquire()
+            if self._stopping.is_set():
+                self._slots.release()
+                break
+            try:
+                claimed = await self.queue.claim(self.visibility_timeout)
+            except Exception:
+                self._slots.release()
+                raise
+            if claimed is None:
+                self._slots.release()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._stopping.wait(), idle_sleep)
+                idle_sleep = min(idle_sleep * 2, MAX_IDLE_SLEEP)
+                continue
+            idle_sleep = 0.05
+            self._running[claimed.id] = asyncio.create_task(self._execute(claimed))
+
+    async def _execute(self, claimed: Job) -> None:
+        started = time.time()
+        outcome = "cancelled"
+        current_route.set(f"job {claimed.name}")
+        try:
+            spec = JOBS.get(claimed.name)
+            job_wait_seconds.observe(max(started - claimed.available_at, 0.0), job=claimed.name)
+            if spec is None:
+                outcome = "dead"
+                claimed.last_error = f"No handler registered for {claimed.name!r}"
+                await self.queue.bury(claimed)
+                logger.error(claimed.last_error)
+                return
+            if claimed.attempts > spec.max_attempts:
+                outcome = "dead"
+                claimed.last_error = claimed.last_error or "Exceeded max attempts"
+                await self._bury(claimed)
+                return
+
+            try:
+                await spec.handler(**claimed.kwargs)
+            except Exception as exc:
+                claimed.last_error = f"{type(exc).__name__}: {exc}"
+                if claimed.attempts >= spec.max_attempts:
+                    outcome = "dead"
+                    await self._bury(claimed)
+                else:
+                    outcome = "retried"
+                    await self.queue.retry(claimed, retry_delay(claimed.attempts))
+                logger.error(
+                    f"Job {claimed.name} {claimed.id} failed (attempt {claimed.attempts})",
+                    extra={"error": claimed.last_error},
+                )
+            else:
+                await self.queue.ack(claimed)
+                outcome = "succeeded"
+        finally:
+            job_run_seconds.observe(time.time() - started, job=claimed.name, outcome=outcome)
+            self._running.pop(claimed.id, None)
+            self._slots.release()
+
+    async def _bury(self, failed: Job) -> None:
+        await self.queue.bury(failed)
+        spec = JOBS[failed.name]
+        if spec.on_dead is not None:
+            try:
+                await spec.on_dead(**failed.kwargs)
+            except Exception as exc:
+                logger.error(f"on_dead hook for {failed.name} failed", extra={"error": str(exc)})
+
+    async def _extend_running(self) -> None:
+        await self.queue.extend(list(self._running), self.visibility_timeout)
+
+    async def _every(self, interval: float, func: Callable[[], Awaitable[object]]) -> None:
+        while True:
+            try:
+                await func()
+            except Exception as exc:
+                logger.error("Worker maintenance task failed", extra={"error": str(exc)})
+            await asyncio.sleep(interval)
+
+
+async def run(args: argparse.Namespace) -> None:
+    await init_redis()
+    await watchdog.start(debug=settings.loop_debug)
+    await shard_router.start()
+    worker = Worker(
+        JobQueue(await get_redis()),
+        concurrency=args.concurrency,
+        visibility_timeout=args.visibility_timeout,
+        shutdown_timeout=args.shutdown_timeout,
+    )
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, worker.stop)
+
+    logger.info(f"Worker started: concurrency={args.concurrency}, jobs={sorted(JOBS)}")
+    try:
+        await worker.run()
+    finally:
+        await close_redis()
+        await shard_router.close()
+        await engine.dispose()
+        await watchdog.stop()
+        logger.info("Worker stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background jobs from the Redis queue")
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.worker_concurrency, help="Jobs run at once"
+    )
+    parser.add_argument(
+        "--visibility-timeout",
+        type=float,
+        default=settings.job_visibility_timeout,
+        help="Seconds before an unacknowledged job is redelivered",
+    )
+    parser.add_argument(
+        "--shutdown-timeout", type=float, default=30.0, help="Seconds to finish running jobs"
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
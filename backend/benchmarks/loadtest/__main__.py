@@ -0,0 +1,150 @@
+"""API load test.
+
+Seeds a synthetic dataset with COPY, then drives a workload mix against the API
+at a fixed concurrency and reports throughput and p50/p95/p99 latency per route.
+
+Usage:
+    python -m benchmarks.loadtest seed --users 1000 --items-per-user 200 \\
+        --sessions-per-user 3 --subscriptions-per-user 2
+    python -m benchmarks.loadtest run --workload read --concurrency 50 --duration 60 \\
+        --out benchmarks/results/read.json
+    python -m benchmarks.loadtest run --workload read --concurrency 50 --duration 60 \\
+        --compare benchmarks/results/read.json
+    python -m benchmarks.loadtest run --workload resilience --scenario postgres-failover
+
+By default requests go through ``main:app`` in this process (ASGI transport, no
+network); pass ``--url`` to load a running server instead. ``--scenario`` routes
+the in-process app's Postgres and Redis connections through fault-injection
+proxies and scripts faults on them (see ``benchmarks.loadtest.scenarios``). Run
+against a disposable database: seeding and write workloads modify it.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from benchmarks.loadtest.dataset import Dataset, describe, reset, seed
+from benchmarks.loadtest.runner import LoadTest, compare, open_client, print_report, write_report
+from benchmarks.loadtest.scenarios import SCENARIOS, ScenarioPlayer, route_through_proxies
+from benchmarks.loadtest.workloads import WORKLOADS
+
+# app.db.session is imported in the commands: --scenario must rewrite the database URLs first
+
+
+async def run_seed(args: argparse.Namespace) -> None:
+    from app.db.session import engine
+
+    async with engine.connect() as conn:
+        if args.reset:
+            await reset(conn)
+        existing = await describe(conn)
+        if existing.users:
+            sys.exit(f"{existing.users:,} load-test users already exist; pass --reset to reseed")
+        dataset = Dataset(
+            args.users, args.items_per_user, args.sessions_per_user, args.subscriptions_per_user
+        )
+        await seed(conn, dataset, seed=args.seed)
+    await engine.dispose()
+
+
+async def run_load(args: argparse.Namespace, player: ScenarioPlayer | None) -> int:
+    from app.db.session import engine
+
+    async with AsyncExitStack() as stack:
+        # Closed last, once nothing is connected through the proxies any more
+        if player is not None:
+            stack.push_async_callback(player.close)
+            await player.start()
+        stack.push_async_callback(engine.dispose)
+        async with engine.connect() as conn:
+            dataset = await describe(conn)
+        if not dataset.users or not dataset.items_per_user or not dataset.sessions_per_user:
+            sys.exit("No load-test data found: run `python -m benchmarks.loadtest seed` first")
+
+        test = LoadTest(
+            workload=args.workload,
+            dataset=dataset,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            warmup=args.warmup,
+            seed=args.seed,
+            phase=(lambda: player.phase) if player is not None else None,
+        )
+        client = await open_client(stack, args.url, args.concurrency)
+        if player is None:
+            report = await test.run(client)
+        else:
+            print(f"scenario={player.name}")
+            report, _ = await asyncio.gather(test.run(client), player.play(args.warmup))
+            report["scenario"] = player.report()
+
+    print_report(report)
+    if args.out is not None:
+        write_report(report, args.out)
+    if args.compare is not None:
+        regressions = compare(json.loads(args.compare.read_text()), report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="COPY a synthetic dataset into the database")
+    seed_parser.add_argument("--users", type=int, default=1000, help="Users to create")
+    seed_parser.add_argument("--items-per-user", type=int, default=200, help="Items per user")
+    seed_parser.add_argument(
+        "--sessions-per-user", type=int, default=1, help="Live sessions per user"
+    )
+    seed_parser.add_argument(
+        "--subscriptions-per-user",
+        type=int,
+        default=1,
+        help="Subscriptions per user: one active, the rest canceled",
+    )
+    seed_parser.add_argument("--seed", type=int, default=0, help="Random seed for item data")
+    seed_parser.add_argument("--reset", action="store_true", help="Delete existing load data")
+
+    run_parser = commands.add_parser("run", help="Drive a workload and report latency")
+    run_parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    run_parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients")
+    run_parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    run_parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds first")
+    run_parser.add_argument("--seed", type=int, default=0, help="Random seed for request mix")
+    run_parser.add_argument("--url", help="Base URL of a running server (default: in-process)")
+    run_parser.add_argument("--out", type=Path, help="Write the JSON report here")
+    run_parser.add_argument("--compare", type=Path, help="Baseline JSON report to compare with")
+    run_parser.add_argument(
+        "--scenario", choices=sorted(SCENARIOS), help="Inject Postgres/Redis faults (in-process)"
+    )
+    run_parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Regression threshold as a fraction"
+    )
+
+    args = parser.parse_args()
+    player = None
+    if args.command == "run" and args.scenario is not None:
+        if args.url is not None:
+            sys.exit("--scenario needs the in-process app: it can't reroute a server's connections")
+        player = route_through_proxies(args.scenario, args.seed)
+
+    from app.db.session import engine
+
+    # SQL echo (DEBUG=true) would make logging dominate the measurement
+    engine.echo = False
+    if args.command == "seed":
+        asyncio.run(run_seed(args))
+    else:
+        sys.exit(asyncio.run(run_load(args, player)))
+
+
+if __name__ == "__main__":
+    main()
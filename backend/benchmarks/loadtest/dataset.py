@@ -0,0 +1,166 @@
+"""Synthetic load-test dataset.
+
+Every generated row is derived from its user number, so the load generator can
+address users, session tokens and items without reading them back:
+
+- user ``load-user-{n}`` with session tokens ``load-token-{n}-{s}`` for ``s``
+  in ``range(sessions_per_user)``
+- an active ``pro`` subscription per user, plus ``subscriptions_per_user - 1``
+  canceled ones
+- items ``load-item-{n}-{k}`` for ``k`` in ``range(items_per_user)``
+"""
+
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+ID_PREFIX = "load-"
+WORDS = (
+    "alpha blue bronze cobalt copper crimson delta echo emerald gadget gizmo golden "
+    "green indigo ivory jade lunar matrix nova orbit pixel quartz ruby sensor silver "
+    "solar sprocket titan vector violet widget"
+).split()
+
+COPY_BATCH_SIZE = 50_000
+
+USER_COLUMNS = ("id", "name", "email", "email_verified", "created_at", "updated_at", "banned")
+SESSION_COLUMNS = ("id", "token", "user_id", "expires_at", "created_at", "updated_at")
+SUBSCRIPTION_COLUMNS = (
+    "id",
+    "plan",
+    "reference_id",
+    "status",
+    "cancel_at_period_end",
+    "created_at",
+    "updated_at",
+)
+ITEM_COLUMNS = ("id", "name", "description", "owner_id", "is_active", "created_at", "updated_at")
+
+
+@dataclass(frozen=True)
+class Dataset:
+    users: int
+    items_per_user: int
+    sessions_per_user: int = 1
+    subscriptions_per_user: int = 1
+
+    def user_id(self, user: int) -> str:
+        return f"{ID_PREFIX}user-{user}"
+
+    def token(self, user: int, session: int = 0) -> str:
+        return f"{ID_PREFIX}token-{user}-{session}"
+
+    def item_id(self, user: int, item: int) -> str:
+        return f"{ID_PREFIX}item-{user}-{item}"
+
+
+def _users(dataset: Dataset, now: datetime) -> Iterator[tuple]:
+    for user in range(dataset.users):
+        user_id = dataset.user_id(user)
+        yield (user_id, f"Load User {user}", f"{user_id}@example.com", True, now, now, False)
+
+
+def _sessions(dataset: Dataset, now: datetime) -> Iterator[tuple]:
+    expires_at = now + timedelta(days=30)
+    for user in range(dataset.users):
+        user_id = dataset.user_id(user)
+        for session in range(dataset.sessions_per_user):
+            session_id = f"{ID_PREFIX}session-{user}-{session}"
+            yield (session_id, dataset.token(user, session), user_id, expires_at, now, now)
+
+
+def _subscriptions(dataset: Dataset, now: datetime) -> Iterator[tuple]:
+    for user in range(dataset.users):
+        user_id = dataset.user_id(user)
+        # Only one may be active: the subscription check expects at most one
+        for subscription in range(dataset.subscriptions_per_user):
+            status = "canceled" if subscription else "active"
+            subscription_id = f"{ID_PREFIX}subscription-{user}-{subscription}"
+            yield (subscription_id, "pro", user_id, status, False, now, now)
+
+
+def _items(dataset: Dataset, now: datetime, rng: random.Random) -> Iterator[tuple]:
+    for user in range(dataset.users):
+        owner_id = dataset.user_id(user)
+        for item in range(dataset.items_per_user):
+            name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {item}"
+            description = f"Synthetic {rng.choice(WORDS)} {rng.choice(WORDS)} load-test item"
+            yield (
+                dataset.item_id(user, item),
+                name,
+                description,
+                owner_id,
+                rng.random() >= 0.1,
+                now,
+                now,
+            )
+
+
+async def _copy(conn: AsyncConnection, table: str, columns: tuple, rows: Iterator[tuple]) -> int:
+    driver = (await conn.get_raw_connection()).driver_connection
+    copied = 0
+    batch: list[tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= COPY_BATCH_SIZE:
+            await driver.copy_records_to_table(table, records=batch, columns=columns)
+            copied += len(batch)
+            batch = []
+            print(f"  {table}: {copied:,} rows")
+    if batch:
+        await driver.copy_records_to_table(table, records=batch, columns=columns)
+        copied += len(batch)
+    return copied
+
+
+async def reset(conn: AsyncConnection) -> None:
+    """Delete all load-test rows (sessions and items cascade from their users)."""
+    pattern = {"pattern": f"{ID_PREFIX}%"}
+    await conn.execute(text("DELETE FROM subscription WHERE id LIKE :pattern"), pattern)
+    await conn.execute(text('DELETE FROM "user" WHERE id LIKE :pattern'), pattern)
+    await conn.commit()
+
+
+async def seed(conn: AsyncConnection, dataset: Dataset, seed: int = 0) -> None:
+    """COPY the dataset into an empty database (call ``reset`` first to reseed)."""
+    now = datetime.utcnow()
+    rng = random.Random(seed)
+    for table, columns, rows in (
+        ("user", USER_COLUMNS, _users(dataset, now)),
+        ("session", SESSION_COLUMNS, _sessions(dataset, now)),
+        ("subscription", SUBSCRIPTION_COLUMNS, _subscriptions(dataset, now)),
+        ("items", ITEM_COLUMNS, _items(dataset, now, rng)),
+    ):
+        copied = await _copy(conn, table, columns, rows)
+        await conn.commit()
+        print(f"seeded {copied:,} {table} rows")
+    await conn.execute(text('ANALYZE "user", session, subscription, items, item_stats'))
+    await conn.commit()
+
+
+async def describe(conn: AsyncConnection) -> Dataset:
+    """Read back the size of the seeded dataset."""
+    users = await conn.scalar(
+        text('SELECT count(*) FROM "user" WHERE id LIKE :pattern'), {"pattern": f"{ID_PREFIX}%"}
+    )
+    # Items created by write workloads get random IDs, so only seeded ones match
+    counts = {}
+    for table, owner, kind in (
+        ("items", "owner_id", "item"),
+        ("session", "user_id", "session"),
+        ("subscription", "reference_id", "subscription"),
+    ):
+        counts[table] = await conn.scalar(
+            text(f"SELECT count(*) FROM {table} WHERE {owner} = :owner_id AND id LIKE :pattern"),
+            {"owner_id": Dataset(1, 0).user_id(0), "pattern": f"{ID_PREFIX}{kind}-%"},
+        )
+    return Dataset(
+        users=users or 0,
+        items_per_user=counts["items"] or 0,
+        sessions_per_user=counts["session"] or 0,
+        subscriptions_per_user=counts["subscription"] or 0,
+    )
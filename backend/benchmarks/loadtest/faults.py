@@ -0,0 +1,179 @@
+"""TCP fault-injection proxy.
+
+A ``FaultProxy`` listens on a local port and forwards every connection to an
+upstream server, such as Postgres or Redis, applying its current ``Faults``.
+Faults can be swapped while connections are open, so a scenario can degrade a
+dependency partway through a run and restore it later:
+
+- ``latency_ms`` / ``jitter_ms`` delay every response chunk, so each round trip
+  takes that much longer; ``tail_ms`` adds more to a ``tail_rate`` fraction of
+  them, to shape p99 rather than the median
+- ``bandwidth`` caps the bytes per second each connection moves in each direction
+- ``reset_rate`` resets a connection on that fraction of chunks; ``reset_all``
+  resets every open connection at once, like a failover
+- ``blackhole`` holds data in both directions without closing anything, like a
+  partition; ``refuse`` resets new connections as soon as they are accepted
+
+Chunks are delivered in order: a delayed chunk holds back the ones after it.
+"""
+
+import asyncio
+import random
+import socket
+import struct
+import time
+from dataclasses import dataclass, field
+
+CHUNK_SIZE = 64 * 1024
+# How often a blackholed pipe checks whether the blackhole has lifted
+BLACKHOLE_POLL = 0.05
+
+
+@dataclass(frozen=True)
+class Faults:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    tail_ms: float = 0.0
+    tail_rate: float = 0.0
+    # Bytes per second per connection and direction; None for no cap
+    bandwidth: int | None = None
+    reset_rate: float = 0.0
+    blackhole: bool = False
+    refuse: bool = False
+
+    def describe(self) -> str:
+        active = [
+            f"{name}={value}"
+            for name, value in vars(self).items()
+            if value not in (0, 0.0, None, False)
+        ]
+        return " ".join(active) or "none"
+
+
+@dataclass
+class ProxyStats:
+    connections: int = 0
+    refused: int = 0
+    resets: int = 0
+    bytes_up: int = 0
+    bytes_down: int = 0
+
+
+@dataclass(eq=False)
+class _Connection:
+    client: asyncio.StreamWriter
+    upstream: asyncio.StreamWriter
+    tasks: list[asyncio.Task[None]] = field(default_factory=list)
+
+
+class FaultProxy:
+    """Forwards a local port to ``upstream_host:upstream_port`` with injected faults."""
+
+    def __init__(self, name: str, upstream_host: str, upstream_port: int, seed: int = 0) -> None:
+        self.name = name
+        self.upstream = (upstream_host, upstream_port)
+        self.faults = Faults()
+        self.stats = ProxyStats()
+        self._rng = random.Random(seed)
+        # Bound now so the port is known before the app's connection URLs are built
+        self._socket = socket.create_server(("127.0.0.1", 0))
+        self.port: int = self._socket.getsockname()[1]
+        self._server: asyncio.Server | None = None
+        self._connections: set[_Connection] = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, sock=self._socket)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        self.reset_all(count=False)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    def reset_all(self, count: bool = True) -> None:
+        """Reset every open connection, in both directions."""
+        for connection in list(self._connections):
+            self._reset(connection, count)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self.faults.refuse:
+            self.stats.refused += 1
+            _abort(writer)
+            return
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(*self.upstream)
+        except OSError:
+            self.stats.refused += 1
+            _abort(writer)
+            return
+
+        self.stats.connections += 1
+        connection = _Connection(writer, upstream_writer)
+        self._connections.add(connection)
+        connection.tasks = [
+            asyncio.create_task(self._pipe(connection, reader, upstream_writer, upstream=True)),
+            asyncio.create_task(self._pipe(connection, upstream_reader, writer, upstream=False)),
+        ]
+        try:
+            await asyncio.gather(*connection.tasks, return_exceptions=True)
+        finally:
+            self._connections.discard(connection)
+            for stream in (writer, upstream_writer):
+                stream.close()
+
+    async def _pipe(
+        self,
+        connection: _Connection,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        upstream: bool,
+    ) -> None:
+        # Earliest time the next chunk may go out: keeps chunks in order and paces bandwidth
+        next_send = time.monotonic()
+        while data := await reader.read(CHUNK_SIZE):
+            faults = self.faults
+            if faults.reset_rate and self._rng.random() < faults.reset_rate:
+                self._reset(connection)
+                return
+            next_send = max(next_send, time.monotonic() + self._delay(faults, upstream))
+            await asyncio.sleep(next_send - time.monotonic())
+            while self.faults.blackhole:
+                await asyncio.sleep(BLACKHOLE_POLL)
+            if self.faults.bandwidth:
+                next_send += len(data) / self.faults.bandwidth
+            writer.write(data)
+            await writer.drain()
+            if upstream:
+                self.stats.bytes_up += len(data)
+            else:
+                self.stats.bytes_down += len(data)
+        if writer.can_write_eof():
+            writer.write_eof()
+
+    def _delay(self, faults: Faults, upstream: bool) -> float:
+        if upstream:
+            return 0.0
+        delay_ms = faults.latency_ms
+        if faults.jitter_ms:
+            delay_ms += self._rng.uniform(-faults.jitter_ms, faults.jitter_ms)
+        if faults.tail_rate and self._rng.random() < faults.tail_rate:
+            delay_ms += faults.tail_ms
+        return max(delay_ms, 0.0) / 1000
+
+    def _reset(self, connection: _Connection, count: bool = True) -> None:
+        if count:
+            self.stats.resets += 1
+        for writer in (connection.client, connection.upstream):
+            _abort(writer)
+        for task in connection.tasks:
+            if task is not asyncio.current_task():
+                task.cancel()
+
+
+def _abort(writer: asyncio.StreamWriter) -> None:
+    """Close with a TCP RST rather than a FIN, as a crashed peer or failover would."""
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    writer.transport.abort()
@@ -0,0 +1,268 @@
+"""Closed-loop load generator, per-route statistics and baseline comparison."""
+
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import time
+from collections.abc import Callable
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.loadtest.dataset import Dataset
+from benchmarks.loadtest.workloads import VirtualUser, chooser
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[str, int] = field(default_factory=dict)
+
+    def record(self, elapsed_ms: float, status: int) -> None:
+        self.latencies_ms.append(elapsed_ms)
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if status >= 400:
+            self.errors += 1
+
+    def fail(self, name: str) -> None:
+        """Count a transport failure, which has no latency, as an error."""
+        self.statuses[name] = self.statuses.get(name, 0) + 1
+        self.errors += 1
+
+    def summary(self, duration: float) -> dict[str, Any]:
+        ordered = sorted(self.latencies_ms)
+        result: dict[str, Any] = {
+            "requests": len(ordered),
+            "errors": self.errors,
+            "rps": round(len(ordered) / duration, 2),
+            "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else None,
+        }
+        for percentile in PERCENTILES:
+            result[f"p{percentile}_ms"] = round(percentile_of(ordered, percentile), 3)
+        result["max_ms"] = round(ordered[-1], 3) if ordered else None
+        result["statuses"] = dict(sorted(self.statuses.items()))
+        return result
+
+
+def percentile_of(ordered: list[float], percentile: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(percentile / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+@dataclass
+class LoadTest:
+    workload: str
+    dataset: Dataset
+    concurrency: int
+    duration: float
+    warmup: float = 0.0
+    seed: int = 0
+    # Names the fault scenario phase in effect, to report each phase separately
+    phase: Callable[[], str] | None = None
+    routes: dict[str, RouteStats] = field(default_factory=dict)
+    failures: dict[str, int] = field(default_factory=dict)
+    phases: dict[str, RouteStats] = field(default_factory=dict)
+    # First and last measured loop time seen in each phase
+    phase_spans: dict[str, list[float]] = field(default_factory=dict)
+
+    async def run(self, client: httpx.AsyncClient) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        measure_from = started + self.warmup
+        deadline = measure_from + self.duration
+        users = [
+            VirtualUser(
+                number=n % self.dataset.users,
+                dataset=self.dataset,
+                rng=random.Random(self.seed * 1_000_003 + n),
+                # Clients sharing a user log in with different sessions where there are any
+                session=n // self.dataset.users % self.dataset.sessions_per_user,
+            )
+            for n in range(self.concurrency)
+        ]
+        await asyncio.gather(*(self._drive(client, user, measure_from, deadline) for user in users))
+        return self.report()
+
+    async def _drive(
+        self, client: httpx.AsyncClient, user: VirtualUser, measure_from: float, deadline: float
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        choose = chooser(self.workload)
+        while loop.time() < deadline:
+            request = choose(user.rng)(user)
+            began = time.perf_counter()
+            try:
+                response = await client.request(
+                    request.method, request.url, json=request.json, cookies=user.cookies
+                )
+            except httpx.HTTPError as exc:
+                # Transport failures are reported separately: they have no latency
+                name = type(exc).__name__
+                self.failures[name] = self.failures.get(name, 0) + 1
+                if loop.time() >= measure_from:
+                    self._phase_stats(loop.time()).fail(name)
+                continue
+            elapsed_ms = (time.perf_counter() - began) * 1000
+            # The client's cookie jar is shared by every virtual user: keep tickets per user
+            user.ticket = response.cookies.get("auth_ticket", user.ticket)
+            client.cookies.clear()
+            if request.on_response is not None:
+                request.on_response(response.status_code, _json(response))
+            if loop.time() >= measure_from:
+                self.routes.setdefault(request.route, RouteStats()).record(
+                    elapsed_ms, response.status_code
+                )
+                self._phase_stats(loop.time()).record(elapsed_ms, response.status_code)
+
+    def _phase_stats(self, now: float) -> RouteStats:
+        """Stats of the scenario phase a request finished in (discarded without a scenario)."""
+        if self.phase is None:
+            return RouteStats()
+        name = self.phase()
+        span = self.phase_spans.setdefault(name, [now, now])
+        span[1] = now
+        return self.phases.setdefault(name, RouteStats())
+
+    def report(self) -> dict[str, Any]:
+        total = RouteStats()
+        for stats in self.routes.values():
+            total.latencies_ms.extend(stats.latencies_ms)
+            total.errors += stats.errors
+            for status, count in stats.statuses.items():
+                total.statuses[status] = total.statuses.get(status, 0) + count
+        return {
+            "meta": {
+                "workload": self.workload,
+                "concurrency": self.concurrency,
+                "duration_s": self.duration,
+                "warmup_s": self.warmup,
+                "seed": self.seed,
+                "users": self.dataset.users,
+                "items_per_user": self.dataset.items_per_user,
+                "started_at": datetime.now(UTC).isoformat(),
+                "git_commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+            "total": total.summary(self.duration),
+            "routes": {
+                route: stats.summary(self.duration) for route, stats in sorted(self.routes.items())
+            },
+            "transport_errors": self.failures,
+            "phases": {
+                phase: stats.summary(max(end - start, 1e-3))
+                for phase, stats in self.phases.items()
+                for start, end in [self.phase_spans[phase]]
+            },
+        }
+
+
+def _json(response: httpx.Response) -> Any:
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def open_client(
+    stack: AsyncExitStack, url: str | None, concurrency: int
+) -> httpx.AsyncClient:
+    """Client for a running server at ``url``, or for ``main:app`` in this process."""
+    timeout = httpx.Timeout(30.0)
+    if url is not None:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        return await stack.enter_async_context(
+            httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+        )
+
+    from app.core.limiter import limiter
+    from main import app
+
+    # All in-process requests share one client address, which the per-IP limit would throttle
+    limiter.enabled = False
+    await stack.enter_async_context(app.router.lifespan_context(app))
+    # Unhandled errors become 500 responses, as a server would send, instead of raising here
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return await stack.enter_async_context(
+        httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout)
+    )
+
+
+def print_report(report: dict[str, Any]) -> None:
+    meta = report["meta"]
+    print(
+        f"\nworkload={meta['workload']} concurrency={meta['concurrency']} "
+        f"duration={meta['duration_s']}s users={meta['users']:,}"
+    )
+    header = f"{'route':<32} {'requests':>9} {'errors':>7} {'rps':>9}"
+    header += "".join(f" {f'p{p}':>9}" for p in PERCENTILES)
+    print(header)
+    for route, stats in [*report["routes"].items(), ("TOTAL", report["total"])]:
+        line = f"{route:<32} {stats['requests']:>9,} {stats['errors']:>7,} {stats['rps']:>9.1f}"
+        line += "".join(f" {stats[f'p{p}_ms']:>7.2f}ms" for p in PERCENTILES)
+        print(line)
+    if report["transport_errors"]:
+        print(f"transport errors: {report['transport_errors']}")
+    if report.get("phases"):
+        print(f"\n{'phase':<64} {'requests':>9} {'errors':>7} {'p50':>9} {'p99':>9}")
+        for phase, stats in report["phases"].items():
+            print(
+                f"{phase[:64]:<64} {stats['requests']:>9,} {stats['errors']:>7,}"
+                f" {stats['p50_ms']:>7.2f}ms {stats['p99_ms']:>7.2f}ms"
+            )
+
+
+def write_report(report: dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nwrote {path}")
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    """Print per-route changes against ``baseline``; returns the regressions found.
+
+    A route regresses when its throughput drops, or its p95/p99 latency grows, by
+    more than ``threshold`` (a fraction, e.g. 0.1 for 10%).
+    """
+    regressions = []
+    print(f"\n{'route':<32} " + " ".join(f"{key:<26}" for key in ("rps", "p95", "p99")))
+    routes = {**current["routes"], "TOTAL": current["total"]}
+    before_routes = {**baseline["routes"], "TOTAL": baseline["total"]}
+    for route, stats in routes.items():
+        before = before_routes.get(route)
+        if before is None or not before["requests"]:
+            print(f"{route:<32} (not in baseline)")
+            continue
+        cells = []
+        for key, higher_is_better in (("rps", True), ("p95_ms", False), ("p99_ms", False)):
+            change = (stats[key] - before[key]) / before[key] if before[key] else 0.0
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else "  "
+            cells.append(f"{before[key]:>8.1f}->{stats[key]:<8.1f}{change:>+6.0%}{flag}")
+            if worse > threshold:
+                regressions.append(f"{route} {key} {change:+.1%}")
+        print(f"{route:<32} " + " ".join(cells))
+    if baseline["meta"]["workload"] != current["meta"]["workload"]:
+        print("warning: baseline was recorded with a different workload")
+    return regressions
@@ -0,0 +1,130 @@
+"""Scripted dependency faults for load-test runs.
+
+A scenario is a list of phases. Each phase sets the ``Faults`` of the Postgres
+or Redis proxy at a number of seconds into the measured run, and can reset the
+connections open at that moment. ``run --scenario`` routes ``main:app``'s
+database, item shard and Redis connections through a ``FaultProxy`` each, plays
+the scenario alongside the load and reports latency and errors per phase.
+Postgres phases apply to the primary and every item shard alike.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit, urlunsplit
+
+from app.core.config import settings
+from benchmarks.loadtest.faults import FaultProxy, Faults
+
+TARGETS = {"postgres": 5432, "redis": 6379}
+
+
+@dataclass(frozen=True)
+class Phase:
+    at: float
+    target: str
+    faults: Faults = field(default_factory=Faults)
+    # Reset the target's open connections when the phase starts
+    reset: bool = False
+
+    @property
+    def label(self) -> str:
+        reset = " reset" if self.reset else ""
+        return f"{self.at:g}s {self.target}{reset}: {self.faults.describe()}"
+
+
+SCENARIOS: dict[str, list[Phase]] = {
+    "baseline": [],
+    "redis-latency-50ms": [Phase(0, "redis", Faults(latency_ms=50, jitter_ms=5))],
+    "redis-p99-200ms": [
+        Phase(0, "redis", Faults(latency_ms=1, jitter_ms=1, tail_ms=200, tail_rate=0.01))
+    ],
+    "redis-outage": [
+        Phase(5, "redis", Faults(refuse=True), reset=True),
+        Phase(15, "redis"),
+    ],
+    "postgres-latency-20ms": [Phase(0, "postgres", Faults(latency_ms=20, jitter_ms=5))],
+    "postgres-slow-link": [Phase(0, "postgres", Faults(latency_ms=5, bandwidth=256 * 1024))],
+    "postgres-flaky": [Phase(0, "postgres", Faults(reset_rate=0.001))],
+    # Primary dies: connections reset, then refused until the standby takes over
+    "postgres-failover": [
+        Phase(5, "postgres", Faults(refuse=True), reset=True),
+        Phase(10, "postgres"),
+    ],
+    # Network partition: nothing is closed, queries just stop getting answers
+    "postgres-blackhole": [
+        Phase(5, "postgres", Faults(blackhole=True)),
+        Phase(8, "postgres"),
+    ],
+}
+
+
+def proxy_url(url: str, port: int) -> str:
+    """``url`` pointed at a local proxy port, keeping credentials, path and query."""
+    parts = urlsplit(url)
+    credentials = parts.netloc.rpartition("@")[0]
+    netloc = f"{credentials}@127.0.0.1:{port}" if credentials else f"127.0.0.1:{port}"
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+def route_through_proxies(name: str, seed: int = 0) -> "ScenarioPlayer":
+    """Bind a proxy per database and Redis server and point the settings' URLs at them.
+
+    Must run before ``app.db.session`` and ``app.db.shards`` are imported: the
+    engine and the shard router read their URLs once. Item shards' proxies are
+    named ``postgres:<shard>``.
+    """
+    urls = {"postgres": settings.database_url, "redis": settings.redis_url}
+    urls |= {f"postgres:{shard}": url for shard, url in settings.item_shards.items()}
+    proxies = {}
+    for n, (proxied, url) in enumerate(urls.items()):
+        parts = urlsplit(url)
+        port = parts.port or TARGETS[proxied.partition(":")[0]]
+        proxies[proxied] = FaultProxy(proxied, parts.hostname or "localhost", port, seed + n)
+    settings.database_url = proxy_url(settings.database_url, proxies["postgres"].port)
+    settings.redis_url = proxy_url(settings.redis_url, proxies["redis"].port)
+    settings.item_shards = {
+        shard: proxy_url(url, proxies[f"postgres:{shard}"].port)
+        for shard, url in settings.item_shards.items()
+    }
+    return ScenarioPlayer(name, proxies)
+
+
+@dataclass
+class ScenarioPlayer:
+    """Applies a scenario's phases on schedule; ``phase`` names the one in effect."""
+
+    name: str
+    proxies: dict[str, FaultProxy]
+    phase: str = "before faults"
+    applied: list[dict[str, Any]] = field(default_factory=list)
+
+    async def start(self) -> None:
+        for proxy in self.proxies.values():
+            await proxy.start()
+
+    async def close(self) -> None:
+        for proxy in self.proxies.values():
+            await proxy.close()
+
+    async def play(self, warmup: float) -> None:
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + warmup
+        for phase in SCENARIOS[self.name]:
+            await asyncio.sleep(max(measure_from + phase.at - loop.time(), 0))
+            for proxied, proxy in self.proxies.items():
+                if proxied.partition(":")[0] != phase.target:
+                    continue
+                proxy.faults = phase.faults
+                if phase.reset:
+                    proxy.reset_all()
+            self.phase = phase.label
+            self.applied.append({"at_s": phase.at, "phase": phase.label})
+            print(f"  [{phase.at:>5g}s] {phase.label}")
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "phases": self.applied,
+            "proxies": {target: vars(proxy.stats) for target, proxy in self.proxies.items()},
+        }
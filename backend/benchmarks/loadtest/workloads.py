@@ -0,0 +1,138 @@
+"""Request mixes driven by the load generator.
+
+Each workload is a weighted list of operations. An operation builds one request
+for a virtual user and is reported under its route template, so per-route
+latency can be compared across runs regardless of the IDs involved.
+"""
+
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from benchmarks.loadtest.dataset import WORDS, Dataset
+
+
+@dataclass
+class VirtualUser:
+    """A simulated client: one seeded user with one of their session cookies."""
+
+    number: int
+    dataset: Dataset
+    rng: random.Random
+    session: int = 0
+    # Items this run created and may delete again, so seeded items stay readable
+    created: list[str] = field(default_factory=list)
+    # Latest auth ticket cookie issued to this user, like a browser would keep it
+    ticket: str | None = None
+
+    @property
+    def cookies(self) -> dict[str, str]:
+        cookies = {"better-auth.session_token": self.dataset.token(self.number, self.session)}
+        if self.ticket is not None:
+            cookies["auth_ticket"] = self.ticket
+        return cookies
+
+    def seeded_item(self) -> str:
+        return self.dataset.item_id(self.number, self.rng.randrange(self.dataset.items_per_user))
+
+    def item_name(self) -> str:
+        return f"{self.rng.choice(WORDS).title()} {self.rng.choice(WORDS)} {self.rng.random():.6f}"
+
+
+@dataclass(frozen=True)
+class Request:
+    route: str
+    method: str
+    url: str
+    json: dict[str, Any] | None = None
+    # Delivered as a callback so write workloads can track created items
+    on_response: Callable[[int, Any], None] | None = None
+
+
+Operation = Callable[[VirtualUser], Request]
+
+
+def me(user: VirtualUser) -> Request:
+    return Request("GET /api/v1/users/me", "GET", "/api/v1/users/me")
+
+
+def list_items(user: VirtualUser) -> Request:
+    skip = user.rng.randrange(max(user.dataset.items_per_user - 20, 1))
+    return Request("GET /api/v1/items/", "GET", f"/api/v1/items/?skip={skip}&limit=20")
+
+
+def get_item(user: VirtualUser) -> Request:
+    return Request("GET /api/v1/items/{id}", "GET", f"/api/v1/items/{user.seeded_item()}")
+
+
+def item_stats(user: VirtualUser) -> Request:
+    return Request("GET /api/v1/items/stats", "GET", "/api/v1/items/stats")
+
+
+def health(user: VirtualUser) -> Request:
+    return Request("GET /health", "GET", "/health")
+
+
+def create_item(user: VirtualUser) -> Request:
+    def remember(status: int, body: Any) -> None:
+        if status == 201:
+            user.created.append(body["id"])
+
+    return Request(
+        "POST /api/v1/items/",
+        "POST",
+        "/api/v1/items/",
+        json={"name": user.item_name(), "description": "Created by the load test"},
+        on_response=remember,
+    )
+
+
+def update_item(user: VirtualUser) -> Request:
+    return Request(
+        "PATCH /api/v1/items/{id}",
+        "PATCH",
+        f"/api/v1/items/{user.seeded_item()}",
+        json={"name": user.item_name(), "is_active": user.rng.random() >= 0.1},
+    )
+
+
+def delete_item(user: VirtualUser) -> Request:
+    if not user.created:
+        return create_item(user)
+    item_id = user.created.pop(user.rng.randrange(len(user.created)))
+    return Request("DELETE /api/v1/items/{id}", "DELETE", f"/api/v1/items/{item_id}")
+
+
+WORKLOADS: dict[str, list[tuple[Operation, int]]] = {
+    "auth": [(me, 1)],
+    "read": [(list_items, 45), (get_item, 45), (item_stats, 5), (me, 5)],
+    "write": [(create_item, 40), (update_item, 35), (delete_item, 15), (get_item, 10)],
+    "mixed": [
+        (list_items, 30),
+        (get_item, 35),
+        (item_stats, 5),
+        (me, 10),
+        (create_item, 10),
+        (update_item, 7),
+        (delete_item, 3),
+    ],
+    # Auth, item and health routes, for fault scenarios
+    "resilience": [
+        (me, 25),
+        (list_items, 20),
+        (get_item, 25),
+        (create_item, 10),
+        (update_item, 5),
+        (health, 15),
+    ],
+}
+
+
+def chooser(workload: str) -> Callable[[random.Random], Operation]:
+    operations, weights = zip(*WORKLOADS[workload], strict=True)
+
+    def choose(rng: random.Random) -> Operation:
+        return rng.choices(operations, weights)[0]
+
+    return choose
@@ -0,0 +1,425 @@
+"""Per-request hot path micro-benchmarks.
+
+Times the functions that run on every request in isolation and records ops/sec
+and memory allocated per call, so small regressions show up before they are
+lost in end-to-end noise.
+
+Usage:
+    python -m benchmarks.micro --out benchmarks/results/micro.json
+    python -m benchmarks.micro --compare benchmarks/results/micro.json --threshold 0.1
+    python -m benchmarks.micro --filter middleware
+
+Each benchmark is calibrated to run for about ``--min-time`` seconds per repeat
+and reports the best repeat (least disturbed by the rest of the machine).
+Allocations are measured in a separate, untimed pass with ``tracemalloc``: the
+peak bytes allocated during one call and the bytes still held after it.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from fastapi.exceptions import RequestValidationError
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.deps import get_auth_ticket
+from app.core.auth_ticket import (
+    TICKET_COOKIE,
+    AuthTicket,
+    encode_ticket,
+    session_fingerprint,
+    ticket_epoch,
+)
+from app.core.compression_middleware import CompressionMiddleware
+from app.core.config import settings
+from app.core.error_handlers import _create_error_response, validation_exception_handler
+from app.core.logging_config import JsonFormatter
+from app.core.logging_middleware import LoggingMiddleware
+from app.core.security_headers import SecurityHeadersMiddleware
+from app.core.size_limit_middleware import RequestSizeLimitMiddleware
+from app.db.models.item import Item
+from app.schemas.item import ItemResponse
+from app.services.cache_service import SessionCache
+from app.services.usage import UsageMeter
+
+Benchmark = Callable[[], Any] | Callable[[], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    func: Benchmark
+    is_async: bool
+
+
+CASES: list[Case] = []
+
+
+def bench(name: str, is_async: bool = False) -> Callable[[Benchmark], Benchmark]:
+    def decorator(func: Benchmark) -> Benchmark:
+        CASES.append(Case(name, func, is_async))
+        return func
+
+    return decorator
+
+
+# --- Fixtures ----------------------------------------------------------------
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+TOKEN = "Y2E3ZjQxNmUtNWI2Zi00ZTJmLWE4YjQtZDI2ZjA0NjI5OWNh.c2lnbmF0dXJl"
+RESPONSE_BODY = json.dumps(
+    [{"id": str(n), "name": f"Item {n}", "is_active": True} for n in range(20)]
+).encode()
+
+
+def request_scope(path: str = "/api/v1/items/", forwarded: bool = True) -> Scope:
+    headers = [
+        (b"host", b"api.example.com"),
+        (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101 Firefox/128.0"),
+        (b"accept", b"application/json"),
+        (b"accept-encoding", b"gzip, deflate, br, zstd"),
+        (b"cookie", f"better-auth.session_token={TOKEN}".encode()),
+        (b"origin", b"http://localhost:5173"),
+    ]
+    if forwarded:
+        headers.append((b"x-forwarded-for", b"203.0.113.7, 10.0.0.2"))
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "https",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"limit=20",
+        "headers": headers,
+        "client": ("10.0.0.2", 51234),
+        "server": ("10.0.0.1", 8000),
+    }
+
+
+def log_record() -> logging.LogRecord:
+    record = logging.LogRecord(
+        "saas_starter", logging.INFO, __file__, 0, "Request completed", None, None
+    )
+    record.__dict__.update(
+        method="GET",
+        path="/api/v1/items/",
+        status_code=200,
+        duration_ms=3.42,
+        client_ip="203.0.113.7",
+    )
+    return record
+
+
+async def noop_app(scope: Scope, receive: Receive, send: Send) -> None:
+    """Innermost app for middleware benchmarks: a 200 JSON response."""
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(RESPONSE_BODY)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": RESPONSE_BODY})
+
+
+async def receive_empty() -> Message:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def discard(message: Message) -> None:
+    pass
+
+
+def asgi_call(app: ASGIApp) -> Callable[[], Awaitable[None]]:
+    scope = request_scope()
+
+    async def call() -> None:
+        # Middlewares may annotate the scope, so every request gets a fresh copy
+        await app(dict(scope), receive_empty, discard)
+
+    return call
+
+
+# --- Benchmarks --------------------------------------------------------------
+
+formatter = JsonFormatter()
+record = log_record()
+bench("logging.JsonFormatter.format")(lambda: formatter.format(record))
+
+logging_middleware = LoggingMiddleware(noop_app)
+forwarded_scope = request_scope()
+direct_scope = request_scope(forwarded=False)
+bench("logging_middleware._get_client_ip[forwarded]")(
+    lambda: logging_middleware._get_client_ip(Request(forwarded_scope))
+)
+bench("logging_middleware._get_client_ip[direct]")(
+    lambda: logging_middleware._get_client_ip(Request(direct_scope))
+)
+
+session_cache = SessionCache(redis=None)  # type: ignore[arg-type]
+bench("session_cache._hash")(lambda: session_cache._hash(TOKEN))
+bench("session_cache.key")(lambda: f"session:{session_cache._hash(TOKEN)}")
+
+# Local ticket verification replaces the Redis + Postgres session lookup
+ticket_epoch.current = 0
+ticket = AuthTicket(
+    "bench-user", "user", False, "pro", int(time.time()) + 86_400, 0, session_fingerprint(TOKEN)
+)
+ticket_scope = request_scope()
+ticket_scope["headers"] = [
+    (name, value + f"; {TICKET_COOKIE}={encode_ticket(ticket, settings.secret_key)}".encode())
+    if name == b"cookie"
+    else (name, value)
+    for name, value in ticket_scope["headers"]
+]
+bench("auth_ticket.encode_ticket")(lambda: encode_ticket(ticket, settings.secret_key))
+bench("deps.get_auth_ticket", is_async=True)(lambda: get_auth_ticket(Request(ticket_scope)))
+
+meter = UsageMeter(flush_interval=5.0)
+bench("usage.UsageMeter.record")(lambda: meter.record("bench-user"))
+
+bench("error_handlers._create_error_response")(
+    lambda: _create_error_response(404, "Item not found", "/api/v1/items/abc")
+)
+validation_error = RequestValidationError(
+    [
+        {"loc": ("body", "name"), "msg": "Field required", "type": "missing"},
+        {
+            "loc": ("query", "limit"),
+            "msg": "Input should be less than or equal to 1000",
+            "type": "less_than_equal",
+        },
+    ]
+)
+validation_request = Request(request_scope())
+bench("error_handlers.validation_exception_handler", is_async=True)(
+    lambda: validation_exception_handler(validation_request, validation_error)
+)
+
+item = Item(
+    id="5b0f4e6a-3f5c-4d2e-9a51-0c0f6c5f1a2b",
+    name="Blue widget",
+    description="A synthetic item used to benchmark response validation",
+    owner_id="bench-user",
+    is_active=True,
+    created_at=NOW,
+    updated_at=NOW,
+    version=1,
+)
+bench("schemas.ItemResponse.model_validate")(lambda: ItemResponse.model_validate(item))
+bench("schemas.ItemResponse.model_validate+dump_json")(
+    lambda: ItemResponse.model_validate(item).model_dump_json()
+)
+
+MIDDLEWARES: dict[str, ASGIApp] = {
+    "none": noop_app,
+    "LoggingMiddleware": LoggingMiddleware(noop_app),
+    "SecurityHeadersMiddleware": SecurityHeadersMiddleware(noop_app),
+    "RequestSizeLimitMiddleware": RequestSizeLimitMiddleware(noop_app, max_size=10 * 1024 * 1024),
+    "CompressionMiddleware": CompressionMiddleware(noop_app, minimum_size=1024),
+    "CORSMiddleware": CORSMiddleware(
+        noop_app,
+        allow_origins=["http://localhost:5173"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    ),
+}
+for middleware_name, middleware in MIDDLEWARES.items():
+    bench(f"middleware[{middleware_name}]", is_async=True)(asgi_call(middleware))
+
+
+# --- Runner ------------------------------------------------------------------
+
+
+def _time_sync(func: Callable[[], Any], iterations: int) -> int:
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        func()
+    return time.perf_counter_ns() - started
+
+
+async def _time_async(func: Callable[[], Awaitable[Any]], iterations: int) -> int:
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        await func()
+    return time.perf_counter_ns() - started
+
+
+def _run(case: Case, iterations: int, loop: asyncio.AbstractEventLoop) -> int:
+    if case.is_async:
+        return loop.run_until_complete(_time_async(case.func, iterations))
+    return _time_sync(case.func, iterations)
+
+
+def measure_time(
+    case: Case, loop: asyncio.AbstractEventLoop, min_time: float, repeat: int
+) -> dict[str, float]:
+    # Double the iterations until one repeat takes at least min_time
+    iterations = 1
+    while _run(case, iterations, loop) < min_time * 1e9 / 10:
+        iterations *= 2
+    iterations *= 10
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        timings = [_run(case, iterations, loop) / iterations for _ in range(repeat)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    best = min(timings)
+    return {
+        "ops_per_sec": round(1e9 / best, 1),
+        "ns_per_op": round(best, 1),
+        "ns_per_op_median": round(sorted(timings)[len(timings) // 2], 1),
+        "iterations": iterations,
+    }
+
+
+def measure_allocations(
+    case: Case, loop: asyncio.AbstractEventLoop, calls: int = 200
+) -> dict[str, float]:
+    for _ in range(10):
+        _run(case, 1, loop)  # warm caches so one-time allocations are not counted
+    peaks = []
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            _run(case, 1, loop)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - start)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_bytes_per_call": round(sum(peaks) / calls, 1),
+        "retained_bytes_per_call": round(max(after - before, 0) / calls, 1),
+    }
+
+
+def run(cases: list[Case], min_time: float, repeat: int) -> dict[str, Any]:
+    results = {}
+    loop = asyncio.new_event_loop()
+    try:
+        for case in cases:
+            result = {
+                **measure_time(case, loop, min_time, repeat),
+                **measure_allocations(case, loop),
+            }
+            results[case.name] = result
+            print(
+                f"{case.name:<52} {result['ops_per_sec']:>14,.0f} ops/s "
+                f"{result['ns_per_op']:>10,.0f} ns "
+                f"{result['alloc_bytes_per_call']:>9,.0f} B/call"
+            )
+    finally:
+        loop.close()
+    return {
+        "meta": {
+            "started_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "min_time_s": min_time,
+            "repeat": repeat,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    """Print changes against ``baseline``; returns the benchmarks that regressed.
+
+    A benchmark regresses when its ops/sec drops, or its allocated bytes per call
+    grow, by more than ``threshold`` (a fraction, e.g. 0.1 for 10%).
+    """
+    regressions = []
+    print(f"\n{'benchmark':<52} {'ops/sec':>28} {'bytes/call':>24}")
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            print(f"{name:<52} (not in baseline)")
+            continue
+        speed = result["ops_per_sec"] / before["ops_per_sec"] - 1
+        allocs = (
+            result["alloc_bytes_per_call"] / before["alloc_bytes_per_call"] - 1
+            if before["alloc_bytes_per_call"]
+            else 0.0
+        )
+        flags = []
+        if -speed > threshold:
+            flags.append("slower")
+        if allocs > threshold:
+            flags.append("allocates more")
+        if flags:
+            regressions.append(f"{name}: {', '.join(flags)}")
+        print(
+            f"{name:<52} {before['ops_per_sec']:>11,.0f}->{result['ops_per_sec']:<11,.0f}"
+            f"{speed:>+6.0%} {before['alloc_bytes_per_call']:>7,.0f}->"
+            f"{result['alloc_bytes_per_call']:<7,.0f}{allocs:>+6.0%} {' '.join(flags)}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", help="Only run benchmarks whose name matches this regex")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed repeat")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per benchmark")
+    parser.add_argument("--out", type=Path, help="Write results as JSON here")
+    parser.add_argument("--compare", type=Path, help="Baseline results to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Regression threshold as a fraction"
+    )
+    args = parser.parse_args()
+
+    # Keep request logging in the measurement but not on the terminal
+    handlers = [h for h in logging.getLogger().handlers if isinstance(h, logging.StreamHandler)]
+    with open(os.devnull, "w") as devnull:
+        streams = [handler.setStream(devnull) for handler in handlers]
+        try:
+            cases = [case for case in CASES if not args.filter or re.search(args.filter, case.name)]
+            results = run(cases, args.min_time, args.repeat)
+        finally:
+            for handler, stream in zip(handlers, streams, strict=True):
+                handler.setStream(stream)
+
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nwrote {args.out}")
+    if args.compare is not None:
+        regressions = compare(json.loads(args.compare.read_text()), results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
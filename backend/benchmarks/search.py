@@ -0,0 +1,157 @@
+"""Item search benchmark.
+
+Seeds a single owner with a large synthetic item set and compares the indexed
+search query used by ``GET /api/v1/items/search`` against an ILIKE scan.
+
+Usage:
+    python -m benchmarks.search --rows 2000000 --queries "blue widget" "gadjet"
+
+Run against a disposable database: the benchmark owner and its items are
+created on first run and reused afterwards (``--reseed`` recreates them).
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.models.item import Item
+from app.db.session import engine
+from app.services.item_search import SearchCursor, build_item_search_query
+
+OWNER_ID = "bench-search-owner"
+WORDS = (
+    "alpha blue bronze cobalt copper crimson delta echo emerald gadget gizmo golden "
+    "green indigo ivory jade lunar matrix nova orbit pixel quartz ruby sensor silver "
+    "solar sprocket titan vector violet widget"
+).split()
+
+SEED_SQL = """
+INSERT INTO items (id, name, description, owner_id, is_active, created_at, updated_at)
+SELECT
+    md5(:owner_id || n::text),
+    initcap(words[1 + (n * 7) % cardinality(words)]) || ' ' ||
+        words[1 + (n * 13) % cardinality(words)] || ' ' || n::text,
+    'Synthetic ' || words[1 + (n * 17) % cardinality(words)] || ' ' ||
+        words[1 + (n * 19) % cardinality(words)] || ' item for benchmarking search',
+    :owner_id,
+    n % 10 <> 0,
+    now(),
+    now()
+FROM generate_series(CAST(:start AS bigint), CAST(:stop AS bigint)) AS n,
+     (SELECT CAST(:words AS text[]) AS words) AS vocabulary
+"""
+
+
+async def seed(conn: AsyncConnection, rows: int, batch_size: int, reseed: bool) -> None:
+    if reseed:
+        await conn.execute(
+            text("DELETE FROM items WHERE owner_id = :owner_id"), {"owner_id": OWNER_ID}
+        )
+    now = datetime.utcnow()
+    await conn.execute(
+        text(
+            'INSERT INTO "user" (id, name, email, email_verified, created_at, updated_at, banned) '
+            "VALUES (:id, 'Search Bench', :email, true, :now, :now, false) "
+            "ON CONFLICT (id) DO NOTHING"
+        ),
+        {"id": OWNER_ID, "email": f"{OWNER_ID}@example.com", "now": now},
+    )
+    existing = await conn.scalar(select(func.count()).where(Item.owner_id == OWNER_ID))
+    for start in range(existing + 1, rows + 1, batch_size):
+        stop = min(start + batch_size - 1, rows)
+        await conn.execute(
+            text(SEED_SQL),
+            {"owner_id": OWNER_ID, "start": start, "stop": stop, "words": WORDS},
+        )
+        await conn.commit()
+        print(f"seeded {stop:,}/{rows:,} rows")
+    await conn.execute(text("ANALYZE items"))
+    await conn.commit()
+
+
+async def time_query(conn: AsyncConnection, statement, repeat: int) -> tuple[list[float], int]:
+    timings = []
+    count = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await conn.execute(statement)
+        count = len(result.all())
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, count
+
+
+def summarize(label: str, timings: list[float], count: int) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"  {label:<24} rows={count:<4} p50={statistics.median(ordered):8.2f}ms "
+        f"p95={p95:8.2f}ms max={ordered[-1]:8.2f}ms"
+    )
+
+
+async def explain(conn: AsyncConnection, statement) -> None:
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {compiled}")
+    for (line,) in result:
+        print(f"    {line}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with engine.connect() as conn:
+        await seed(conn, args.rows, args.batch_size, args.reseed)
+
+        for query in args.queries:
+            print(f"\nquery={query!r}")
+            first_page = build_item_search_query(OWNER_ID, query, args.limit)
+            timings, count = await time_query(conn, first_page, args.repeat)
+            summarize("indexed first page", timings, count)
+
+            rows = (await conn.execute(first_page)).all()
+            if rows:
+                after = SearchCursor(rank=rows[-1].rank, item_id=rows[-1].id)
+                next_page = build_item_search_query(OWNER_ID, query, args.limit, after)
+                timings, count = await time_query(conn, next_page, args.repeat)
+                summarize("indexed next page", timings, count)
+
+            pattern = f"%{query}%"
+            ilike = (
+                select(Item)
+                .where(
+                    Item.owner_id == OWNER_ID,
+                    Item.name.ilike(pattern) | Item.description.ilike(pattern),
+                )
+                .limit(args.limit)
+            )
+            timings, count = await time_query(conn, ilike, args.repeat)
+            summarize("ILIKE scan", timings, count)
+
+            if args.explain:
+                await explain(conn, first_page)
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Items to seed")
+    parser.add_argument("--batch-size", type=int, default=250_000, help="Rows per seed batch")
+    parser.add_argument("--reseed", action="store_true", help="Delete and reseed bench items")
+    parser.add_argument("--limit", type=int, default=20, help="Page size")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--explain", action="store_true", help="Print EXPLAIN ANALYZE output")
+    parser.add_argument(
+        "--queries",
+        nargs="+",
+        default=["blue widget", "sprocket", "gadjet", "quartz nova"],
+        help="Search strings (include typos to exercise trigram matching)",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
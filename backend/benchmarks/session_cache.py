@@ -0,0 +1,98 @@
+"""Session cache layout benchmark.
+
+Caches the same synthetic sessions with each ``SESSION_CACHE_LAYOUT`` and
+reports the Redis memory they take, scaled to a million sessions, and the
+latency of ``SessionCache.get_user_id``.
+
+Usage:
+    python -m benchmarks.session_cache --sessions 1000000 --db 15
+
+Run against a scratch Redis database: ``--db`` is flushed before each layout.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.services.cache_service import SET_BUCKET_FIELD_SCRIPT, SessionCache
+
+LAYOUTS = ("keys", "buckets")
+# Far enough out that nothing expires while the benchmark runs
+TTL = 3600
+
+
+def token(n: int) -> str:
+    return f"bench-session-{n}"
+
+
+async def populate(redis: Redis, cache: SessionCache, sessions: int, batch_size: int) -> None:
+    set_field = redis.register_script(SET_BUCKET_FIELD_SCRIPT)
+    expires_at = int(time.time()) + TTL
+    for start in range(0, sessions, batch_size):
+        async with redis.pipeline(transaction=False) as pipe:
+            for n in range(start, min(start + batch_size, sessions)):
+                token_hash = cache._hash(token(n))
+                if cache.layout == "keys":
+                    pipe.setex(f"session:{token_hash}", TTL, f"user-{n}")
+                    continue
+                bucket, field = cache._bucket(token_hash)
+                await set_field(
+                    keys=[bucket],
+                    args=[field, f"{expires_at}:user-{n}", expires_at, int(time.time())],
+                    client=pipe,
+                )
+            await pipe.execute()
+
+
+async def time_reads(cache: SessionCache, sessions: int, reads: int) -> list[float]:
+    timings = []
+    for n in random.sample(range(sessions), min(reads, sessions)):
+        started = time.perf_counter()
+        assert await cache.get_user_id(token(n)) == f"user-{n}"
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(layout: str, memory: int, sessions: int, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    per_million = memory / sessions * 1_000_000 / 2**20
+    print(
+        f"  {layout:<8} memory={per_million:8.1f}MiB/1M sessions "
+        f"({memory / sessions:6.1f}B each) get p50={statistics.median(ordered):6.3f}ms "
+        f"p99={p99:6.3f}ms"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    redis = Redis.from_url(args.redis_url, db=args.db, decode_responses=True)
+    print(f"sessions={args.sessions:,}")
+    for layout in LAYOUTS:
+        await redis.flushdb()
+        cache = SessionCache(redis, layout=layout, dual_read=False)
+        before = (await redis.info("memory"))["used_memory"]
+        await populate(redis, cache, args.sessions, args.batch_size)
+        memory = (await redis.info("memory"))["used_memory"] - before
+        timings = await time_reads(cache, args.sessions, args.reads)
+        summarize(layout, memory, args.sessions, timings)
+    await redis.flushdb()
+    await redis.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1_000_000, help="Sessions to cache")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Writes per pipeline")
+    parser.add_argument("--reads", type=int, default=5_000, help="Timed lookups per layout")
+    parser.add_argument("--redis-url", default=settings.redis_url, help="Redis server")
+    parser.add_argument("--db", type=int, default=15, help="Scratch database (flushed)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
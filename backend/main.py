@@ -1,9 +1,13 @@
+import asyncio
+import contextlib
 from datetime import datetime
 from typing import Any, cast
 
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from redis.exceptions import RedisError
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from slowapi.extension import _rate_limit_exceeded_handler
@@ -12,8 +16,12 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.types import ExceptionHandler
 
-from app.api.v1 import auth, items
+from app.api.deps import SESSION_COOKIE
+from app.api.v1 import auth, items, usage
+from app.core.admission_middleware import AdmissionControlMiddleware
+from app.core.auth_ticket import ticket_epoch
 from app.core.cache import close_redis, get_redis, init_redis
+from app.core.compression_middleware import CompressionMiddleware
 from app.core.config import settings
 from app.core.error_handlers import (
     AppException,
@@ -23,12 +31,22 @@ from app.core.error_handlers import (
     sqlalchemy_exception_handler,
     validation_exception_handler,
 )
+from app.core.idempotency_middleware import IdempotencyMiddleware
+from app.core.job_queue import drain_pending_enqueues
 from app.core.limiter import limiter
+from app.core.log_throttle import exception_log
+from app.core.logging_config import logger
 from app.core.logging_middleware import LoggingMiddleware
+from app.core.loop_watchdog import watchdog
+from app.core.metrics import publish_snapshot, read_snapshots, registry
 from app.core.response_cache import cache_response
 from app.core.security_headers import SecurityHeadersMiddleware
 from app.core.size_limit_middleware import RequestSizeLimitMiddleware
 from app.db.session import get_db
+from app.db.shards import shard_router
+from app.services.item_events import broker as item_event_broker
+from app.services.session_filter import session_filter
+from app.services.usage import usage_meter
 
 app = FastAPI(
     title="SaaS Starter API",
@@ -38,6 +56,16 @@ app = FastAPI(
     openapi_url="/openapi.json" if settings.debug else None,
 )
 
+# Shed first when the worker is overloaded; health, auth and writes are never shed
+LOW_PRIORITY_ROUTES = (
+    ("GET", "/api/v1/items/"),
+    ("GET", "/api/v1/items/search"),
+    ("GET", "/api/v1/items/stats"),
+    ("POST", "/api/v1/items/exports"),
+    ("GET", "/api/v1/items/exports/*"),
+    ("GET", "/api/v1/usage"),
+)
+
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, cast(ExceptionHandler, _rate_limit_exceeded_handler))
 app.add_exception_handler(HTTPException, cast(ExceptionHandler, http_exception_handler))
@@ -49,9 +77,21 @@ app.add_exception_handler(AppException, cast(ExceptionHandler, app_exception_han
 app.add_exception_handler(Exception, cast(ExceptionHandler, generic_exception_handler))
 
 app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(
+    IdempotencyMiddleware,
+    path_prefixes=("/api/v1/items",),
+    session_cookie=SESSION_COOKIE,
+    max_body_size=settings.max_request_size,
+)
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(RequestSizeLimitMiddleware, max_size=settings.max_request_size)
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_size=settings.max_request_size,
+    path_limits={"/api/v1/items/import": settings.import_max_size},
+)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
+app.add_middleware(AdmissionControlMiddleware, low_priority=LOW_PRIORITY_ROUTES)
 
 app.add_middleware(
     CORSMiddleware,
@@ -59,21 +99,54 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "Idempotent-Replayed", "Retry-After"],
 )
 
 
+METRICS_PUBLISH_INTERVAL = 10.0
+
+
+async def publish_metrics_forever() -> None:
+    """Share this worker's metrics so /metrics on any worker reports every worker."""
+    while True:
+        try:
+            await publish_snapshot(await get_redis())
+        except RedisError as exc:
+            logger.warning("Failed to publish metrics", extra={"error": str(exc)})
+        await asyncio.sleep(METRICS_PUBLISH_INTERVAL)
+
+
 @app.on_event("startup")
 async def on_startup() -> None:
     await init_redis()
+    await watchdog.start(debug=settings.loop_debug)
+    await exception_log.start()
+    await session_filter.start()
+    await ticket_epoch.start()
+    await usage_meter.start()
+    await shard_router.start()
+    app.state.metrics_publisher = asyncio.create_task(publish_metrics_forever())
 
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
+    app.state.metrics_publisher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.metrics_publisher
+    await session_filter.close()
+    await ticket_epoch.close()
+    await item_event_broker.close()
+    await shard_router.close()
+    await usage_meter.close()
+    await drain_pending_enqueues()
     await close_redis()
+    await exception_log.close()
+    await watchdog.stop()
 
 
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(items.router, prefix="/api/v1")
+app.include_router(usage.router, prefix="/api/v1")
 
 
 @app.get("/health")
@@ -89,3 +162,15 @@ async def health_check(db: AsyncSession = Depends(get_db)) -> dict[str, str]:
         "redis": "connected",
         "timestamp": datetime.utcnow().isoformat(),
     }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Expose metrics in the Prometheus text format, including the job workers'."""
+    snapshots = []
+    try:
+        await registry.collect()
+        snapshots = await read_snapshots(await get_redis())
+    except RedisError as exc:
+        logger.warning("Serving local metrics only", extra={"error": str(exc)})
+    return PlainTextResponse(registry.render(snapshots), media_type="text/plain; version=0.0.4")
@@ -3,10 +3,12 @@ from datetime import datetime, timedelta
 import pytest_asyncio
 from httpx import AsyncClient
 from redis.asyncio import Redis
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from testcontainers.postgres import PostgresContainer
 from testcontainers.redis import RedisContainer
 
+import app.core.cache as cache
 from app.core.cache import get_redis
 from app.db.base import Base
 from app.db.models.auth import Session, User
@@ -36,6 +38,19 @@ async def async_engine(postgres_container: PostgresContainer):
     await engine.dispose()
 
 
+@pytest_asyncio.fixture
+def statements(async_engine) -> list[str]:
+    """SQL statements sent to the database while the test runs."""
+    executed: list[str] = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
 @pytest_asyncio.fixture
 async def db_session(async_engine) -> AsyncSession:
     session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
@@ -55,7 +70,7 @@ async def redis_client(redis_container: RedisContainer) -> Redis:
 
 
 @pytest_asyncio.fixture
-async def client(db_session: AsyncSession, redis_client: Redis) -> AsyncClient:
+async def client(db_session: AsyncSession, redis_client: Redis, monkeypatch) -> AsyncClient:
     async def override_get_db():
         yield db_session
 
@@ -64,11 +79,19 @@ async def client(db_session: AsyncSession, redis_client: Redis) -> AsyncClient:
 
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[get_redis] = override_get_redis
+    # Cached responses go through the binary client, which is not a dependency
+    binary_redis = Redis(
+        **redis_client.connection_pool.connection_kwargs | {"decode_responses": False}
+    )
+    monkeypatch.setattr(cache, "binary_redis_client", binary_redis)
 
     async with AsyncClient(app=app, base_url="http://test") as http_client:
         yield http_client
 
     app.dependency_overrides.clear()
+    # Responses cached for the shared test user must not leak into the next test
+    await binary_redis.flushdb()
+    await binary_redis.aclose()
 
 
 @pytest_asyncio.fixture
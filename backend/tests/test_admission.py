@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.admission_middleware import SHED_MESSAGE, requests_shed
+from app.core.config import settings
+from app.db.pool import PoolWaitTracker, TimedQueuePool, pool_wait
+from app.db.session import get_db
+from main import app
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def idle_pool():
+    pool_wait.reset()
+    yield
+    pool_wait.reset()
+
+
+def _shed(reason: str) -> float:
+    return requests_shed.values.get((reason,), 0)
+
+
+@pytest.mark.asyncio
+async def test_pool_wait_counts_queued_checkouts(async_engine):
+    engine = create_async_engine(
+        async_engine.url, poolclass=TimedQueuePool, pool_size=1, max_overflow=0
+    )
+    try:
+        async with engine.connect():
+            queued = asyncio.create_task(engine.connect().start())
+            await asyncio.sleep(0.1)
+            assert pool_wait.seconds() >= 0.1
+        connection = await queued
+        await connection.close()
+        assert pool_wait.seconds() > 0
+    finally:
+        await engine.dispose()
+
+
+def test_pool_wait_fades_once_checkouts_stop_waiting():
+    tracker = PoolWaitTracker(smoothing=1.0, half_life=0.01)
+    started = tracker.begin()
+    time.sleep(0.05)
+    assert tracker.seconds() >= 0.05
+    tracker.end(started)
+
+    time.sleep(0.05)
+    assert tracker.seconds() < 0.01
+
+
+@pytest.mark.asyncio
+async def test_low_priority_requests_shed_on_pool_wait(client, auth_user, monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_pool_wait", 0.05)
+    client.cookies.set("better-auth.session_token", "valid-token")
+    before = _shed("pool_wait")
+
+    started = pool_wait.begin()
+    await asyncio.sleep(0.06)
+    try:
+        response = await client.get("/api/v1/items/")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(settings.admission_retry_after)
+        assert response.json()["error"]["message"] == SHED_MESSAGE
+        response = await client.post("/api/v1/items/exports", json={})
+        assert response.status_code == 503
+        assert _shed("pool_wait") == before + 2
+
+        # The priority lane is never shed
+        assert (await client.post("/api/v1/items/", json={"name": "Kept"})).status_code == 201
+        assert (await client.get("/api/v1/users/me")).status_code == 200
+        assert (await client.get("/health")).status_code != 503
+    finally:
+        pool_wait.end(started)
+
+
+@pytest.mark.asyncio
+async def test_low_priority_requests_shed_on_in_flight(client, db_session, auth_user, monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_in_flight", 1)
+    client.cookies.set("better-auth.session_token", "valid-token")
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_get_db():
+        entered.set()
+        await release.wait()
+        yield db_session
+
+    app.dependency_overrides[get_db] = slow_get_db
+    before = _shed("in_flight")
+    write = asyncio.create_task(client.post("/api/v1/items/", json={"name": "Slow"}))
+    await entered.wait()
+
+    response = await client.get("/api/v1/items/search", params={"q": "slow"})
+    assert response.status_code == 503
+    assert _shed("in_flight") == before + 1
+
+    release.set()
+    assert (await write).status_code == 201
+    assert (await client.get("/api/v1/items/")).status_code == 200
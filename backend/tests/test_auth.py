@@ -1,8 +1,10 @@
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 
 import pytest
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.db.models.auth import Session, User
+from app.services.cache_service import SessionCache
 
 
 @pytest.mark.asyncio
@@ -55,3 +57,20 @@ async def test_get_current_user_expired_session(client, db_session):
     response = await client.get("/api/v1/users/me")
 
     assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_session_cache_ttl_follows_session_expiry(
+    client, db_session, auth_user, redis_client
+):
+    session = await db_session.get(Session, "test-session")
+    # Postgres loads the timestamptz expires_at as an aware datetime
+    set_committed_value(session, "expires_at", datetime.now(UTC) + timedelta(minutes=10))
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.get("/api/v1/users/me")
+
+    assert response.status_code == 200
+    cache = SessionCache(redis_client)
+    assert await cache.get_user_id("valid-token") == auth_user.id
+    assert 590 <= await redis_client.ttl(f"session:{cache._hash('valid-token')}") <= 600
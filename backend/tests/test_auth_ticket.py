@@ -0,0 +1,134 @@
+import time
+
+import pytest
+import pytest_asyncio
+from fastapi import Response
+from sqlalchemy import event
+
+from app.api.deps import TicketIssuer
+from app.core.auth_ticket import (
+    TICKET_COOKIE,
+    AuthTicket,
+    encode_ticket,
+    revoke_all,
+    session_fingerprint,
+    ticket_epoch,
+    verify_ticket,
+)
+from app.core.config import settings
+from app.core.subscription_middleware import get_active_subscription
+from app.db.models.subscription import Subscription
+
+SECRET = "test-secret"
+
+
+def _ticket(**overrides) -> AuthTicket:
+    fields = {
+        "user_id": "test-user",
+        "role": "user",
+        "banned": False,
+        "plan": "pro",
+        "expires_at": int(time.time()) + 60,
+        "epoch": 0,
+        "session": session_fingerprint("valid-token"),
+    }
+    return AuthTicket(**{**fields, **overrides})
+
+
+class TestVerifyTicket:
+    def test_round_trip(self):
+        value = encode_ticket(_ticket(), SECRET)
+        assert verify_ticket(value, "valid-token", SECRET, 0, time.time()) == _ticket()
+
+    def test_rejects_tampered_payload(self):
+        forged = encode_ticket(_ticket(user_id="someone-else"), SECRET).split(".")[0]
+        signature = encode_ticket(_ticket(), SECRET).split(".")[1]
+        assert verify_ticket(f"{forged}.{signature}", "valid-token", SECRET, 0, time.time()) is None
+
+    def test_rejects_other_secret(self):
+        value = encode_ticket(_ticket(), "other-secret")
+        assert verify_ticket(value, "valid-token", SECRET, 0, time.time()) is None
+
+    def test_rejects_expired(self):
+        value = encode_ticket(_ticket(expires_at=int(time.time()) - 1), SECRET)
+        assert verify_ticket(value, "valid-token", SECRET, 0, time.time()) is None
+
+    def test_rejects_revoked_epoch(self):
+        value = encode_ticket(_ticket(epoch=0), SECRET)
+        assert verify_ticket(value, "valid-token", SECRET, 1, time.time()) is None
+
+    def test_rejects_other_session(self):
+        value = encode_ticket(_ticket(), SECRET)
+        assert verify_ticket(value, "another-token", SECRET, 0, time.time()) is None
+
+    def test_rejects_garbage(self):
+        assert verify_ticket("not-a-ticket", "valid-token", SECRET, 0, time.time()) is None
+
+
+@pytest_asyncio.fixture
+async def epoch(redis_client):
+    await ticket_epoch.refresh(redis_client)
+    yield ticket_epoch
+    ticket_epoch.current = None
+
+
+@pytest.mark.asyncio
+async def test_subscription_lookup_issues_ticket(db_session, auth_user, epoch):
+    response = Response()
+    issuer = TicketIssuer(response, "valid-token", epoch.current)
+
+    assert await get_active_subscription(db_session, auth_user, None, issuer) is None
+
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{TICKET_COOKIE}=")
+    assert "HttpOnly" in cookie
+    value = cookie.split(";")[0].split("=", 1)[1]
+    ticket = verify_ticket(value, "valid-token", settings.secret_key, epoch.current, time.time())
+    assert ticket is not None
+    assert ticket.user_id == auth_user.id
+    assert ticket.plan is None
+
+
+@pytest.mark.asyncio
+async def test_ticket_answers_subscription_without_query(db_session):
+    ticket = _ticket(plan="pro")
+    subscription = await get_active_subscription(db_session, None, ticket, None)
+
+    assert isinstance(subscription, Subscription)
+    assert subscription.plan == "pro"
+    assert await get_active_subscription(db_session, None, _ticket(plan=None), None) is None
+
+
+@pytest.mark.asyncio
+async def test_valid_ticket_skips_session_lookup(client, async_engine, auth_user, epoch):
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    ticket = encode_ticket(_ticket(epoch=epoch.current), settings.secret_key)
+    client.cookies.set("better-auth.session_token", "valid-token")
+    client.cookies.set(TICKET_COOKIE, ticket)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = await client.get("/api/v1/items/stats")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert not [s for s in statements if "session" in s]
+
+
+@pytest.mark.asyncio
+async def test_revoked_ticket_falls_back_to_session(client, redis_client, auth_user, epoch):
+    ticket = encode_ticket(_ticket(user_id="ghost", epoch=epoch.current), settings.secret_key)
+    client.cookies.set("better-auth.session_token", "valid-token")
+    client.cookies.set(TICKET_COOKIE, ticket)
+
+    await revoke_all(redis_client)
+    await epoch.refresh(redis_client)
+    response = await client.get("/api/v1/users/me")
+
+    # The revoked ticket named another user; the session lookup wins
+    assert response.status_code == 200
+    assert response.json()["id"] == auth_user.id
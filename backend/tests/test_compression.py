@@ -0,0 +1,79 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app.core.compression_middleware import CompressionMiddleware, negotiate_encoding
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large() -> list[dict[str, int]]:
+        return [{"index": index} for index in range(500)]
+
+    @app.get("/small")
+    async def small() -> dict[str, int]:
+        return {"index": 1}
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            for _ in range(4):
+                yield b"chunk" * 200
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return app
+
+
+class TestNegotiateEncoding:
+    def test_prefers_supported_encoding(self):
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+
+    def test_respects_zero_quality(self):
+        assert negotiate_encoding("gzip;q=0, identity") is None
+
+    def test_returns_none_without_header(self):
+        assert negotiate_encoding("") is None
+
+
+class TestCompressionMiddleware:
+    @pytest.mark.asyncio
+    async def test_compresses_large_body(self):
+        async with AsyncClient(
+            transport=ASGITransport(app=_build_app()), base_url="http://test"
+        ) as client:
+            response = await client.get("/large", headers={"accept-encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(response.content)
+
+    @pytest.mark.asyncio
+    async def test_skips_small_body(self):
+        async with AsyncClient(
+            transport=ASGITransport(app=_build_app()), base_url="http://test"
+        ) as client:
+            response = await client.get("/small", headers={"accept-encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"index": 1}
+
+    @pytest.mark.asyncio
+    async def test_streams_compressed_chunks(self):
+        async with AsyncClient(
+            transport=ASGITransport(app=_build_app()), base_url="http://test"
+        ) as client:
+            async with client.stream(
+                "GET", "/stream", headers={"accept-encoding": "gzip"}
+            ) as response:
+                raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert gzip.decompress(raw) == b"chunk" * 800
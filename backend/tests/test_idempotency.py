@@ -0,0 +1,159 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from redis.asyncio import Redis
+from sqlalchemy import func, select
+
+import app.core.idempotency_middleware as idempotency_middleware
+from app.core.config import settings
+from app.core.idempotency_middleware import KEY_PREFIX, IdempotencyMiddleware, StoredResponse
+from app.db.models.item import Item
+
+
+@pytest_asyncio.fixture
+async def binary_redis(redis_client, monkeypatch) -> Redis:
+    redis = Redis(**redis_client.connection_pool.connection_kwargs | {"decode_responses": False})
+
+    async def fake_get_binary_redis():
+        return redis
+
+    monkeypatch.setattr(idempotency_middleware, "get_binary_redis", fake_get_binary_redis)
+    yield redis
+    await redis.aclose()
+
+
+def _slow_app(run) -> AsyncClient:
+    """A client for an app whose one write runs ``run`` under the middleware."""
+    app = FastAPI()
+
+    @app.post("/api/slow", status_code=201)
+    async def slow() -> dict[str, str]:
+        await run()
+        return {"status": "done"}
+
+    app.add_middleware(IdempotencyMiddleware, path_prefixes=("/api",), session_cookie="session")
+    client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+    client.cookies.set("session", "token")
+    return client
+
+
+async def _item_count(db_session) -> int:
+    return await db_session.scalar(select(func.count()).select_from(Item))
+
+
+@pytest.mark.asyncio
+async def test_retried_create_is_replayed(client, db_session, auth_user, binary_redis, statements):
+    client.cookies.set("better-auth.session_token", "valid-token")
+    headers = {"Idempotency-Key": "create-1"}
+
+    first = await client.post("/api/v1/items/", json={"name": "Once"}, headers=headers)
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    statements.clear()
+    retry = await client.post("/api/v1/items/", json={"name": "Once"}, headers=headers)
+    assert statements == []
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.headers["ETag"] == first.headers["ETag"]
+    assert retry.json() == first.json()
+    assert await _item_count(db_session) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_run_once(client, db_session, auth_user, binary_redis):
+    client.cookies.set("better-auth.session_token", "valid-token")
+    headers = {"Idempotency-Key": "create-2"}
+
+    responses = await asyncio.gather(
+        *(client.post("/api/v1/items/", json={"name": "Racing"}, headers=headers) for _ in range(3))
+    )
+
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert await _item_count(db_session) == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_another_request(client, auth_user, binary_redis):
+    client.cookies.set("better-auth.session_token", "valid-token")
+    headers = {"Idempotency-Key": "create-3"}
+
+    await client.post("/api/v1/items/", json={"name": "First"}, headers=headers)
+    response = await client.post("/api/v1/items/", json={"name": "Second"}, headers=headers)
+
+    assert response.status_code == 422
+    assert response.json()["error"]["message"] == (
+        "Idempotency-Key was already used for a different request"
+    )
+
+
+@pytest.mark.asyncio
+async def test_retryable_responses_are_not_stored(client, auth_user, binary_redis):
+    client.cookies.set("better-auth.session_token", "expired-token")
+    headers = {"Idempotency-Key": "create-4"}
+
+    response = await client.post("/api/v1/items/", json={"name": "Nope"}, headers=headers)
+    assert response.status_code == 401
+    assert await binary_redis.keys(f"{KEY_PREFIX}*") == []
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.post("/api/v1/items/", json={"name": "Now"}, headers=headers)
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_keys_are_scoped_to_the_session(client, db_session, auth_user, binary_redis):
+    headers = {"Idempotency-Key": "shared"}
+    client.cookies.set("better-auth.session_token", "valid-token")
+    await client.post("/api/v1/items/", json={"name": "Mine"}, headers=headers)
+
+    client.cookies.set("better-auth.session_token", "other-token")
+    response = await client.post("/api/v1/items/", json={"name": "Mine"}, headers=headers)
+
+    assert response.status_code == 401
+    assert "Idempotent-Replayed" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_lock_is_extended_while_the_request_runs(binary_redis, monkeypatch):
+    monkeypatch.setattr(settings, "idempotency_lock_ttl", 1)
+    calls = 0
+
+    async def run():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(1.5)
+
+    headers = {"Idempotency-Key": "slow-1"}
+    async with _slow_app(run) as client:
+        first = asyncio.create_task(client.post("/api/slow", headers=headers))
+        await asyncio.sleep(0.1)
+        # Arrives while the first still runs, and still waits once the initial TTL is over
+        retry = await client.post("/api/slow", headers=headers)
+        assert (await first).status_code == 201
+
+    assert calls == 1
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+@pytest.mark.asyncio
+async def test_lost_lock_is_left_to_its_new_holder(binary_redis):
+    taken_over = StoredResponse("another request", token="theirs").encode()
+
+    async def run():
+        # The key expired and a retry took it while this request was running
+        (key,) = await binary_redis.keys(f"{KEY_PREFIX}*")
+        await binary_redis.set(key, taken_over)
+
+    async with _slow_app(run) as client:
+        response = await client.post("/api/slow", headers={"Idempotency-Key": "slow-2"})
+
+    assert response.status_code == 201
+    (key,) = await binary_redis.keys(f"{KEY_PREFIX}*")
+    assert await binary_redis.get(key) == taken_over
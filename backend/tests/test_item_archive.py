@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+import app.services.item_archive as item_archive
+from app.db.models.item import Item
+from app.db.models.item_archive import ItemArchive
+from app.db.models.item_stats import ItemStats
+from app.services.item_archive import archive_inactive_items, item_archive_throttled_seconds
+
+LONG_AGO = datetime.utcnow() - timedelta(days=365)
+
+
+async def _add_items(db_session, owner_id: str, **kinds: tuple[int, bool, datetime]) -> None:
+    """Insert ``count`` items per kind, named ``<kind>-<n>``."""
+    rows = [
+        {
+            "id": f"{kind}-{n}",
+            "owner_id": owner_id,
+            "name": f"{kind} {n}",
+            "is_active": active,
+            "updated_at": updated_at,
+        }
+        for kind, (count, active, updated_at) in kinds.items()
+        for n in range(count)
+    ]
+    await db_session.execute(insert(Item).values(rows))
+    await db_session.commit()
+
+
+async def _ids(db_session, model) -> set[str]:
+    return set(await db_session.scalars(select(model.id)))
+
+
+@pytest.mark.asyncio
+async def test_archives_only_long_inactive_items(db_session, auth_user, async_engine):
+    await _add_items(
+        db_session,
+        auth_user.id,
+        stale=(3, False, LONG_AGO),
+        active=(2, True, LONG_AGO),
+        recent=(2, False, datetime.utcnow()),
+    )
+
+    archived = await archive_inactive_items(async_engine, timedelta(days=90), batch_size=2)
+
+    assert archived == 3
+    assert await _ids(db_session, ItemArchive) == {"stale-0", "stale-1", "stale-2"}
+    assert await _ids(db_session, Item) == {"active-0", "active-1", "recent-0", "recent-1"}
+    stats = await db_session.get(ItemStats, auth_user.id)
+    assert (stats.item_count, stats.active_count) == (4, 2)
+
+
+@pytest.mark.asyncio
+async def test_archival_waits_for_standbys(db_session, auth_user, async_engine, monkeypatch):
+    await _add_items(db_session, auth_user.id, stale=(4, False, LONG_AGO))
+    lags = [0.05, 0.0, 0.0]
+
+    async def fake_replication_lag(engine):
+        return lags.pop(0)
+
+    monkeypatch.setattr(item_archive, "replication_lag", fake_replication_lag)
+    throttled = item_archive_throttled_seconds.values.get((), 0)
+
+    archived = await archive_inactive_items(
+        async_engine, timedelta(days=90), batch_size=2, max_lag=0.01, pause=0
+    )
+
+    assert archived == 4
+    assert lags == []
+    assert item_archive_throttled_seconds.values[()] == pytest.approx(throttled + 0.05)
+
+
+@pytest.mark.asyncio
+async def test_excluded_owners_are_not_archived(db_session, auth_user, async_engine):
+    await _add_items(db_session, auth_user.id, stale=(2, False, LONG_AGO))
+
+    archived = await archive_inactive_items(
+        async_engine, timedelta(days=90), excluded=lambda: {auth_user.id}
+    )
+
+    assert archived == 0
+    assert await _ids(db_session, ItemArchive) == set()
+
+
+@pytest.mark.asyncio
+async def test_archived_items_are_read_on_request_and_restored(
+    client, db_session, auth_user, async_engine
+):
+    await _add_items(
+        db_session, auth_user.id, stale=(1, False, LONG_AGO), active=(1, True, LONG_AGO)
+    )
+    await archive_inactive_items(async_engine, timedelta(days=90))
+    client.cookies.set("better-auth.session_token", "valid-token")
+
+    response = await client.get("/api/v1/items/")
+    assert [item["id"] for item in response.json()] == ["active-0"]
+    assert response.headers["X-Total-Count"] == "1"
+    assert (await client.get("/api/v1/items/stale-0")).status_code == 404
+
+    response = await client.get("/api/v1/items/", params={"include_archived": True})
+    assert [item["id"] for item in response.json()] == ["active-0", "stale-0"]
+    assert response.headers["X-Total-Count"] == "2"
+    response = await client.get(
+        "/api/v1/items/", params={"include_archived": True, "fields": "id,is_active"}
+    )
+    assert response.json()[1] == {"id": "stale-0", "is_active": False}
+
+    response = await client.get("/api/v1/items/stale-0", params={"include_archived": True})
+    assert response.status_code == 200
+    assert response.json()["name"] == "stale 0"
+    assert response.headers["ETag"] == '"1"'
+
+    response = await client.post("/api/v1/items/stale-0/restore")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert (await client.post("/api/v1/items/stale-0/restore")).status_code == 404
+
+    db_session.expire_all()
+    assert await _ids(db_session, ItemArchive) == set()
+    assert await _ids(db_session, Item) == {"active-0", "stale-0"}
+    # Restoring counts as an update: not archived again on the next run
+    assert await archive_inactive_items(async_engine, timedelta(days=90)) == 0
+
+
+@pytest.mark.asyncio
+async def test_restore_conflicts_with_a_recreated_item(client, db_session, auth_user, async_engine):
+    await _add_items(db_session, auth_user.id, stale=(1, False, LONG_AGO))
+    await archive_inactive_items(async_engine, timedelta(days=90))
+    client.cookies.set("better-auth.session_token", "valid-token")
+
+    response = await client.post(
+        "/api/v1/items/import",
+        content="id,name\nstale-0,Imported\n",
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.json()["errors"] == [
+        {"line": 2, "error": "id belongs to an archived item; restore it instead"}
+    ]
+
+    # Created some other way since it was archived
+    db_session.add(Item(id="stale-0", name="Recreated", owner_id=auth_user.id))
+    await db_session.commit()
+
+    response = await client.post("/api/v1/items/stale-0/restore")
+    assert response.status_code == 409
+
+    db_session.expire_all()
+    assert await _ids(db_session, ItemArchive) == {"stale-0"}
+    assert (await db_session.scalar(select(Item.name).where(Item.id == "stale-0"))) == "Recreated"
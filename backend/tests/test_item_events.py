@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.db.models.item import Item
+from app.services.item_events import ItemEventBroker, get_item_event_broker, stream_events
+from main import app
+
+
+def _payload(seq: int, owner_id: str, **data: object) -> str:
+    return json.dumps({"seq": seq, "owner_id": owner_id, **data})
+
+
+async def _next(queue: asyncio.Queue) -> dict:
+    event = await asyncio.wait_for(queue.get(), 5)
+    return event.data
+
+
+@pytest.mark.asyncio
+async def test_broker_receives_committed_changes(async_engine, db_session, auth_user):
+    broker = ItemEventBroker(async_engine.url.render_as_string(hide_password=False))
+    await broker.start()
+    try:
+        mine = broker.subscribe(auth_user.id)
+        others = broker.subscribe("someone-else")
+
+        item = Item(name="Watched", owner_id=auth_user.id)
+        db_session.add(item)
+        await db_session.commit()
+        item_id = item.id
+        assert await _next(mine.queue) == {"op": "created", "id": item_id}
+
+        await db_session.execute(update(Item).where(Item.id == item_id).values(name="Renamed"))
+        await db_session.commit()
+        assert await _next(mine.queue) == {"op": "updated", "id": item_id}
+
+        db_session.add_all([Item(name=f"Bulk {n}", owner_id=auth_user.id) for n in range(150)])
+        await db_session.commit()
+        assert await _next(mine.queue) == {"op": "created", "count": 150}
+
+        # Rolled back changes are never announced
+        await db_session.execute(delete(Item).where(Item.id == item_id))
+        await db_session.rollback()
+        await db_session.execute(delete(Item).where(Item.id == item_id))
+        await db_session.commit()
+        assert await _next(mine.queue) == {"op": "deleted", "id": item_id}
+
+        assert mine.queue.empty()
+        assert others.queue.empty()
+        assert [event.seq for event in broker.buffer] == sorted(
+            event.seq for event in broker.buffer
+        )
+    finally:
+        await broker.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_from_last_event_id():
+    broker = ItemEventBroker("postgresql://localhost/unused")
+    broker.publish(_payload(1, "owner", op="created", id="a"))
+    broker.publish(_payload(2, "other", op="created", id="b"))
+    broker.publish(_payload(3, "owner", op="deleted", id="a"))
+
+    subscriber = broker.subscribe("owner", last_event_id="1")
+    stream = stream_events(broker, subscriber, heartbeat=0.01)
+    assert await anext(stream) == "retry: 1000\n\n"
+    assert await anext(stream) == 'id: 3\nevent: item\ndata: {"op": "deleted", "id": "a"}\n\n'
+    assert await anext(stream) == ": keepalive\n\n"
+
+    broker.publish(_payload(4, "owner", op="updated", id="c"))
+    assert await anext(stream) == 'id: 4\nevent: item\ndata: {"op": "updated", "id": "c"}\n\n'
+    await stream.aclose()
+    assert broker.subscribers == {}
+
+    # Events that fell out of the buffer cannot be replayed
+    expired = broker.subscribe("owner", last_event_id="0")
+    frames = [frame async for frame in stream_events(broker, expired, heartbeat=1)]
+    assert frames[-1].startswith("event: resync\n")
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_told_to_resync():
+    broker = ItemEventBroker("postgresql://localhost/unused", queue_size=2)
+    slow = broker.subscribe("owner")
+    fast = broker.subscribe("owner")
+    for seq in range(1, 4):
+        broker.publish(_payload(seq, "owner", op="created", id=str(seq)))
+        if seq < 3:
+            await fast.queue.get()
+
+    assert slow.lagging and not fast.lagging
+    frames = [frame async for frame in stream_events(broker, slow, heartbeat=1)]
+    assert frames == ["retry: 1000\n\n", frames[-1]]
+    assert frames[-1].startswith("event: resync\n")
+    assert await _next(fast.queue) == {"op": "created", "id": "3"}
+
+
+@pytest.mark.asyncio
+async def test_events_endpoint(client, auth_user):
+    broker = ItemEventBroker("postgresql://localhost/unused")
+    app.dependency_overrides[get_item_event_broker] = lambda: broker
+    client.cookies.set("better-auth.session_token", "valid-token")
+
+    # An unknown Last-Event-ID ends the stream right away with a resync event
+    response = await client.get("/api/v1/items/events", headers={"Last-Event-ID": "42"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert "event: resync" in response.text
+    assert broker.subscribers == {}
@@ -0,0 +1,143 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import app.db.shards as shards
+import app.services.item_import as item_import
+from app.core.job_queue import JOBS, JobQueue, drain_pending_enqueues
+from app.db.models.auth import User
+from app.db.models.item import Item
+from app.services.item_import import ParsedRow, iter_lines, parse_csv
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+class TestParseCsv:
+    @pytest.mark.asyncio
+    async def test_parses_across_chunk_boundaries(self):
+        data = (
+            'name,description,is_active\r\nCafé,"two\nlines",true\n"Quoted ""name""",,0\n'
+        ).encode()
+        rows = [row async for row in parse_csv(iter_lines(_chunks(data, 3)))]
+
+        assert rows == [
+            ParsedRow(2, None, "Café", "two\nlines", "true"),
+            ParsedRow(4, None, 'Quoted "name"', None, "0"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_reports_bad_rows(self):
+        data = b'name,is_active\nok,true\nonly,two,many\n"unterminated,x\n'
+        rows = [row async for row in parse_csv(iter_lines(_chunks(data, 1024)))]
+
+        assert rows[0].error is None
+        assert rows[1] == ParsedRow(3, error="Expected 2 columns, got 3")
+        assert rows[2] == ParsedRow(4, error="Unterminated quoted field")
+
+
+@pytest.mark.asyncio
+async def test_import_csv_inline(client, auth_user, db_session):
+    now = datetime.utcnow()
+    other = User(
+        id="other-user",
+        email="other@example.com",
+        name="Other",
+        email_verified=True,
+        created_at=now,
+        updated_at=now,
+    )
+    db_session.add(other)
+    db_session.add_all(
+        [
+            Item(id="mine", name="Old name", owner_id=auth_user.id),
+            Item(id="theirs", name="Not yours", owner_id=other.id),
+        ]
+    )
+    await db_session.commit()
+
+    body = (
+        "id,name,description,is_active\n"
+        "mine,New name,,false\n"
+        ',Fresh item,"multi\nline",\n'
+        "theirs,Hijack,,\n"
+        ",,missing name,\n"
+        ",Bad flag,,maybe\n"
+    )
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.post(
+        "/api/v1/items/import", content=body, headers={"Content-Type": "text/csv"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "completed"
+    assert (data["rows"], data["inserted"], data["updated"], data["failed"]) == (5, 1, 1, 3)
+    assert data["errors"] == [
+        {"line": 5, "error": "id is not available"},
+        {"line": 6, "error": "name is required"},
+        {"line": 7, "error": "is_active must be a boolean"},
+    ]
+
+    db_session.expire_all()
+    items = (await db_session.execute(select(Item).order_by(Item.name))).scalars().all()
+    assert [(item.name, item.owner_id, item.is_active) for item in items] == [
+        ("Fresh item", "test-user", True),
+        ("New name", "test-user", False),
+        ("Not yours", "other-user", True),
+    ]
+    assert items[0].description == "multi\nline"
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson_in_background(
+    client, auth_user, async_engine, redis_client, monkeypatch
+):
+    async def fake_get_redis():
+        return redis_client
+
+    monkeypatch.setattr(item_import, "get_redis", fake_get_redis)
+    monkeypatch.setattr(
+        shards, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False)
+    )
+    monkeypatch.setattr("app.core.job_queue.get_redis", fake_get_redis)
+
+    body = '{"name": "One", "is_active": false}\n{"name": 5}\nnot json\n{"name": "Two"}\n'
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.post(
+        "/api/v1/items/import?background=true",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 202
+    import_id = response.json()["import_id"]
+
+    await drain_pending_enqueues()
+    claimed = await JobQueue(redis_client).claim(visibility_timeout=30)
+    assert claimed.name == "items.import"
+    await JOBS[claimed.name].handler(**claimed.kwargs)
+
+    response = await client.get(f"/api/v1/items/imports/{import_id}")
+    data = response.json()
+    assert data["status"] == "completed"
+    assert (data["rows"], data["inserted"], data["failed"]) == (4, 3, 1)
+    assert data["errors"][0]["line"] == 3
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_unusable_uploads(client, auth_user):
+    client.cookies.set("better-auth.session_token", "valid-token")
+
+    response = await client.post(
+        "/api/v1/items/import", content="{}", headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 415
+
+    response = await client.post(
+        "/api/v1/items/import", content="title\nx\n", headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 422
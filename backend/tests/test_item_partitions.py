@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.sql import Executable
+
+from app.db.models.item import ITEM_PARTITIONS, Item
+from app.services.item_search import build_item_search_query
+
+OWNER = "test-user"
+
+OWNER_SCOPED_QUERIES = {
+    "list": select(Item).where(Item.owner_id == OWNER).offset(0).limit(100),
+    "get": select(Item).where(Item.id == "item-1", Item.owner_id == OWNER),
+    "update": update(Item)
+    .where(Item.id == "item-1", Item.owner_id == OWNER)
+    .values(name="Renamed")
+    .returning(Item),
+    "delete": delete(Item).where(Item.id == "item-1", Item.owner_id == OWNER).returning(Item.id),
+    "search": build_item_search_query(OWNER, "widget", 21),
+    "export": select(Item)
+    .where(Item.owner_id == OWNER, Item.id > "")
+    .order_by(Item.id)
+    .limit(1000),
+}
+
+
+def _relations(plan: dict) -> set[str]:
+    found = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", []):
+        found |= _relations(child)
+    return found
+
+
+async def scanned_partitions(async_engine, statement: Executable) -> set[str]:
+    async with async_engine.connect() as conn:
+        compiled = statement.compile(dialect=conn.dialect)
+        params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+        plan = result.scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return {name for name in _relations(plan[0]["Plan"]) if name.startswith("items_p")}
+
+
+@pytest.mark.asyncio
+async def test_items_is_hash_partitioned(async_engine):
+    async with async_engine.connect() as conn:
+        partitions = (
+            await conn.execute(
+                text("SELECT count(*) FROM pg_inherits WHERE inhparent = 'items'::regclass")
+            )
+        ).scalar()
+    assert partitions == ITEM_PARTITIONS
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", OWNER_SCOPED_QUERIES)
+async def test_owner_scoped_queries_prune_to_one_partition(async_engine, name):
+    assert len(await scanned_partitions(async_engine, OWNER_SCOPED_QUERIES[name])) == 1
+
+
+@pytest.mark.asyncio
+async def test_unscoped_query_scans_every_partition(async_engine):
+    partitions = await scanned_partitions(async_engine, select(Item).where(Item.id == "item-1"))
+    assert len(partitions) == ITEM_PARTITIONS
+
+
+@pytest.mark.asyncio
+async def test_rows_land_in_the_pruned_partition(client, auth_user, async_engine):
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.post("/api/v1/items/", json={"name": "Partitioned"})
+    assert response.status_code == 201
+
+    async with async_engine.connect() as conn:
+        partition = (
+            await conn.execute(
+                text("SELECT tableoid::regclass::text FROM items WHERE id = :id"),
+                {"id": response.json()["id"]},
+            )
+        ).scalar()
+    assert partition in await scanned_partitions(
+        async_engine, select(Item).where(Item.owner_id == auth_user.id)
+    )
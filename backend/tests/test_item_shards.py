@@ -0,0 +1,236 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.commands.move_item_owner import move_item_owner
+from app.db.models.item import Item
+from app.db.models.item_archive import ItemArchive
+from app.db.models.item_shard import ItemShardOverride
+from app.db.models.item_stats import ItemStats
+from app.db.shards import HashRing, ShardRouter, create_shard_schema, get_shard_router
+from app.services.item_archive import archive_items
+from app.services.item_events import ItemEventBroker
+from main import app
+
+SHARDS = ("items_shard_a", "items_shard_b")
+LONG_AGO = datetime.utcnow() - timedelta(days=365)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def shard_urls(async_engine) -> dict[str, str]:
+    """Two extra databases on the test server, each with the item tables."""
+    admin = create_async_engine(async_engine.url, isolation_level="AUTOCOMMIT")
+    async with admin.connect() as conn:
+        for name in SHARDS:
+            await conn.execute(text(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)"))
+            await conn.execute(text(f"CREATE DATABASE {name}"))
+    await admin.dispose()
+
+    urls = {
+        name: async_engine.url.set(database=name).render_as_string(hide_password=False)
+        for name in SHARDS
+    }
+    for url in urls.values():
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await conn.run_sync(create_shard_schema)
+        await engine.dispose()
+    return urls
+
+
+@pytest_asyncio.fixture
+async def sharded(async_engine, shard_urls) -> ShardRouter:
+    router = ShardRouter(shard_urls, refresh_interval=0.05, primary=async_engine)
+    await router.start()
+    app.dependency_overrides[get_shard_router] = lambda: router
+    yield router
+    app.dependency_overrides.pop(get_shard_router, None)
+    for shard in shard_urls:
+        async with router.shard_engine(shard).begin() as conn:
+            await conn.execute(text("TRUNCATE items, items_archive, item_stats, item_import_rows"))
+    await router.close()
+
+
+def _shards_for(router: ShardRouter, owner_id: str) -> tuple[str, str]:
+    home = router.ring.lookup(owner_id)
+    return home, next(shard for shard in SHARDS if shard != home)
+
+
+async def _item_ids(router: ShardRouter, shard: str, owner_id: str) -> set[str]:
+    async with router.shard_engine(shard).connect() as conn:
+        result = await conn.execute(select(Item.id).where(Item.owner_id == owner_id))
+        return set(result.scalars())
+
+
+def test_hash_ring_remaps_few_owners_when_a_shard_is_added():
+    owners = [f"user-{n}" for n in range(2000)]
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+
+    placed = {owner: before.lookup(owner) for owner in owners}
+    assert all(list(placed.values()).count(shard) > 400 for shard in "abc")
+    moved = [owner for owner in owners if after.lookup(owner) != placed[owner]]
+    assert len(moved) < 0.35 * len(owners)
+    assert {after.lookup(owner) for owner in moved} == {"d"}
+
+
+@pytest.mark.asyncio
+async def test_items_live_on_the_owners_shard(client, auth_user, async_engine, sharded):
+    home, other = _shards_for(sharded, auth_user.id)
+    client.cookies.set("better-auth.session_token", "valid-token")
+
+    response = await client.post("/api/v1/items/", json={"name": "Sharded"})
+    assert response.status_code == 201
+    item_id = response.json()["id"]
+
+    assert await _item_ids(sharded, home, auth_user.id) == {item_id}
+    assert await _item_ids(sharded, other, auth_user.id) == set()
+    async with async_engine.connect() as conn:
+        assert await conn.scalar(select(func.count()).select_from(Item)) == 0
+
+    response = await client.get("/api/v1/items/")
+    assert [item["id"] for item in response.json()] == [item_id]
+    assert response.headers["X-Total-Count"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_override_pins_owner_to_another_shard(client, db_session, auth_user, sharded):
+    home, other = _shards_for(sharded, auth_user.id)
+    db_session.add(ItemShardOverride(owner_id=auth_user.id, shard=other))
+    await db_session.commit()
+    await sharded.refresh()
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.post("/api/v1/items/", json={"name": "Pinned"})
+
+    assert response.status_code == 201
+    assert await _item_ids(sharded, other, auth_user.id) == {response.json()["id"]}
+    assert await _item_ids(sharded, home, auth_user.id) == set()
+
+
+@pytest.mark.asyncio
+async def test_writes_are_fenced_while_moving(client, db_session, auth_user, sharded):
+    home, _ = _shards_for(sharded, auth_user.id)
+    db_session.add(ItemShardOverride(owner_id=auth_user.id, shard=home, moving=True))
+    await db_session.commit()
+    await sharded.refresh()
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.post("/api/v1/items/", json={"name": "Fenced"})
+    assert response.status_code == 503
+    assert response.json()["error"]["message"] == "Items are being moved, retry shortly"
+
+    response = await client.get("/api/v1/items/")
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_stale_routes_refuse_item_requests(client, auth_user, async_engine, shard_urls):
+    never_refreshed = ShardRouter(shard_urls, refresh_interval=0.05, primary=async_engine)
+    app.dependency_overrides[get_shard_router] = lambda: never_refreshed
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.get("/api/v1/items/")
+
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_move_owner_while_writing(client, db_session, auth_user, sharded):
+    home, other = _shards_for(sharded, auth_user.id)
+    client.cookies.set("better-auth.session_token", "valid-token")
+    created = set()
+    for n in range(5):
+        response = await client.post("/api/v1/items/", json={"name": f"Item {n}"})
+        created.add(response.json()["id"])
+    renamed = next(iter(created))
+    await client.patch(f"/api/v1/items/{renamed}", json={"name": "Renamed"})
+
+    move = asyncio.create_task(
+        move_item_owner(auth_user.id, other, sharded, batch_size=2, settle=0.05)
+    )
+    fenced = 0
+    while not move.done():
+        response = await client.post("/api/v1/items/", json={"name": "During move"})
+        if response.status_code == 503:
+            fenced += 1
+        else:
+            assert response.status_code == 201
+            created.add(response.json()["id"])
+        await asyncio.sleep(0.01)
+
+    await move
+    assert fenced > 0
+    assert await _item_ids(sharded, other, auth_user.id) == created
+    assert await _item_ids(sharded, home, auth_user.id) == set()
+
+    response = await client.get("/api/v1/items/", params={"limit": 1000})
+    assert {item["id"] for item in response.json()} == created
+    assert response.headers["X-Total-Count"] == str(len(created))
+    response = await client.get(f"/api/v1/items/{renamed}")
+    assert response.json()["name"] == "Renamed"
+    assert response.headers["ETag"] == '"2"'
+
+    async with sharded.shard_engine(home).connect() as conn:
+        assert await conn.scalar(select(ItemStats.item_count)) is None
+    override = await db_session.get(ItemShardOverride, auth_user.id)
+    assert (override.shard, override.moving) == (other, False)
+
+    # Moving back to the shard the ring picks needs no override
+    await move_item_owner(auth_user.id, home, sharded, settle=0)
+    db_session.expunge_all()
+    assert await db_session.get(ItemShardOverride, auth_user.id) is None
+    assert await _item_ids(sharded, home, auth_user.id) == created
+
+
+@pytest.mark.asyncio
+async def test_events_from_every_shard_and_none_from_moves(auth_user, shard_urls, sharded):
+    home, other = _shards_for(sharded, auth_user.id)
+    owners = {home: auth_user.id, other: "someone-else"}
+    broker = ItemEventBroker(*shard_urls.values())
+    await broker.start()
+    try:
+        subscribers = {shard: broker.subscribe(owner) for shard, owner in owners.items()}
+        for shard, owner in owners.items():
+            async with sharded.shard_engine(shard).begin() as conn:
+                await conn.execute(insert(Item).values(id="item", owner_id=owner, name="x"))
+        for shard, subscriber in subscribers.items():
+            event = await asyncio.wait_for(subscriber.queue.get(), 5)
+            assert (event.owner_id, event.data) == (owners[shard], {"op": "created", "id": "item"})
+
+        await move_item_owner(auth_user.id, other, sharded, settle=0)
+        await asyncio.sleep(0.2)
+        assert subscribers[home].queue.empty()
+    finally:
+        await broker.close()
+
+
+@pytest.mark.asyncio
+async def test_archival_per_shard_and_moves_carry_archived_items(db_session, auth_user, sharded):
+    home, other = _shards_for(sharded, auth_user.id)
+    async with sharded.shard_engine(home).begin() as conn:
+        await conn.execute(
+            insert(Item).values(
+                id="old", owner_id=auth_user.id, name="Old", is_active=False, updated_at=LONG_AGO
+            )
+        )
+
+    # Through the overrides table: the router's refresh would undo setting moving directly
+    override = ItemShardOverride(owner_id=auth_user.id, shard=home, moving=True)
+    db_session.add(override)
+    await db_session.commit()
+    await sharded.refresh()
+    assert await archive_items(sharded) == 0
+    await db_session.delete(override)
+    await db_session.commit()
+    await sharded.refresh()
+    assert await archive_items(sharded) == 1
+
+    await move_item_owner(auth_user.id, other, sharded, settle=0)
+    for shard, expected in ((home, set()), (other, {"old"})):
+        async with sharded.shard_engine(shard).connect() as conn:
+            assert set(await conn.scalars(select(ItemArchive.id))) == expected
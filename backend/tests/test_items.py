@@ -1,9 +1,13 @@
+import asyncio
 from datetime import datetime
 
 import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from app.db.models.auth import User
 from app.db.models.item import Item
+from app.db.session import get_db
+from main import app
 
 
 @pytest.mark.asyncio
@@ -86,3 +90,201 @@ async def test_delete_item(client, auth_user, db_session):
 
     response = await client.get(f"/api/v1/items/{item.id}")
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_items_sparse_fields(client, auth_user, db_session):
+    db_session.add(Item(name="Sparse", description="Long text", owner_id=auth_user.id))
+    await db_session.commit()
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.get("/api/v1/items/", params={"fields": "id,name,is_active"})
+
+    assert response.status_code == 200
+    assert [set(item) for item in response.json()] == [{"id", "name", "is_active"}]
+
+
+@pytest.mark.asyncio
+async def test_get_item_sparse_fields(client, auth_user, db_session):
+    item = Item(name="Sparse", description="Long text", owner_id=auth_user.id)
+    db_session.add(item)
+    await db_session.commit()
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.get(f"/api/v1/items/{item.id}", params={"fields": "name"})
+
+    assert response.status_code == 200
+    assert response.json() == {"name": "Sparse"}
+
+
+@pytest.mark.asyncio
+async def test_list_items_invalid_fields(client, auth_user):
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.get("/api/v1/items/", params={"fields": "id,password"})
+
+    assert response.status_code == 422
+    assert response.json()["error"]["details"]["errors"][0]["field"] == "query.fields"
+
+
+@pytest.mark.asyncio
+async def test_search_items_paginates_by_rank(client, auth_user, db_session):
+    db_session.add_all(
+        [
+            Item(name="Blue widget", description="A small widget", owner_id=auth_user.id),
+            Item(name="Red gadget", description="Nothing blue here", owner_id=auth_user.id),
+            Item(name="Green gizmo", description="Unrelated", owner_id=auth_user.id),
+        ]
+    )
+    await db_session.commit()
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    first = await client.get("/api/v1/items/search", params={"q": "blue", "limit": 1})
+
+    assert first.status_code == 200
+    page = first.json()
+    assert [item["name"] for item in page["items"]] == ["Blue widget"]
+    assert page["next_cursor"]
+
+    second = await client.get(
+        "/api/v1/items/search", params={"q": "blue", "limit": 1, "cursor": page["next_cursor"]}
+    )
+    page = second.json()
+    assert [item["name"] for item in page["items"]] == ["Red gadget"]
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_search_items_rejects_bad_cursor(client, auth_user):
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.get("/api/v1/items/search", params={"q": "blue", "cursor": "???"})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_item_stats_follow_writes(client, auth_user):
+    client.cookies.set("better-auth.session_token", "valid-token")
+    first = (await client.post("/api/v1/items/", json={"name": "First"})).json()
+    second = (await client.post("/api/v1/items/", json={"name": "Second"})).json()
+
+    await client.patch(f"/api/v1/items/{first['id']}", json={"is_active": False})
+    await client.delete(f"/api/v1/items/{second['id']}")
+
+    response = await client.get("/api/v1/items/stats")
+    assert response.status_code == 200
+    assert response.json() == {"item_count": 1, "active_count": 0}
+
+    response = await client.get("/api/v1/items/")
+    assert response.headers["X-Total-Count"] == "1"
+
+
+def _item_statements(statements: list[str]) -> list[str]:
+    # Authentication and subscription lookups are not part of the write path
+    return [s.split()[0] for s in statements if "items" in s and "item_stats" not in s]
+
+
+@pytest.mark.asyncio
+async def test_writes_take_one_statement(client, auth_user, statements):
+    client.cookies.set("better-auth.session_token", "valid-token")
+
+    response = await client.post("/api/v1/items/", json={"name": "One trip"})
+    assert response.status_code == 201
+    item_id = response.json()["id"]
+    assert _item_statements(statements) == ["INSERT"]
+
+    statements.clear()
+    response = await client.patch(f"/api/v1/items/{item_id}", json={"is_active": False})
+    assert response.status_code == 200
+    assert response.json()["name"] == "One trip"
+    assert response.json()["is_active"] is False
+    assert _item_statements(statements) == ["UPDATE"]
+
+    statements.clear()
+    assert (await client.delete(f"/api/v1/items/{item_id}")).status_code == 204
+    assert _item_statements(statements) == ["DELETE"]
+
+    statements.clear()
+    assert (await client.patch(f"/api/v1/items/{item_id}", json={"name": "x"})).status_code == 404
+    assert (await client.delete(f"/api/v1/items/{item_id}")).status_code == 404
+    assert _item_statements(statements) == ["UPDATE", "DELETE"]
+
+
+@pytest.mark.asyncio
+async def test_update_with_stale_version_fails(client, auth_user, db_session):
+    item = Item(name="Versioned", owner_id=auth_user.id)
+    db_session.add(item)
+    await db_session.commit()
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.get(f"/api/v1/items/{item.id}")
+    assert response.headers["etag"] == '"1"'
+    assert response.json()["version"] == 1
+
+    response = await client.patch(
+        f"/api/v1/items/{item.id}", json={"name": "First"}, headers={"If-Match": '"1"'}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"2"'
+
+    response = await client.patch(
+        f"/api/v1/items/{item.id}", json={"name": "Stale"}, headers={"If-Match": '"1"'}
+    )
+    assert response.status_code == 412
+
+    response = await client.patch(
+        "/api/v1/items/missing", json={"name": "Gone"}, headers={"If-Match": '"1"'}
+    )
+    assert response.status_code == 404
+
+    response = await client.patch(
+        f"/api/v1/items/{item.id}", json={"name": "Weak"}, headers={"If-Match": 'W/"2"'}
+    )
+    assert response.status_code == 412
+
+    response = await client.patch(
+        f"/api/v1/items/{item.id}", json={"name": "Listed"}, headers={"If-Match": '"7", "2"'}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"3"'
+
+
+@pytest.mark.asyncio
+async def test_parallel_updates_lose_nothing(client, auth_user, db_session, async_engine):
+    item = Item(name="Shared", description="", owner_id=auth_user.id)
+    db_session.add(item)
+    await db_session.commit()
+
+    # Each request gets its own session so the updates really run concurrently
+    sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def separate_session():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = separate_session
+    client.cookies.set("better-auth.session_token", "valid-token")
+    attempts = conflicts = 0
+
+    async def append(marker: str) -> None:
+        nonlocal attempts, conflicts
+        while True:
+            attempts += 1
+            current = await client.get(f"/api/v1/items/{item.id}")
+            response = await client.patch(
+                f"/api/v1/items/{item.id}",
+                json={"description": current.json()["description"] + marker},
+                headers={"If-Match": current.headers["etag"]},
+            )
+            if response.status_code == 200:
+                return
+            assert response.status_code == 412
+            conflicts += 1
+
+    updaters = 10
+    await asyncio.gather(*(append(f"[{n}]") for n in range(updaters)))
+
+    final = (await client.get(f"/api/v1/items/{item.id}")).json()
+    assert final["version"] == updaters + 1
+    assert sorted(final["description"].split("]")[:-1]) == sorted(f"[{n}" for n in range(updaters))
+    # Every attempt either applied or was refused: none was lost or applied twice
+    assert attempts == updaters + conflicts
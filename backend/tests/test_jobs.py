@@ -0,0 +1,231 @@
+import asyncio
+import json
+
+import pytest
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import app.core.job_queue as job_queue
+import app.db.shards as shards
+import app.services.cache_invalidation as cache_invalidation
+import app.services.item_export as item_export
+from app.core.job_queue import JOBS, Job, JobQueue, JobSpec, enqueue_after_commit
+from app.core.response_cache import cached_response_keys
+from app.db.models.item import Item
+from app.worker import Worker
+
+
+@pytest.fixture
+def queue(redis_client) -> JobQueue:
+    return JobQueue(redis_client)
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.02)
+
+
+@pytest.mark.asyncio
+async def test_claim_and_ack(queue):
+    await queue.enqueue(Job(name="noop", kwargs={"value": 1}))
+
+    claimed = await queue.claim(visibility_timeout=30)
+    assert claimed.name == "noop"
+    assert claimed.kwargs == {"value": 1}
+    assert claimed.attempts == 1
+    assert (await queue.depth())["inflight"] == 1
+
+    await queue.ack(claimed)
+    assert await queue.depth() == {"ready": 0, "inflight": 0, "delayed": 0, "dead": 0}
+
+
+@pytest.mark.asyncio
+async def test_expired_visibility_timeout_redelivers(queue):
+    await queue.enqueue(Job(name="noop"))
+    first = await queue.claim(visibility_timeout=0)
+
+    assert await queue.claim(visibility_timeout=0) is None
+    assert await queue.promote() == (0, 1)
+
+    second = await queue.claim(visibility_timeout=30)
+    assert second.id == first.id
+    assert second.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_waits_for_backoff(queue):
+    await queue.enqueue(Job(name="noop"))
+    claimed = await queue.claim(visibility_timeout=30)
+
+    await queue.retry(claimed, delay=60)
+    await queue.promote()
+    assert await queue.claim(visibility_timeout=30) is None
+
+    await queue.retry(claimed, delay=0)
+    await queue.promote()
+    assert (await queue.claim(visibility_timeout=30)).id == claimed.id
+
+
+@pytest.mark.asyncio
+async def test_enqueue_after_commit(db_session, redis_client, queue, monkeypatch):
+    async def fake_get_redis():
+        return redis_client
+
+    monkeypatch.setattr(job_queue, "get_redis", fake_get_redis)
+
+    await db_session.execute(text("SELECT 1"))
+    enqueue_after_commit(db_session, "noop", step="rolled back")
+    await db_session.rollback()
+    enqueue_after_commit(db_session, "noop", step="committed")
+    assert (await queue.depth())["ready"] == 0
+
+    await db_session.commit()
+    await job_queue.drain_pending_enqueues()
+
+    claimed = await queue.claim(visibility_timeout=30)
+    assert claimed.kwargs == {"step": "committed"}
+    assert await queue.claim(visibility_timeout=30) is None
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_then_dead_letters(queue, redis_client, monkeypatch):
+    calls = []
+    dead = []
+
+    async def record_dead(**kwargs):
+        dead.append(kwargs)
+
+    async def flaky(**kwargs):
+        calls.append(kwargs)
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(JOBS, "flaky", JobSpec(flaky, max_attempts=2, on_dead=record_dead))
+    monkeypatch.setattr("app.worker.retry_delay", lambda attempts: 0.0)
+    monkeypatch.setattr("app.worker.PROMOTE_INTERVAL", 0.01)
+
+    worker = Worker(queue, concurrency=2, visibility_timeout=30)
+    running = asyncio.create_task(worker.run())
+    await queue.enqueue(Job(name="flaky", kwargs={"n": 1}))
+
+    async def dead_lettered():
+        return (await queue.depth())["dead"] == 1
+
+    await _wait_for(dead_lettered)
+    worker.stop()
+    await running
+
+    assert len(calls) == 2
+    assert dead == [{"n": 1}]
+    job_id = await redis_client.lindex(job_queue.DEAD_KEY, 0)
+    payload = json.loads(await redis_client.get(f"{job_queue.JOB_KEY_PREFIX}{job_id}"))
+    assert payload["last_error"] == "RuntimeError: boom"
+
+
+@pytest.mark.asyncio
+async def test_item_export(client, auth_user, db_session, async_engine, redis_client, monkeypatch):
+    db_session.add_all(
+        [
+            Item(id=f"export-{index}", name=f"Item {index}", owner_id=auth_user.id)
+            for index in range(3)
+        ]
+    )
+    await db_session.commit()
+
+    async def fake_get_redis():
+        return redis_client
+
+    binary_redis = Redis(
+        **redis_client.connection_pool.connection_kwargs | {"decode_responses": False}
+    )
+
+    async def fake_get_binary_redis():
+        return binary_redis
+
+    monkeypatch.setattr(item_export, "get_redis", fake_get_redis)
+    monkeypatch.setattr(item_export, "get_binary_redis", fake_get_binary_redis)
+    monkeypatch.setattr(
+        shards, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False)
+    )
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.post("/api/v1/items/exports")
+    assert response.status_code == 202
+    export_id = response.json()["export_id"]
+    assert response.json()["status"] == "queued"
+
+    response = await client.get(f"/api/v1/items/exports/{export_id}/download")
+    assert response.status_code == 409
+
+    claimed = await JobQueue(redis_client).claim(visibility_timeout=30)
+    assert claimed.name == "items.export"
+    await JOBS[claimed.name].handler(**claimed.kwargs)
+
+    response = await client.get(f"/api/v1/items/exports/{export_id}")
+    assert response.json()["status"] == "completed"
+    assert response.json()["rows"] == 3
+
+    response = await client.get(f"/api/v1/items/exports/{export_id}/download")
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["export-0", "export-1", "export-2"]
+    await binary_redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_item_writes_invalidate_cached_stats(client, auth_user, redis_client, monkeypatch):
+    async def fake_get_redis():
+        return redis_client
+
+    monkeypatch.setattr(job_queue, "get_redis", fake_get_redis)
+    monkeypatch.setattr(cache_invalidation, "get_redis", fake_get_redis)
+    client.cookies.set("better-auth.session_token", "valid-token")
+    queue = JobQueue(redis_client)
+
+    assert (await client.get("/api/v1/items/stats")).json()["item_count"] == 0
+    cached_keys = cached_response_keys(cache_invalidation.item_stats_cache_key(auth_user.id))
+    assert await redis_client.exists(*cached_keys) == 1
+
+    assert (await client.post("/api/v1/items/", json={"name": "New"})).status_code == 201
+    # Served from the cache until the worker runs the committed invalidation
+    assert (await client.get("/api/v1/items/stats")).json()["item_count"] == 0
+    await job_queue.drain_pending_enqueues()
+    claimed = await queue.claim(visibility_timeout=30)
+    assert claimed.name == "cache.invalidate"
+    await JOBS[claimed.name].handler(**claimed.kwargs)
+
+    assert await redis_client.exists(*cached_keys) == 0
+    assert (await client.get("/api/v1/items/stats")).json()["item_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_item_export_over_size_limit_fails(
+    db_session, auth_user, async_engine, redis_client, monkeypatch
+):
+    db_session.add_all(
+        [
+            Item(id=f"export-{index}", name=f"Item {index}", owner_id=auth_user.id)
+            for index in range(3)
+        ]
+    )
+    await db_session.commit()
+
+    async def fake_get_redis():
+        return redis_client
+
+    monkeypatch.setattr(item_export, "get_redis", fake_get_redis)
+    monkeypatch.setattr(item_export, "EXPORT_BATCH_SIZE", 1)
+    monkeypatch.setattr(item_export.settings, "export_max_size", 500)
+    monkeypatch.setattr(
+        shards, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False)
+    )
+
+    export = await item_export.create_export(redis_client, auth_user.id)
+    await item_export.export_items(export["export_id"], auth_user.id)
+
+    status = await item_export.get_export(redis_client, export["export_id"], auth_user.id)
+    assert status["status"] == "failed"
+    assert status["error"] == "Export exceeds 500 bytes"
+    assert not await redis_client.exists(f"exports:{export['export_id']}:data")
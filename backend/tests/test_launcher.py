@@ -0,0 +1,82 @@
+import pytest
+
+from app.core.config import settings
+from app.launcher import cpu_limit, memory_limit, pool_sizes, worker_memory_ceiling
+
+
+def _cgroup(tmp_path, files: dict[str, str]):
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content + "\n")
+    return tmp_path
+
+
+class TestCpuLimit:
+    def test_cgroup_v2_quota(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(8)))
+        root = _cgroup(tmp_path, {"cpu.max": "150000 100000"})
+        assert cpu_limit(root) == 1.5
+
+    def test_cgroup_v2_unlimited_uses_affinity(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(4)))
+        root = _cgroup(tmp_path, {"cpu.max": "max 100000"})
+        assert cpu_limit(root) == 4
+
+    def test_cgroup_v1_quota(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(8)))
+        root = _cgroup(
+            tmp_path, {"cpu/cpu.cfs_quota_us": "200000", "cpu/cpu.cfs_period_us": "100000"}
+        )
+        assert cpu_limit(root) == 2
+
+    def test_quota_capped_by_affinity(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("os.sched_getaffinity", lambda pid: {0, 1})
+        root = _cgroup(tmp_path, {"cpu.max": "800000 100000"})
+        assert cpu_limit(root) == 2
+
+
+class TestMemoryLimit:
+    def test_cgroup_v2(self, tmp_path):
+        assert memory_limit(_cgroup(tmp_path, {"memory.max": "1073741824"})) == 1 << 30
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        assert memory_limit(_cgroup(tmp_path, {"memory.max": "max"})) is None
+
+    def test_cgroup_v1_unlimited(self, tmp_path):
+        root = _cgroup(tmp_path, {"memory/memory.limit_in_bytes": "9223372036854771712"})
+        assert memory_limit(root) is None
+
+    def test_worker_ceiling_splits_limit(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "worker_max_memory_mb", None)
+        root = _cgroup(tmp_path, {"memory.max": str(4 << 30)})
+        assert worker_memory_ceiling(4, root) == int(0.8 * (1 << 30))
+
+    def test_worker_ceiling_setting_wins(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "worker_max_memory_mb", 256)
+        root = _cgroup(tmp_path, {"memory.max": str(4 << 30)})
+        assert worker_memory_ceiling(4, root) == 256 << 20
+
+    def test_worker_ceiling_disabled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "worker_max_memory_mb", 0)
+        root = _cgroup(tmp_path, {"memory.max": str(4 << 30)})
+        assert worker_memory_ceiling(4, root) is None
+
+
+class TestPoolSizes:
+    @pytest.mark.parametrize("workers", [1, 2, 3, 4, 8, 16])
+    def test_workers_stay_within_budget(self, workers, monkeypatch):
+        monkeypatch.setattr(settings, "db_pool_size", 10)
+        monkeypatch.setattr(settings, "db_max_overflow", 20)
+        pool_size, max_overflow = pool_sizes(80, workers)
+        assert pool_size >= 1
+        assert workers * (pool_size + max_overflow + 1) <= 80
+
+    def test_keeps_pool_to_overflow_ratio(self, monkeypatch):
+        monkeypatch.setattr(settings, "db_pool_size", 10)
+        monkeypatch.setattr(settings, "db_max_overflow", 20)
+        assert pool_sizes(80, 4) == (6, 13)
+
+    def test_budget_too_small(self):
+        with pytest.raises(SystemExit):
+            pool_sizes(10, 8)
@@ -0,0 +1,85 @@
+import json
+import logging
+
+import pytest
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
+
+import app.core.error_handlers as error_handlers
+from app.core.error_handlers import DATABASE_ERROR_MESSAGE, error_response
+from app.core.log_throttle import ExceptionLogThrottle, exception_fingerprint
+from app.db.session import get_db
+from main import app
+
+
+def _raise(message: str) -> None:
+    raise ValueError(message)
+
+
+def _caught(message: str) -> ValueError:
+    try:
+        _raise(message)
+    except ValueError as exc:
+        return exc
+
+
+def _records(caplog, message: str) -> list[logging.LogRecord]:
+    return [record for record in caplog.records if record.getMessage() == message]
+
+
+def test_fingerprint_ignores_the_message_but_not_the_origin():
+    assert exception_fingerprint(_caught("user 1")) == exception_fingerprint(_caught("user 2"))
+    try:
+        raise ValueError("user 1")
+    except ValueError as exc:
+        assert exception_fingerprint(exc) != exception_fingerprint(_caught("user 1"))
+
+
+def test_repeats_are_summarised(caplog):
+    throttle = ExceptionLogThrottle(interval=60)
+    with caplog.at_level(logging.WARNING, logger="saas_starter"):
+        assert throttle.first("Boom", _caught("1"), "/a")
+        assert not any(throttle.first("Boom", _caught(str(n)), "/a") for n in range(5))
+        # Other events keep their own first occurrence
+        assert throttle.first("Request failed", _caught("1"), "/a")
+
+        throttle.flush()
+        [summary] = _records(caplog, "Boom (repeated)")
+        assert summary.suppressed == 5
+        assert summary.error == "ValueError: 1"
+
+        # A quiet interval ends the storm: the next one is logged in full again
+        throttle.flush()
+        throttle.flush()
+        assert throttle.first("Boom", _caught("again"), "/a")
+    assert len(_records(caplog, "Boom (repeated)")) == 1
+
+
+def test_prebuilt_error_body_matches_json_response():
+    path = '/api/v1/items/"ü"'
+    response = error_response(503, "Busy", path)
+    expected = JSONResponse({"error": {"code": 503, "message": "Busy", "path": path}})
+
+    assert response.body == expected.body
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.body)["error"]["path"] == path
+
+
+@pytest.mark.asyncio
+async def test_database_error_storm_is_logged_once(client, caplog, monkeypatch):
+    monkeypatch.setattr(error_handlers, "exception_log", ExceptionLogThrottle(interval=60))
+
+    async def broken_get_db():
+        raise OperationalError("SELECT 1", {}, ConnectionRefusedError("connection refused"))
+        yield
+
+    app.dependency_overrides[get_db] = broken_get_db
+    client.cookies.set("better-auth.session_token", "valid-token")
+    with caplog.at_level(logging.ERROR, logger="saas_starter"):
+        for _ in range(10):
+            response = await client.get("/api/v1/users/me")
+            assert response.status_code == 500
+            assert response.json()["error"]["message"] == DATABASE_ERROR_MESSAGE
+
+    [record] = _records(caplog, "Database error occurred")
+    assert record.exc_info is not None
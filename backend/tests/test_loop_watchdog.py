@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.core.loop_watchdog import LoopWatchdog, current_route, event_loop_lag_seconds
+
+
+def _block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocked_loop_is_reported_with_stack(caplog):
+    watchdog = LoopWatchdog(threshold=0.05, interval=0.01)
+    await watchdog.start()
+    current_route.set("GET /slow")
+    try:
+        with caplog.at_level(logging.WARNING, logger="saas_starter"):
+            await asyncio.sleep(0.05)
+            _block_the_loop(0.3)
+            await asyncio.sleep(0.05)
+    finally:
+        await watchdog.stop()
+
+    reports = [r for r in caplog.records if r.getMessage() == "Event loop blocked"]
+    assert len(reports) == 1
+    assert reports[0].duration_ms >= 50
+    assert "_block_the_loop" in reports[0].stack
+    if hasattr(asyncio.Task, "get_context"):
+        assert reports[0].path == "GET /slow"
+
+
+@pytest.mark.asyncio
+async def test_lag_is_recorded(caplog):
+    before = sum(sum(state[:-1]) for state in event_loop_lag_seconds.values.values())
+    watchdog = LoopWatchdog(threshold=1.0, interval=0.01)
+    await watchdog.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        await watchdog.stop()
+
+    after = sum(sum(state[:-1]) for state in event_loop_lag_seconds.values.values())
+    assert after - before >= 5
+    assert not [r for r in caplog.records if r.getMessage() == "Event loop blocked"]
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.cache_service import BUCKET_PREFIX, SessionCache
+
+
+@pytest.mark.asyncio
+async def test_buckets_layout_round_trip(redis_client):
+    cache = SessionCache(redis_client, layout="buckets", dual_read=False)
+    bucket, field = cache._bucket(cache._hash("token-1"))
+
+    await cache.set_user_id("token-1", "user-1", ttl=60)
+
+    assert await cache.get_user_id("token-1") == "user-1"
+    assert await redis_client.keys("session:*") == []
+    assert bucket.startswith(BUCKET_PREFIX)
+    assert await redis_client.object("encoding", bucket) in ("listpack", "ziplist")
+    assert (await redis_client.hget(bucket, field)).endswith(":user-1")
+
+    await cache.delete("token-1")
+    assert await cache.get_user_id("token-1") is None
+
+
+@pytest.mark.asyncio
+async def test_expired_fields_are_not_returned_and_are_cleaned_up(redis_client):
+    cache = SessionCache(redis_client, layout="buckets", dual_read=False)
+    expired, live = "abcd" + "0" * 12, "abcd" + "1" * 12
+    bucket, expired_field = cache._bucket(expired)
+
+    await cache._set_field(expired, "user-1", int(time.time()) - 1)
+    assert await cache.get_user_id("never-cached") is None
+    await cache._set_field(live, "user-2", int(time.time()) + 60)
+
+    # Dropped by its own TTL, or by the write to its bucket without field TTLs
+    assert not await redis_client.hexists(bucket, expired_field)
+    assert await redis_client.hlen(bucket) == 1
+    # The bucket itself never outlives its last field
+    assert await redis_client.ttl(bucket) in range(-1, 61)
+
+
+@pytest.mark.asyncio
+async def test_dual_read_moves_sessions_from_the_keys_layout(redis_client):
+    await SessionCache(redis_client, layout="keys").set_user_id("token-1", "user-1", ttl=600)
+    cache = SessionCache(redis_client, layout="buckets", dual_read=True)
+
+    assert await cache.get_user_id("token-1") == "user-1"
+
+    assert await redis_client.keys("session:*") == []
+    bucket, field = cache._bucket(cache._hash("token-1"))
+    expires_at = int((await redis_client.hget(bucket, field)).partition(":")[0])
+    assert 590 < expires_at - time.time() <= 600
+    assert await SessionCache(redis_client, "buckets", dual_read=False).get_user_id("token-1")
+
+
+@pytest.mark.asyncio
+async def test_requests_authenticate_with_the_buckets_layout(
+    client, auth_user, redis_client, monkeypatch
+):
+    monkeypatch.setattr(settings, "session_cache_layout", "buckets")
+    client.cookies.set("better-auth.session_token", "valid-token")
+
+    for _ in range(2):
+        response = await client.get("/api/v1/users/me")
+        assert response.status_code == 200
+
+    assert await redis_client.keys(f"{BUCKET_PREFIX}*") != []
+    assert await redis_client.keys("session:[0-9a-f]*") == []
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.models.auth import Session
+from app.services.session_filter import (
+    BloomFilter,
+    RejectedSessionFilter,
+    session_filter,
+    session_filter_false_positives,
+    token_digest,
+)
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000)
+        for n in range(1000):
+            bloom.add(token_digest(f"token-{n}"))
+        assert all(token_digest(f"token-{n}") in bloom for n in range(1000))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for n in range(1000):
+            bloom.add(token_digest(f"token-{n}"))
+        hits = sum(token_digest(f"other-{n}") in bloom for n in range(10_000))
+        assert hits < 300
+
+
+@pytest.mark.asyncio
+async def test_repeated_bad_token_skips_database(client, statements):
+    client.cookies.set("better-auth.session_token", "stuffed-token")
+
+    for _ in range(2):
+        response = await client.get("/api/v1/users/me")
+        assert response.status_code == 401
+    assert statements
+
+    statements.clear()
+    response = await client.get("/api/v1/users/me")
+    assert response.status_code == 401
+    assert response.json()["error"]["message"] == "Invalid or expired session"
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_single_failure_does_not_lock_out_new_session(client, db_session, auth_user):
+    # The cookie arrives before the session row is visible, then the row appears
+    client.cookies.set("better-auth.session_token", "fresh-token")
+    assert (await client.get("/api/v1/users/me")).status_code == 401
+
+    now = datetime.utcnow()
+    db_session.add(
+        Session(
+            id="fresh-session",
+            token="fresh-token",
+            user_id=auth_user.id,
+            expires_at=now + timedelta(hours=1),
+            created_at=now,
+            updated_at=now,
+        )
+    )
+    await db_session.commit()
+
+    assert (await client.get("/api/v1/users/me")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_filter_false_positive_does_not_reject(client, auth_user):
+    before = sum(session_filter_false_positives.values.values())
+    session_filter.filter.add(token_digest("valid-token"))
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.get("/api/v1/users/me")
+
+    assert response.status_code == 200
+    assert sum(session_filter_false_positives.values.values()) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_rejections_are_shared_through_redis(redis_client):
+    publisher = RejectedSessionFilter(ttl=60, capacity=1000)
+    subscriber = RejectedSessionFilter(ttl=60, capacity=1000)
+    await subscriber.sync(redis_client)
+
+    await publisher.add(redis_client, "shared-bad-token")
+    assert not subscriber.might_be_rejected("shared-bad-token")
+
+    await subscriber.sync(redis_client)
+    assert subscriber.might_be_rejected("shared-bad-token")
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.db.models.auth import Session, User, Verification
+from app.services.cache_service import SessionCache
+from app.services.session_sweeper import (
+    expired_auth_rows_deleted,
+    sweep_expired,
+    sweep_expired_auth_rows,
+)
+
+
+async def _add_sessions(db_session, user_id: str, expired: int, live: int) -> None:
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": f"{kind}-{n}",
+            "token": f"{kind}-token-{n}",
+            "user_id": user_id,
+            "expires_at": now + offset,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for kind, count, offset in (
+            ("expired", expired, timedelta(minutes=-1)),
+            ("live", live, timedelta(hours=1)),
+        )
+        for n in range(count)
+    ]
+    await db_session.execute(insert(Session).values(rows))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_sweeps_expired_sessions_in_batches(
+    db_session, auth_user, async_engine, redis_client
+):
+    await _add_sessions(db_session, auth_user.id, expired=5, live=3)
+    cache = SessionCache(redis_client)
+    await cache.set_user_id("expired-token-0", auth_user.id)
+    await cache.set_user_id("live-token-0", auth_user.id)
+    swept = []
+
+    async def on_deleted(tokens):
+        swept.append(len(tokens))
+        await cache.delete_many(tokens)
+
+    deleted = await sweep_expired(
+        async_engine, Session, batch_size=3, pause=0, on_deleted=on_deleted
+    )
+
+    assert deleted == 5
+    assert sum(swept) == 5 and len(swept) > 1
+    ids = set(await db_session.scalars(select(Session.id)))
+    assert ids == {"test-session", "live-0", "live-1", "live-2"}
+    assert await cache.get_user_id("expired-token-0") is None
+    assert await cache.get_user_id("live-token-0") == auth_user.id
+
+
+@pytest.mark.asyncio
+async def test_sweeps_verifications_and_counts_deletions(
+    db_session, auth_user, async_engine, redis_client
+):
+    now = datetime.utcnow()
+    db_session.add_all(
+        Verification(
+            id=f"verification-{n}",
+            identifier="test@example.com",
+            value=f"code-{n}",
+            expires_at=now + timedelta(minutes=10 if n else -10),
+            created_at=now,
+            updated_at=now,
+        )
+        for n in range(2)
+    )
+    await db_session.commit()
+    await _add_sessions(db_session, auth_user.id, expired=1, live=0)
+    before = {
+        table: expired_auth_rows_deleted.values.get((table,), 0)
+        for table in ("session", "verification")
+    }
+
+    assert await sweep_expired_auth_rows(redis_client, async_engine) == 2
+
+    assert set(await db_session.scalars(select(Verification.id))) == {"verification-1"}
+    assert expired_auth_rows_deleted.values[("session",)] == before["session"] + 1
+    assert expired_auth_rows_deleted.values[("verification",)] == before["verification"] + 1
+    assert await db_session.get(User, auth_user.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_locked_sessions_are_left_for_the_next_sweep(db_session, auth_user, async_engine):
+    await _add_sessions(db_session, auth_user.id, expired=2, live=0)
+
+    async with async_engine.begin() as conn:
+        await conn.execute(select(Session.id).where(Session.id == "expired-0").with_for_update())
+        assert await sweep_expired(async_engine, Session, pause=0) == 1
+
+    assert await sweep_expired(async_engine, Session, pause=0) == 1
+    assert set(await db_session.scalars(select(Session.id))) == {"test-session"}
@@ -0,0 +1,124 @@
+import time
+from datetime import UTC, date, datetime
+
+import pytest
+import pytest_asyncio
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from app.db.models.api_usage import ApiUsage
+from app.db.models.subscription import Subscription
+from app.services.usage import (
+    BATCH_PREFIX,
+    PENDING_KEY,
+    SECONDS_PER_DAY,
+    UsageMeter,
+    billing_period,
+    rollup_usage,
+    usage_meter,
+)
+
+
+def _today() -> int:
+    return int(time.time()) // SECONDS_PER_DAY
+
+
+@pytest_asyncio.fixture
+async def usage_keys(redis_client):
+    """Clear pending and batched usage, which the session-wide Redis would carry over."""
+
+    async def clear():
+        await redis_client.delete(PENDING_KEY)
+        async for key in redis_client.scan_iter(match=f"{BATCH_PREFIX}*"):
+            await redis_client.delete(key)
+
+    await clear()
+    yield
+    await clear()
+
+
+async def _calls(db_session, owner_id: str) -> int:
+    result = await db_session.execute(select(ApiUsage.calls).where(ApiUsage.owner_id == owner_id))
+    return sum(result.scalars())
+
+
+@pytest.mark.asyncio
+async def test_flush_and_rollup(db_session, redis_client, async_engine, auth_user, usage_keys):
+    meter = UsageMeter(flush_interval=5.0)
+    for _ in range(3):
+        meter.record(auth_user.id)
+    meter.record("deleted-user")
+
+    await meter.flush(redis_client)
+    assert meter.counts == {}
+    assert await redis_client.hget(PENDING_KEY, f"{_today()}:{auth_user.id}") == "3"
+
+    # The deleted user's call is dropped, not counted
+    assert await rollup_usage(redis_client, async_engine) == 3
+    assert await _calls(db_session, auth_user.id) == 3
+    assert not await redis_client.exists(PENDING_KEY)
+    assert await rollup_usage(redis_client, async_engine) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_counts(redis_client, usage_keys):
+    meter = UsageMeter(flush_interval=5.0)
+    meter.record("user-1")
+    unreachable = Redis(host="localhost", port=1, socket_connect_timeout=0.1)
+
+    with pytest.raises(RedisError):
+        await meter.flush(unreachable)
+    await unreachable.aclose()
+    meter.record("user-1")
+    assert meter.counts == {("user-1", _today()): 2}
+
+    await meter.flush(redis_client)
+    assert await redis_client.hget(PENDING_KEY, f"{_today()}:user-1") == "2"
+
+
+@pytest.mark.asyncio
+async def test_retried_batch_is_not_counted_twice(
+    db_session, redis_client, async_engine, auth_user, usage_keys
+):
+    batch = f"{BATCH_PREFIX}interrupted"
+    await redis_client.hset(batch, f"{_today()}:{auth_user.id}", 5)
+    assert await rollup_usage(redis_client, async_engine) == 5
+
+    # A rollup that committed but died before deleting the batch leaves it behind
+    await redis_client.hset(batch, f"{_today()}:{auth_user.id}", 5)
+    assert await rollup_usage(redis_client, async_engine) == 0
+    assert not await redis_client.exists(batch)
+    assert await _calls(db_session, auth_user.id) == 5
+
+
+def test_billing_period():
+    assert billing_period(None, date(2026, 12, 15)) == (date(2026, 12, 1), date(2027, 1, 1))
+    subscription = Subscription(
+        period_start=datetime(2026, 10, 3, 12, tzinfo=UTC),
+        period_end=datetime(2026, 11, 3, 12, tzinfo=UTC),
+    )
+    assert billing_period(subscription, date(2026, 10, 18)) == (
+        date(2026, 10, 3),
+        date(2026, 11, 3),
+    )
+
+
+@pytest.mark.asyncio
+async def test_usage_endpoint_counts_every_stage(
+    client, db_session, redis_client, auth_user, usage_keys
+):
+    usage_meter.counts.clear()
+    today = datetime.now(UTC).date()
+    db_session.add(ApiUsage(owner_id=auth_user.id, day=today, calls=10))
+    await db_session.commit()
+    await redis_client.hset(PENDING_KEY, f"{_today()}:{auth_user.id}", 2)
+
+    client.cookies.set("better-auth.session_token", "valid-token")
+    response = await client.get("/api/v1/usage")
+
+    assert response.status_code == 200
+    body = response.json()
+    # Rolled up, pending in Redis, and this request counted in process
+    assert body["calls"] == 13
+    assert body["period_start"] == today.replace(day=1).isoformat()